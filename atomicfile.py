@@ -0,0 +1,43 @@
+''' atomicfile: replace a file's contents in one step
+
+Writing a file in place leaves it half written for anyone reading it
+meanwhile, and truncated if the writer dies.  atomic_write() writes
+to a temporary file in the same directory and renames that over the
+original, so readers see either the old contents or the new.
+'''
+from __future__ import print_function
+
+__all__ = ["atomic_write"]
+
+import os
+
+
+def atomic_write(path, data, mode=None, sync=False):
+    '''replace the contents of 'path' with 'data' (str or bytes)
+    The file gets permissions 'mode'; by default those of the file
+    being replaced, or 0644 for a new one.  With 'sync' the data is
+    flushed to disk before the rename, so it survives a crash too.
+    Raises OSError if the file can't be written; the temporary file
+    is removed again.
+    '''
+    # tempfile is slow to import, and scripts starting up seldom write
+    import tempfile
+
+    if mode is None:
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+    fd, tmpname = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                   prefix='.' + os.path.basename(path))
+    try:
+        os.chmod(tmpname, mode)
+        with os.fdopen(fd, 'wb' if isinstance(data, bytes) else 'w') as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmpname, path)
+    except BaseException:
+        os.remove(tmpname)
+        raise
@@ -0,0 +1,64 @@
+''' bench_yamlio: yaml load/dump throughput, libyaml vs pure Python
+
+Generates a large update manifest in memory and times loading and
+dumping it with the pure-Python safe classes and with whatever
+yamlio is using.
+
+usage: python bench_yamlio.py [napps]
+'''
+from __future__ import print_function
+
+import sys
+from timeit import default_timer
+
+import yaml
+
+import yamlio
+
+
+def make_manifest(napps):
+    manifest = {}
+    for i in range(napps):
+        name = 'app%05d' % i
+        manifest[name] = {
+            'name': name,
+            'sha256': '%064x' % i,
+            'releasedate': 'May 29 2017',
+            'version': '1.%d' % (i % 10),
+            'url': 'https://example.com/updates/%s.py' % name,
+        }
+    return manifest
+
+
+def timed(func, *args):
+    start = default_timer()
+    result = func(*args)
+    return default_timer() - start, result
+
+
+def report(name, op, elapsed, nbytes):
+    print('%-8s %-4s %8.1f ms  %7.2f MB/s'
+          % (name, op, elapsed * 1000, nbytes / elapsed / 1e6))
+
+
+def main(napps):
+    manifest = make_manifest(napps)
+    paths = [('python', lambda d: yaml.dump(d, Dumper=yaml.SafeDumper,
+                                            default_flow_style=False),
+              lambda s: yaml.load(s, Loader=yaml.SafeLoader))]
+    if yamlio.BACKEND == 'libyaml':
+        paths.append(('libyaml', yamlio.dump, yamlio.load))
+    else:
+        print('libyaml not available, only timing the python path')
+
+    print('manifest of %d apps' % napps)
+    for name, dump, load in paths:
+        elapsed, text = timed(dump, manifest)
+        report(name, 'dump', elapsed, len(text))
+        elapsed, data = timed(load, text)
+        report(name, 'load', elapsed, len(text))
+        assert data == manifest
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
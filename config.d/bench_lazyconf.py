@@ -0,0 +1,84 @@
+''' bench_lazyconf: time and memory to get one section, lazy vs full
+
+Writes a generated config (nsections sections, as in bench_loader)
+as YAML and JSON, and for each measures the time to get the first
+value out of one section, and the peak memory traced while doing it:
+
+    full load       loader.load without a snapshot, then the section
+    lazy, scan      LazyConfig with no index file yet: scanning the
+                    file and writing the index, then the section
+    lazy, indexed   LazyConfig using that index file
+
+usage: python bench_lazyconf.py [nsections]
+'''
+from __future__ import print_function
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import tracemalloc
+from timeit import default_timer
+
+import toplevel
+import yamlio
+
+import loader
+import lazyconf
+from bench_loader import make_config
+
+
+def full(path, key):
+    loader.invalidate()
+    return loader.load(path, snapshot=False)[key]['host']
+
+
+def lazy(path, key):
+    return lazyconf.LazyConfig(path)[key]['host']
+
+
+def measure(func, path, key):
+    '''return (seconds, peak bytes) for func(path, key)'''
+    start = default_timer()
+    func(path, key)
+    elapsed = default_timer() - start
+    tracemalloc.start()
+    func(path, key)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(n):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        cfg = make_config(n)
+        yml = os.path.join(tmpdir, 'config.yml')
+        with open(yml, 'w') as f:
+            yamlio.dump(cfg, f)
+        jsn = os.path.join(tmpdir, 'config.json')
+        with open(jsn, 'w') as f:
+            json.dump(cfg, f, indent=4)
+        key = 'service%d' % (n // 2)
+        for path in (yml, jsn):
+            print('%s, %d kB, %d sections'
+                  % (os.path.basename(path), os.path.getsize(path) // 1024, n))
+            results = [('full load', measure(full, path, key))]
+            index = lazyconf.index_path(path)
+
+            def scan(path, key):
+                if os.path.exists(index):
+                    os.remove(index)
+                return lazy(path, key)
+            results.append(('lazy, scan', measure(scan, path, key)))
+            results.append(('lazy, indexed', measure(lazy, path, key)))
+            for name, (elapsed, peak) in results:
+                print('  %-14s %9.2f ms  peak %8d kB'
+                      % (name, elapsed * 1000, peak // 1024))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
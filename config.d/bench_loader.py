@@ -0,0 +1,102 @@
+''' bench_loader: config startup time, parsing vs loading a snapshot
+
+Writes a large generated config (nsections sections shaped like the
+ones in config.yml) to a temporary directory as YAML and JSON, then
+for each times, in fresh processes so nothing is already imported
+or cached: a cold load which parses the file and writes the
+snapshot, and a warm one which loads the snapshot.  In-process
+times for parsing, loading the snapshot and the memoized repeat
+are shown too.  JSON files are not snapshotted, so for them the
+snapshot figures are just another parse, for comparison.
+
+usage: python bench_loader.py [nsections]
+'''
+from __future__ import print_function
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+from timeit import default_timer
+
+import toplevel
+import yamlio
+
+import loader
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_config(n):
+    cfg = {}
+    for i in range(n):
+        cfg['service%d' % i] = {
+            'host': 'host%d.example.com' % i,
+            'port': 3306 + i % 100,
+            'user': 'user%d' % i,
+            'passwd': 'secret %d' % i,
+            'preprocessing_queue': ['preprocessing.scale_and_center',
+                                    'preprocessing.dot_reduction',
+                                    'preprocessing.connect_lines'],
+            'use_anonymous': i % 2 == 0,
+        }
+    return cfg
+
+
+def in_process(path):
+    loader.invalidate()
+    start = default_timer()
+    loader.load(path, snapshot=False)
+    parse = default_timer() - start
+    loader.invalidate()
+    loader.load(path)        # writes the snapshot
+    loader.invalidate()
+    start = default_timer()
+    loader.load(path)
+    snap = default_timer() - start
+    start = default_timer()
+    loader.load(path)
+    memo = default_timer() - start
+    return parse, snap, memo
+
+
+def process_time(path):
+    code = 'import sys; sys.path.insert(0, %r); import loader; ' \
+           'loader.load(%r)' % (HERE, path)
+    start = default_timer()
+    subprocess.check_call([sys.executable, '-c', code])
+    return default_timer() - start
+
+
+def main(n):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        cfg = make_config(n)
+        yml = os.path.join(tmpdir, 'config.yml')
+        with open(yml, 'w') as f:
+            yamlio.dump(cfg, f)
+        jsn = os.path.join(tmpdir, 'config.json')
+        with open(jsn, 'w') as f:
+            json.dump(cfg, f)
+        print('%d sections: yaml %d kB, json %d kB, yaml backend %s'
+              % (n, os.path.getsize(yml) // 1024, os.path.getsize(jsn) // 1024,
+                 yamlio.BACKEND))
+        for path in (yml, jsn):
+            name = os.path.basename(path)
+            parse, snap, memo = in_process(path)
+            print('%-12s parse %8.1f ms  snapshot %7.1f ms  memo %6.3f ms'
+                  % (name, parse * 1000, snap * 1000, memo * 1000))
+            if os.path.exists(loader.snapshot_path(path)):
+                os.remove(loader.snapshot_path(path))
+            cold = process_time(path)
+            warm = process_time(path)
+            print('%-12s process start: cold %6.1f ms, from snapshot %6.1f ms'
+                  % (name, cold * 1000, warm * 1000))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -1,5 +1,4 @@
-import json
+import loader
 
-with open('config.json') as json_data_file:
-    data = json.load(json_data_file)
+data = loader.load('config.json')
 print(data)
@@ -0,0 +1,264 @@
+''' lazyconf: read sections of a large config file only when used
+
+yamlrd.py, like loader.load, parses the whole document even if only
+the mysql section is wanted, and generated configs can run to tens
+of megabytes with thousands of top-level sections.  A LazyConfig
+instead finds where each top-level section starts and ends, without
+parsing, and parses a section the first time it is looked up:
+
+    cfg = LazyConfig('config.yml')
+    host = cfg['mysql']['host']     # only 'mysql' is parsed
+
+It behaves as a read-only Mapping of section names to their parsed
+values.  The offsets are found by a quick scan of the raw file:
+
+  - YAML: top-level keys are the lines starting in the first column,
+    apart from '- ' items of a list, which belong to the section
+    above them as yaml.dump writes them.  Only simple keys (letters, digits, '_', '.' and '-', and not
+    words like 'yes' that YAML reads as something else) are indexed;
+    a flow-style document, several documents, a top-level sequence
+    or anchors and aliases (which may refer across sections) make
+    it fall back to loading the whole file on open.  A document
+    which is not a mapping at all is a ValueError.
+  - JSON: the top-level object is walked with the json module's
+    raw_decode, which finds where each value ends at nearly the
+    speed of json.load, though the values are thrown away again.
+
+The offsets are saved in an index file next to the config
+(config.yml.index), stamped with the config's mtime and size, so
+later opens don't scan again.  If the file changes after it was
+opened, the next section to be parsed notices, and the index and
+any parsed sections are thrown away and built afresh.
+'''
+from __future__ import print_function
+
+__all__ = ["LazyConfig", "index_path"]
+
+import os
+import re
+import json
+import threading
+from collections.abc import Mapping
+
+import toplevel
+import yamlio
+
+import loader
+
+INDEX_SUFFIX = '.index'
+MAGIC = 'lazyconf-1'
+
+_YAML_LINE = re.compile(br'^(?![ \t\r\n#])[^\n]+', re.M)
+_YAML_KEY = re.compile(br'([A-Za-z_][A-Za-z0-9_.\-]*)[ \t]*:(?:[ \t\r]|$)')
+_YAML_SPECIAL = set(['y', 'n', 'yes', 'no', 'true', 'false', 'on', 'off',
+                     'null'])
+_YAML_ALIAS = re.compile(br'(?:^|[\s\[{,])[&*][^\s,\]}]', re.M)
+_YAML_ITEM = re.compile(br'-(?:[ \t\r]|$)')
+_JSON_SPACE = re.compile(r'[ \t\n\r]*')
+_json_decode = json.JSONDecoder().raw_decode
+
+
+class _Unindexable(Exception):
+    pass
+
+
+def index_path(path):
+    '''return the name of the index file for the config file 'path' '''
+    return path + INDEX_SUFFIX
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _scan_yaml(data):
+    '''return [(key, start, end)] for the top-level sections of 'data' '''
+    if _YAML_ALIAS.search(data):
+        raise _Unindexable('anchors or aliases')
+    sections = []
+    for m in _YAML_LINE.finditer(data):
+        line = m.group()
+        if line.rstrip() == b'---' and not sections:
+            continue
+        if sections and _YAML_ITEM.match(line):
+            continue        # a list item of the section above
+        key = _YAML_KEY.match(line)
+        if key is None:
+            raise _Unindexable('not a simple key: %r' % line[:40])
+        name = key.group(1).decode('ascii')
+        if name.lower() in _YAML_SPECIAL:
+            raise _Unindexable('special key %s' % name)
+        if sections:
+            sections[-1][2] = m.start()
+        sections.append([name, m.start(), len(data)])
+    return sections
+
+
+def _scan_json(data):
+    '''return [(key, start, end)] for the values of the top-level keys'''
+    text = data.decode('utf-8')
+    space = _JSON_SPACE.match
+    pos = space(text).end()
+    if text[pos:pos + 1] != '{':
+        raise _Unindexable('not a JSON object')
+    sections = []
+    pos = space(text, pos + 1).end()
+    try:
+        while text[pos:pos + 1] != '}':
+            key, pos = _json_decode(text, pos)
+            pos = space(text, pos).end()
+            if not isinstance(key, str) or text[pos:pos + 1] != ':':
+                raise ValueError('expected a key at %d' % pos)
+            start = space(text, pos + 1).end()
+            end = _json_decode(text, start)[1]
+            sections.append([key, start, end])
+            pos = space(text, end).end()
+            if text[pos:pos + 1] == ',':
+                pos = space(text, pos + 1).end()
+            elif text[pos:pos + 1] != '}':
+                raise ValueError('expected , or } at %d' % pos)
+    except ValueError as e:
+        # let the full load report what is wrong
+        raise _Unindexable(str(e))
+    if not text.isascii():
+        # the offsets are of characters, turn them into bytes
+        chars = byte = 0
+        for section in sections:
+            for i in (1, 2):
+                byte += len(text[chars:section[i]].encode('utf-8'))
+                chars = section[i]
+                section[i] = byte
+    return sections
+
+
+def _trim_json(text):
+    '''strip the separator following a JSON value'''
+    text = text.rstrip()
+    if text.endswith(b','):
+        text = text[:-1]
+    return text
+
+
+class LazyConfig(Mapping):
+    '''read-only mapping of the sections of the config file 'path'
+    With 'index' False, no index file is read or written.
+    '''
+
+    def __init__(self, path, index=True):
+        self.path = os.path.abspath(path)
+        self.use_index = index
+        ext = os.path.splitext(self.path)[1].lower()
+        if ext == '.json':
+            self.format = 'json'
+        elif ext in ('.yml', '.yaml'):
+            self.format = 'yaml'
+        else:
+            raise ValueError("don't know how to load config file %s" % path)
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        self.stamp = _stamp(self.path)
+        self._parsed = {}
+        self._full = None
+        self._sections = self._read_index() if self.use_index else None
+        if self._sections is None:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            scan = _scan_json if self.format == 'json' else _scan_yaml
+            try:
+                sections = scan(data)
+            except _Unindexable:
+                full = loader.load(self.path, snapshot=False)
+                if full is None:
+                    full = {}
+                if not isinstance(full, dict):
+                    raise ValueError("config %s is not a mapping" % self.path)
+                self._full = full
+                self._sections = {}
+                self._order = list(self._full)
+                return
+            self._sections = dict((key, (start, end))
+                                  for key, start, end in sections)
+            if self.use_index:
+                self._write_index(sections)
+        self._order = sorted(self._sections,
+                             key=lambda key: self._sections[key][0])
+
+    def _read_index(self):
+        try:
+            with open(index_path(self.path)) as f:
+                index = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if (not isinstance(index, dict) or index.get('magic') != MAGIC
+                or index.get('stamp') != self.stamp):
+            return None
+        sections = {}
+        try:
+            for key, start, end in index['sections']:
+                if not (isinstance(start, int) and isinstance(end, int)
+                        and 0 <= start <= end):
+                    return None
+                sections[key] = (start, end)
+        except (KeyError, TypeError, ValueError):
+            return None     # damaged; scan again
+        return sections
+
+    def _write_index(self, sections):
+        blob = json.dumps({'magic': MAGIC, 'stamp': self.stamp,
+                           'sections': sections})
+        loader.atomic_write(index_path(self.path), blob.encode('utf-8'))
+
+    def _parse(self, key, start, end):
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            text = f.read(end - start)
+        if self.format == 'json':
+            return json.loads(_trim_json(text).decode('utf-8'))
+        section = yamlio.load(text.decode('utf-8'))
+        if not isinstance(section, dict) or list(section) != [key]:
+            raise ValueError('section %s of %s is not where the index '
+                             'says' % (key, self.path))
+        return section[key]
+
+    def __getitem__(self, key):
+        if self._full is not None:
+            return self._full[key]
+        try:
+            return self._parsed[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if _stamp(self.path) != self.stamp:
+                self._open()
+                if self._full is not None:
+                    return self._full[key]
+            if key in self._parsed:
+                return self._parsed[key]
+            start, end = self._sections[key]
+            value = self._parsed[key] = self._parse(key, start, end)
+        return value
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __len__(self):
+        if self._full is not None:
+            return len(self._full)
+        return len(self._sections)
+
+    def __contains__(self, key):
+        if self._full is not None:
+            return key in self._full
+        return key in self._sections
+
+    @property
+    def indexed(self):
+        '''False if the file couldn't be indexed and was loaded whole'''
+        return self._full is None
+
+    def parsed(self):
+        '''return the names of the sections parsed so far'''
+        return list(self._parsed)
@@ -0,0 +1,139 @@
+''' loader: load config files, parsing each only when it changes
+
+jsonrd.py and yamlrd.py open and parse their config from scratch
+every time, and parsing a large YAML file is slow enough to show up
+in startup times.  load() reads JSON or YAML, according to the file's
+extension, and avoids parsing where it can:
+
+  - within a process, the parsed config is kept, keyed by the path
+    with the file's mtime and size, and returned again as long as
+    the file has not changed
+  - the first process to parse a YAML file writes a snapshot of the
+    result next to it (config.yml.snapshot) in marshal format,
+    stamped with the source's mtime and size.  Later processes load
+    that instead of parsing the source again, which is many times
+    faster.  A snapshot which does not match its source, was written
+    by a different Python, or can't be read, is ignored and
+    rewritten.  JSON parses about as fast as a snapshot loads, so
+    JSON files don't get one.
+
+marshal is used rather than pickle because loading it can't run
+code.  It can't hold everything YAML can (dates, for instance), and
+configs using those are simply not snapshotted.  If the directory
+isn't writable, there is no snapshot either.
+
+The same object is returned to every caller, so do not modify it.
+'''
+from __future__ import print_function
+
+__all__ = ["load", "invalidate", "snapshot_path", "atomic_write"]
+
+import os
+import sys
+import json
+import marshal
+import threading
+
+import toplevel
+import yamlio
+import atomicfile
+
+SNAPSHOT_SUFFIX = '.snapshot'
+# marshal's format depends on the Python version
+MAGIC = 'loader-1-%s' % sys.implementation.cache_tag
+
+_lock = threading.Lock()
+_cache = {}     # abspath -> (stamp, data)
+
+
+def _parse_json(f):
+    return json.load(f)
+
+
+# extension -> (parser, whether to snapshot)
+_PARSERS = {
+    '.json': (_parse_json, False),
+    '.yml': (yamlio.load, True),
+    '.yaml': (yamlio.load, True),
+}
+
+
+def snapshot_path(path):
+    '''return the name of the snapshot for the config file 'path' '''
+    return path + SNAPSHOT_SUFFIX
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_snapshot(path, stamp):
+    try:
+        with open(snapshot_path(path), 'rb') as f:
+            # marshal.load(f) reads a little at a time, this is faster
+            magic, snapstamp, data = marshal.loads(f.read())
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+    if magic != MAGIC or tuple(snapstamp) != stamp:
+        return None
+    return data
+
+
+def atomic_write(path, blob):
+    '''replace the file 'path' with the bytes 'blob' in one step
+    The file is readable by its owner only, like the config may be.
+    Returns False, quietly, if it can't be written.
+    '''
+    try:
+        atomicfile.atomic_write(path, blob, mode=0o600)
+    except (IOError, OSError):
+        return False
+    return True
+
+
+def _write_snapshot(path, stamp, data):
+    try:
+        blob = marshal.dumps((MAGIC, stamp, data))
+    except ValueError:
+        return      # something in there marshal can't handle
+    atomic_write(snapshot_path(path), blob)
+
+
+def load(path, snapshot=True):
+    '''return the parsed contents of the config file 'path'
+    Raises ValueError for an extension there is no parser for, and
+    whatever the parser raises for a bad file.  With 'snapshot' False
+    no snapshot is read or written.
+    '''
+    path = os.path.abspath(path)
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in _PARSERS:
+        raise ValueError("don't know how to load config file %s" % path)
+    parse, snapshotted = _PARSERS[ext]
+    snapshot = snapshot and snapshotted
+
+    stamp = _stamp(path)
+    with _lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    data = _read_snapshot(path, stamp) if snapshot else None
+    if data is None:
+        with open(path, 'r') as f:
+            data = parse(f)
+        if snapshot:
+            _write_snapshot(path, stamp, data)
+    with _lock:
+        _cache[path] = (stamp, data)
+    return data
+
+
+def invalidate(path=None):
+    '''forget the parsed config for 'path', or for all files'''
+    with _lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(path), None)
@@ -0,0 +1,137 @@
+import os
+import json
+import shutil
+
+import pytest
+
+import loader
+from lazyconf import LazyConfig, index_path
+
+
+@pytest.fixture
+def configs(tmp_path):
+    '''copies of the example configs in a scratch directory'''
+    loader.invalidate()
+    for name in ('config.yml', 'config.json'):
+        shutil.copy(name, str(tmp_path / name))
+    return tmp_path
+
+
+@pytest.mark.parametrize('name', ['config.yml', 'config.json'])
+def test_mapping(configs, name):
+    path = str(configs / name)
+    cfg = LazyConfig(path)
+    assert cfg.indexed
+    assert list(cfg) == ['mysql', 'other'] and len(cfg) == 2
+    assert cfg.parsed() == []
+    assert cfg['mysql']['db'] == 'write-math'
+    assert cfg.parsed() == ['mysql']
+    assert 'other' in cfg and 'nosuch' not in cfg
+    assert cfg.get('nosuch') is None
+    assert dict(cfg) == loader.load(path, snapshot=False)
+    assert os.path.exists(index_path(path))
+
+
+def test_tricky_json(tmp_path):
+    data = {'a': {'s': 'braces } ] { in "strings"', 'l': [1, [2, {}]]},
+            'b': 'just a string', 'c': 3, 'd': None, 'e': []}
+    path = str(tmp_path / 'c.json')
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+    assert dict(LazyConfig(path, index=False)) == data
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    assert dict(LazyConfig(path, index=False)) == data
+
+
+def test_index_reused(configs, monkeypatch):
+    path = str(configs / 'config.yml')
+    LazyConfig(path)
+    import lazyconf
+    monkeypatch.setattr(lazyconf, '_scan_yaml', None)      # not used
+    assert LazyConfig(path)['other']['use_anonymous'] is True
+
+
+def test_file_changed(configs):
+    path = str(configs / 'config.yml')
+    cfg = LazyConfig(path)
+    with open(path, 'a') as f:
+        f.write('added:\n    key: value\n')
+    assert cfg['added'] == {'key': 'value'}
+    assert cfg['mysql']['host'] == 'localhost'
+    assert LazyConfig(path)['added'] == {'key': 'value'}
+
+
+@pytest.mark.parametrize('text', [
+    'base: &base\n    a: 1\nderived:\n    <<: *base\n',
+    '{mysql: {host: localhost}}\n',
+    'yes: 1\nno: 2\n',
+])
+def test_yaml_fallback(tmp_path, text):
+    path = str(tmp_path / 'c.yml')
+    with open(path, 'w') as f:
+        f.write(text)
+    cfg = LazyConfig(path)
+    assert not cfg.indexed
+    assert dict(cfg) == loader.load(path, snapshot=False)
+
+
+@pytest.mark.parametrize('name, text', [
+    ('c.yml', '- 1\n- 2\n'),
+    ('c.json', '[1, 2]'),
+])
+def test_not_a_mapping(tmp_path, name, text):
+    path = str(tmp_path / name)
+    with open(path, 'w') as f:
+        f.write(text)
+    with pytest.raises(ValueError):
+        LazyConfig(path)
+
+
+@pytest.mark.parametrize('index', [
+    '[]',
+    '{"magic": "lazyconf-1", "stamp": %s, "sections": 3}',
+    '{"magic": "lazyconf-1", "stamp": %s, "sections": [["mysql", 0]]}',
+    '{"magic": "lazyconf-1", "stamp": %s, "sections": [["mysql", "0", 9]]}',
+])
+def test_damaged_index(configs, index):
+    path = str(configs / 'config.yml')
+    st = os.stat(path)
+    with open(index_path(path), 'w') as f:
+        f.write(index.replace('%s', json.dumps([st.st_mtime_ns,
+                                                  st.st_size])))
+    cfg = LazyConfig(path)
+    assert cfg.indexed
+    assert cfg['mysql']['host'] == 'localhost'
+
+
+def test_yaml_lists_indexed(tmp_path):
+    import yaml
+    data = {'a': {'x': 1}, 'b': [1, 2, {'c': 3}], 'd': ['e']}
+    path = str(tmp_path / 'c.yml')
+    with open(path, 'w') as f:
+        yaml.safe_dump(data, f)
+    cfg = LazyConfig(path)
+    assert cfg.indexed
+    assert cfg['b'] == [1, 2, {'c': 3}]
+    assert dict(cfg) == data
+
+
+def test_json_non_ascii(tmp_path):
+    data = {'été': {'s': '☃ snow'}, 'b': [1, 'ü'],
+            'c': {'d': 'plain'}}
+    path = str(tmp_path / 'c.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    cfg = LazyConfig(path)
+    assert cfg.indexed
+    assert cfg['c'] == {'d': 'plain'}
+    assert dict(cfg) == data
+
+
+def test_json_malformed(tmp_path):
+    path = str(tmp_path / 'c.json')
+    with open(path, 'w') as f:
+        f.write('{"a": 1, "b": }')
+    with pytest.raises(ValueError):
+        LazyConfig(path)
@@ -0,0 +1,83 @@
+import os
+import shutil
+
+import pytest
+
+import loader
+
+
+@pytest.fixture
+def configs(tmp_path):
+    '''copies of the example configs in a scratch directory'''
+    loader.invalidate()
+    for name in ('config.yml', 'config.json'):
+        shutil.copy(name, str(tmp_path / name))
+    yield tmp_path
+    loader.invalidate()
+
+
+def test_formats_agree(configs):
+    yml = loader.load(str(configs / 'config.yml'))
+    jsn = loader.load(str(configs / 'config.json'))
+    assert yml == jsn
+    assert yml['mysql']['db'] == 'write-math'
+
+
+def test_memoized(configs, monkeypatch):
+    path = str(configs / 'config.yml')
+    first = loader.load(path)
+    monkeypatch.setattr(loader, '_read_snapshot', None)    # not used
+    assert loader.load(path) is first
+
+
+def test_changed_file(configs):
+    path = str(configs / 'config.yml')
+    assert 'extra' not in loader.load(path)
+    with open(path, 'a') as f:
+        f.write('extra:\n    key: value\n')
+    assert loader.load(path)['extra'] == {'key': 'value'}
+
+
+def test_snapshot(configs, monkeypatch):
+    path = str(configs / 'config.yml')
+    data = loader.load(path)
+    assert os.path.exists(loader.snapshot_path(path))
+    assert not os.path.exists(loader.snapshot_path(
+        str(configs / 'config.json')))
+
+    # a new process would load the snapshot without parsing
+    loader.invalidate()
+    monkeypatch.setitem(loader._PARSERS, '.yml', (None, True))
+    assert loader.load(path) == data
+
+
+def test_stale_or_bad_snapshot(configs):
+    path = str(configs / 'config.yml')
+    snap = loader.snapshot_path(path)
+    loader.load(path)
+    with open(path, 'a') as f:
+        f.write('extra: 1\n')
+    loader.invalidate()
+    assert loader.load(path)['extra'] == 1      # stale snapshot ignored
+
+    with open(snap, 'wb') as f:
+        f.write(b'not a snapshot')
+    loader.invalidate()
+    assert loader.load(path)['extra'] == 1
+    loader.invalidate()
+    assert loader._read_snapshot(path, loader._stamp(path))['extra'] == 1
+
+
+def test_unmarshallable(configs):
+    path = str(configs / 'dated.yml')
+    with open(path, 'w') as f:
+        f.write('released: 2018-10-07\n')
+    assert str(loader.load(path)['released']) == '2018-10-07'
+    assert not os.path.exists(loader.snapshot_path(path))
+
+
+def test_unknown_extension(configs):
+    path = str(configs / 'config.ini')
+    open(path, 'w').close()
+    with pytest.raises(ValueError):
+        loader.load(path)
@@ -0,0 +1,109 @@
+import os
+import time
+import shutil
+
+import pytest
+
+import loader
+from watch import WatchedConfig, freeze
+
+
+@pytest.fixture
+def config(tmp_path):
+    loader.invalidate()
+    path = str(tmp_path / 'config.yml')
+    shutil.copy('config.yml', path)
+    yield path
+    loader.invalidate()
+
+
+def rewrite(path, old, new):
+    '''replace 'old' with 'new' in the file, making sure it looks changed'''
+    with open(path) as f:
+        text = f.read()
+    st = os.stat(path)
+    with open(path, 'w') as f:
+        f.write(text.replace(old, new))
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000))
+
+
+def test_frozen(config):
+    cfg = WatchedConfig(config)
+    assert cfg['mysql']['host'] == 'localhost'
+    with pytest.raises(TypeError):
+        cfg.current['mysql']['host'] = 'elsewhere'
+    assert isinstance(cfg['other']['preprocessing_queue'], tuple)
+    assert freeze({'a': [1, {'b': 2}]})['a'][1]['b'] == 2
+
+
+def test_reload_and_callbacks(config):
+    cfg = WatchedConfig(config)
+    seen = []
+    cfg.on_change('mysql', lambda *args: seen.append(args))
+    cfg.on_change('other', lambda *args: seen.append(args))
+    assert not cfg.check()
+
+    before = cfg.current
+    rewrite(config, 'host: localhost', 'host: db.example.com')
+    assert cfg.check()
+    assert cfg['mysql']['host'] == 'db.example.com'
+    assert before['mysql']['host'] == 'localhost'   # old snapshot intact
+    assert len(seen) == 1
+    section, old, new = seen[0]
+    assert section == 'mysql'
+    assert old['host'] == 'localhost' and new['host'] == 'db.example.com'
+    assert cfg.reloads == 1
+
+
+def test_invalid_kept_out(config, capsys):
+    def validate(data):
+        if 'host' not in data['mysql']:
+            raise ValueError('mysql needs a host')
+
+    cfg = WatchedConfig(config, validate=validate)
+    rewrite(config, 'host: localhost', 'hostname: localhost')
+    assert not cfg.check()
+    assert 'mysql needs a host' in capsys.readouterr().out
+    assert cfg['mysql']['host'] == 'localhost'
+    assert not cfg.check()          # not tried again until it changes
+
+    rewrite(config, 'mysql:', 'mysql: [')
+    assert not cfg.check()
+    assert "can't load" in capsys.readouterr().out
+    assert cfg['mysql']['host'] == 'localhost'
+
+
+def test_background(config):
+    seen = []
+    with WatchedConfig(config, interval=0.01) as cfg:
+        cfg.on_change('added', lambda *args: seen.append(args))
+        with open(config, 'a') as f:
+            f.write('added:\n    key: value\n')
+        for _ in range(200):
+            if seen:
+                break
+            time.sleep(0.01)
+    assert seen == [('added', None, {'key': 'value'})]
+
+
+def test_validator_errors_rejected(config, capsys):
+    def validate(data):
+        return data['mysql']['host'] != ''
+
+    with WatchedConfig(config, validate=validate, interval=0.01) as cfg:
+        rewrite(config, 'mysql:', 'database:')
+        for _ in range(100):
+            if 'is not valid' in capsys.readouterr().out:
+                break
+            time.sleep(0.01)
+        else:
+            assert False, 'rejection not reported'
+        assert cfg['mysql']['host'] == 'localhost'
+
+        rewrite(config, 'database:', 'mysql:')
+        rewrite(config, 'host: localhost', 'host: db.example.com')
+        for _ in range(200):
+            if cfg['mysql']['host'] == 'db.example.com':
+                break
+            time.sleep(0.01)
+        assert cfg['mysql']['host'] == 'db.example.com'
@@ -0,0 +1 @@
+../toplevel.py
\ No newline at end of file
@@ -0,0 +1,163 @@
+''' watch: a config which reloads itself when its file changes
+
+A daemon which reads config.yml once at startup has to be restarted
+to see a change.  A WatchedConfig notices the change and reloads:
+
+    cfg = WatchedConfig('config.yml', validate=check_config)
+    cfg.on_change('mysql', reconnect)
+    cfg.start()
+    ...
+    host = cfg.current['mysql']['host']
+
+Checking costs one os.stat(), and only if the file's mtime or size
+has changed is it parsed again (with loader.load, so a snapshot is
+used if there is one).  The new config is handed to 'validate',
+which may raise an exception (or return False) to reject it; a
+rejected or unparseable file is reported and the old config kept
+until the file changes again.  An accepted one is frozen, dicts
+becoming read-only mappings and lists tuples, and swapped in as
+'current' in one assignment.  So readers never take a lock or see a
+half-loaded config, just an attribute lookup, though one reader
+doing several lookups should take 'current' once and use that.
+
+Then the callbacks for each top-level section which changed (was
+added, removed, or got a different value) are called as
+callback(section, old, new), old or new being None if the section
+was added or removed.  Callbacks run in the thread that noticed the
+change: the watching thread after start(), or whoever called
+check().
+'''
+from __future__ import print_function
+
+__all__ = ["WatchedConfig", "freeze"]
+
+import os
+import threading
+from types import MappingProxyType
+
+import loader
+
+INTERVAL = 1.0      # seconds between checks
+
+
+def freeze(data):
+    '''return a read-only copy of parsed config 'data' '''
+    if isinstance(data, dict):
+        return MappingProxyType(dict((key, freeze(value))
+                                     for key, value in data.items()))
+    if isinstance(data, list):
+        return tuple(freeze(value) for value in data)
+    return data
+
+
+class WatchedConfig(object):
+    '''the config in the file 'path', reloaded when the file changes
+    'current' is the frozen config; it is loaded (and must be valid)
+    when the object is made.
+    '''
+
+    def __init__(self, path, validate=None, interval=INTERVAL):
+        self.path = path
+        self.validate = validate
+        self.interval = interval
+        self.reloads = 0
+        self._callbacks = {}
+        self._check_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stamp = self._stat()
+        self._raw = self._load()
+        if self._raw is None:
+            raise ValueError("invalid config in %s" % path)
+        self.current = freeze(self._raw)
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self):
+        '''parse and validate the file, returning None if it won't do'''
+        try:
+            data = loader.load(self.path)
+        except Exception as e:
+            print("Warning: can't load config %s: %s" % (self.path, e))
+            return None
+        if not isinstance(data, dict):
+            print("Warning: config %s is not a mapping" % self.path)
+            return None
+        if self.validate is not None:
+            try:
+                if self.validate(data) is False:
+                    raise ValueError('rejected by validator')
+            except Exception as e:
+                print("Warning: config %s is not valid, keeping the old "
+                      "one: %s" % (self.path, e))
+                return None
+        return data
+
+    def __getitem__(self, section):
+        return self.current[section]
+
+    def on_change(self, section, callback):
+        '''call callback(section, old, new) when 'section' changes'''
+        self._callbacks.setdefault(section, []).append(callback)
+
+    def check(self):
+        '''reload the config if the file changed; True if it was'''
+        stamp = self._stat()
+        if stamp == self._stamp or stamp is None:
+            return False
+        with self._check_lock:
+            if stamp == self._stamp:
+                return False
+            self._stamp = stamp
+            new = self._load()
+            if new is None:
+                return False
+            old, self._raw = self._raw, new
+            oldfrozen, newfrozen = self.current, freeze(new)
+            self.current = newfrozen
+            self.reloads += 1
+        for section in sorted(set(old) | set(new), key=str):
+            if old.get(section) == new.get(section):
+                continue
+            for callback in self._callbacks.get(section, ()):
+                try:
+                    callback(section, oldfrozen.get(section),
+                             newfrozen.get(section))
+                except Exception as e:
+                    print("Warning: config callback %r for %s failed: %s"
+                          % (callback, section, e))
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print("Warning: checking config %s failed: %s"
+                      % (self.path, e))
+
+    def start(self):
+        '''check for changes every 'interval' seconds in the background'''
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='config watch')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -1,7 +1,6 @@
-import yaml
+import loader
 
-with open("config.yml", 'r') as ymlfile:
-    cfg = yaml.safe_load(ymlfile)
+cfg = loader.load("config.yml")
 
 for section in cfg:
     print(section)
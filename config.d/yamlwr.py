@@ -1,6 +1,8 @@
-import yaml
 import os
 
+import toplevel
+import yamlio
+
 blankapp = """
     %s:
         url: ''
@@ -10,16 +12,16 @@ blankapp = """
         name: ''
 """
 
-y = yaml.load(blankapp % "test")
+y = yamlio.load(blankapp % "test")
 
 #with open(os.path.expanduser('~' + '/.version_cache.yml'), 'w') as f:
 with open('.version_cache.yml', 'w') as f:
-    f.write(yaml.dump(y, default_flow_style=False))
+    yamlio.dump(y, f)
 
 
 
 #with open("config.yml", 'r') as ymlfile:
-#    cfg = yaml.safe_load(ymlfile)
+#    cfg = yamlio.load(ymlfile)
 #
 #for section in cfg:
 #    print(section)
@@ -0,0 +1,31 @@
+import os
+import stat
+
+import pytest
+
+from atomicfile import atomic_write
+
+
+def test_write(tmp_path):
+    path = str(tmp_path / 'f.txt')
+    atomic_write(path, 'text\n', sync=True)
+    with open(path) as f:
+        assert f.read() == 'text\n'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    os.chmod(path, 0o600)
+    atomic_write(path, b'bytes')
+    with open(path, 'rb') as f:
+        assert f.read() == b'bytes'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    atomic_write(path, 'x', mode=0o640)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert os.listdir(str(tmp_path)) == ['f.txt']
+
+
+def test_failure_cleans_up(tmp_path):
+    path = str(tmp_path / 'f.txt')
+    with pytest.raises(TypeError):
+        atomic_write(path, 42)
+    assert os.listdir(str(tmp_path)) == []
+    with pytest.raises(OSError):
+        atomic_write(str(tmp_path / 'nosuch' / 'f.txt'), 'x')
@@ -0,0 +1,39 @@
+import yaml
+import pytest
+
+import yamlio
+
+
+@pytest.fixture
+def fresh(monkeypatch):
+    '''make yamlio choose its backend again on next use'''
+    monkeypatch.setattr(yamlio, '_yaml', None)
+    monkeypatch.delenv('YAMLIO_PURE', raising=False)
+    return monkeypatch
+
+
+def test_roundtrip(fresh):
+    data = {'app': {'version': '1.0', 'tags': ['a', 'b']}}
+    assert yamlio.load(yamlio.dump(data)) == data
+    with pytest.raises(yamlio.YAMLError):
+        yamlio.load('a: [')
+
+
+def test_pure_forced(fresh):
+    fresh.setenv('YAMLIO_PURE', '1')
+    assert yamlio.BACKEND == 'python'
+    assert yamlio._Loader is yaml.SafeLoader
+    assert yamlio._Dumper is yaml.SafeDumper
+
+
+def test_no_libyaml(fresh):
+    fresh.setattr(yaml, '__with_libyaml__', False)
+    assert yamlio.BACKEND == 'python'
+    assert yamlio._Loader is yaml.SafeLoader
+
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason='needs libyaml')
+def test_libyaml(fresh):
+    assert yamlio.BACKEND == 'libyaml'
+    assert yamlio._Loader is yaml.CSafeLoader
+    assert yamlio.load('a: 1') == {'a': 1}
@@ -0,0 +1,24 @@
+''' toplevel: make the modules shared by the whole project importable
+
+yamlio, atomicfile and anything else the examples share live at the
+top of the repository, next to this file.  Each example directory
+has a toplevel.py which is a symbolic link to it, and importing that
+puts this directory on sys.path (once), so that
+
+    import toplevel
+    import yamlio
+
+works whether the scripts are run from their directory, from
+elsewhere, or under pytest.
+'''
+
+__all__ = ["TOP"]
+
+import os
+import sys
+
+# realpath follows the link back to here, whichever directory it is in
+TOP = os.path.dirname(os.path.realpath(__file__))
+
+if TOP not in sys.path:
+    sys.path.append(TOP)
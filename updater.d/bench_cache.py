@@ -0,0 +1,67 @@
+''' bench_cache: compare the yaml and sqlite version cache backends
+
+Fills a cache with a large number of entries, then times what a
+single-app update check does to it: open, look up one entry, store
+one entry, close.
+
+usage: python bench_cache.py [nentries] [nchecks]
+'''
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import tempfile
+from timeit import default_timer
+
+from cachestore import YamlCache, SqliteCache
+
+
+def entry(i, version='1.0'):
+    name = 'app%05d' % i
+    return {
+        'name': name,
+        'sha256': '',
+        'releasedate': 'May 29 2017',
+        'version': version,
+        'url': 'file://%s.py' % name,
+    }
+
+
+def fill(cache, nentries):
+    for i in range(nentries):
+        cache.set('app%05d' % i, entry(i))
+    cache.close()
+
+
+def check_one(opener, i):
+    cache = opener()
+    cache.get('app%05d' % i)
+    cache.set('app%05d' % i, entry(i, '2.0'))
+    cache.close()
+
+
+def main(nentries, nchecks):
+    workdir = tempfile.mkdtemp(prefix='bench_cache')
+    try:
+        backends = (
+            ('yaml', lambda: YamlCache(os.path.join(workdir, 'cache.yml'))),
+            ('sqlite', lambda: SqliteCache(os.path.join(workdir, 'cache.db'))),
+        )
+        for name, opener in backends:
+            fill(opener(), nentries)
+            step = max(1, nentries // nchecks)
+            start = default_timer()
+            for i in range(0, step * nchecks, step):
+                check_one(opener, i)
+            elapsed = default_timer() - start
+            print('%-6s %6d entries: %9.3f ms per single-app check'
+                  % (name, nentries, elapsed * 1000 / nchecks))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    nentries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    nchecks = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    main(nentries, nchecks)
@@ -0,0 +1,76 @@
+''' bench_checkupdate: compare checking a fleet of apps one at a time
+against checking them as a batch with update_check_many.
+
+Runs entirely against a generated local update file (file:// source)
+and a throwaway cache, so no network access is needed.
+
+usage: python bench_checkupdate.py [napps]
+'''
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import tempfile
+from timeit import default_timer
+
+import toplevel
+import yamlio
+
+import checkupdate
+
+
+def make_manifest(path, napps):
+    manifest = {}
+    for i in range(napps):
+        name = 'app%04d' % i
+        manifest[name] = {
+            'name': name,
+            'sha256': '',
+            'releasedate': 'May 29 2017',
+            'version': '1.%d' % (i % 10),
+            'url': 'file://%s.py' % name,
+        }
+    with open(path, 'w') as f:
+        yamlio.dump(manifest, f)
+    return sorted(manifest)
+
+
+def timed(func):
+    start = default_timer()
+    func()
+    return default_timer() - start
+
+
+def main(napps):
+    workdir = tempfile.mkdtemp(prefix='bench_checkupdate')
+    try:
+        source = os.path.join(workdir, 'update-log.yml')
+        cache = os.path.join(workdir, 'cache.yml')
+        apps = make_manifest(source, napps)
+        os.environ['UPDATE_SOURCE'] = 'file://' + source
+        os.environ['UPDATE_CACHE'] = cache
+
+        def loop():
+            for app in apps:
+                checkupdate.update_check(app)
+
+        def batch():
+            checkupdate.update_check_many(apps)
+
+        # each run starts from an empty cache so both do the same work
+        results = []
+        for name, func in (('update_check loop', loop),
+                           ('update_check_many', batch)):
+            if os.path.exists(cache):
+                os.remove(cache)
+            elapsed = timed(func)
+            results.append(elapsed)
+            print('%-20s %4d apps: %9.2f ms' % (name, napps, elapsed * 1000))
+        print('speedup: %.1fx' % (results[0] / results[1]))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
@@ -0,0 +1,64 @@
+''' bench_daemon: per-check latency, direct vs through the daemon
+
+Times update_check done directly against a local http stand-in for
+the update server (each check revalidates the manifest, as a fresh
+process would), and the same checks handed to an UpdateDaemon over
+its unix socket.  No network access is needed.
+
+usage: python bench_daemon.py [nchecks]
+'''
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from timeit import default_timer
+from functools import partial
+
+try:
+    from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+except ImportError:
+    sys.exit('needs Python 3.7 or later')
+
+import checkupdate
+from daemon import UpdateDaemon
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def per_check(nchecks):
+    start = default_timer()
+    for _ in range(nchecks):
+        checkupdate.update_check('test', cacheupdate=False)
+    return (default_timer() - start) / nchecks
+
+
+def main(nchecks):
+    workdir = tempfile.mkdtemp(prefix='bench_daemon')
+    here = os.path.dirname(os.path.abspath(__file__))
+    server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                 partial(QuietHandler, directory=here))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        os.environ['UPDATE_SOURCE'] = ('http://127.0.0.1:%d/update-log.yml'
+                                       % server.server_address[1])
+        os.environ['UPDATE_CACHE'] = os.path.join(workdir, 'cache.yml')
+        os.environ['UPDATE_SOCKET'] = os.path.join(workdir, 'cu.sock')
+
+        direct = per_check(nchecks)
+        print('direct:       %8.3f ms per check' % (direct * 1000))
+        with UpdateDaemon(refresh=3600):
+            via = per_check(nchecks)
+        print('via daemon:   %8.3f ms per check' % (via * 1000))
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,86 @@
+''' bench_startup: what checkupdate costs a command-line tool at launch
+
+Uses 'python -X importtime' to report the cumulative import time of
+checkupdate and of the heavy modules it can pull in, then times whole
+interpreter runs doing a check: one answered from the cache within
+UPDATE_INTERVAL, and one that reads the update source.  Everything
+runs against the local update-log.yml, no network needed.
+
+usage: python bench_startup.py [runs]
+'''
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+from timeit import default_timer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WATCH = ('checkupdate', 'requests', 'yaml', 'distutils.version', 'sqlite3')
+
+
+def importtime(code, env):
+    '''return {module: cumulative microseconds} for running 'code' '''
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          env=env, cwd=HERE, stderr=subprocess.PIPE,
+                          stdout=subprocess.DEVNULL, universal_newlines=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        name = name.strip()
+        if name in WATCH:
+            try:
+                times[name] = int(cumulative)
+            except ValueError:
+                pass
+    return times
+
+
+def run_time(code, env, runs):
+    '''best wall-clock time of 'runs' interpreter runs of 'code' '''
+    best = None
+    for _ in range(runs):
+        start = default_timer()
+        subprocess.check_call([sys.executable, '-c', code], env=env, cwd=HERE,
+                              stdout=subprocess.DEVNULL)
+        elapsed = default_timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(runs):
+    workdir = tempfile.mkdtemp(prefix='bench_startup')
+    env = dict(os.environ,
+               UPDATE_SOURCE='file://update-log.yml',
+               UPDATE_CACHE=os.path.join(workdir, 'cache.yml'))
+    check = "import checkupdate; checkupdate.update_check('test')"
+    try:
+        print('import time (cumulative ms):')
+        for name, code in (('import checkupdate', 'import checkupdate'),
+                           ('import requests', 'import requests'),
+                           ('check, file source', check)):
+            times = importtime(code, env)
+            print('  %-20s %s' % (name, '  '.join(
+                '%s=%.1f' % (mod, times[mod] / 1000.0)
+                for mod in WATCH if mod in times)))
+
+        print('whole process, best of %d (ms):' % runs)
+        print('  %-34s %7.1f' % ('python -c pass',
+                                 run_time('pass', env, runs) * 1000))
+        print('  %-34s %7.1f' % ('check, reading source',
+                                 run_time(check, env, runs) * 1000))
+        env['UPDATE_INTERVAL'] = '3600'
+        subprocess.check_call([sys.executable, '-c', check], env=env,
+                              cwd=HERE, stdout=subprocess.DEVNULL)
+        print('  %-34s %7.1f' % ('check, checked recently',
+                                 run_time(check, env, runs) * 1000))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
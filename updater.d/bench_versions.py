@@ -0,0 +1,69 @@
+''' bench_versions: version comparison speed, StrictVersion vs versions
+
+Times 100k comparisons between version strings drawn from a pool
+of realistic ones: with distutils StrictVersion (where it is still
+available), with versions.newer from cold and warm key caches, and
+as a bulk versions.outdated call over the same pairs.
+
+usage: python bench_versions.py [ncompares]
+'''
+from __future__ import print_function
+
+import sys
+import random
+import warnings
+from timeit import default_timer
+
+import versions
+
+
+def make_pairs(n, strict_only=False):
+    rnd = random.Random(42)
+    pool = []
+    for major in range(5):
+        for minor in range(20):
+            pool.append('%d.%d' % (major, minor))
+            pool.append('%d.%d.%d' % (major, minor, rnd.randint(1, 9)))
+            if not strict_only:
+                pool.append('%d.%drc%d' % (major, minor, rnd.randint(1, 3)))
+                pool.append('%d.%d.post%d' % (major, minor, rnd.randint(1, 3)))
+                pool.append('%d.%d.dev%d' % (major, minor, rnd.randint(1, 3)))
+    return [(rnd.choice(pool), rnd.choice(pool)) for _ in range(n)]
+
+
+def timed(name, n, func):
+    start = default_timer()
+    func()
+    elapsed = default_timer() - start
+    print('%-32s %8.1f ms  %6.2f us/compare'
+          % (name, elapsed * 1000, elapsed * 1e6 / n))
+
+
+def main(n):
+    pairs = make_pairs(n)
+    strict_pairs = make_pairs(n, strict_only=True)
+
+    warnings.simplefilter('ignore', DeprecationWarning)
+    try:
+        from distutils.version import StrictVersion
+    except ImportError:
+        StrictVersion = None
+    if StrictVersion is not None:
+        timed('StrictVersion (strict strings)', n, lambda: [
+            StrictVersion(a) > StrictVersion(b) for a, b in strict_pairs])
+    else:
+        print('distutils not available, skipping StrictVersion')
+
+    versions.parse_version.cache_clear()
+    timed('versions.newer, cold cache', n, lambda: [
+        versions.newer(a, b) for a, b in pairs])
+    timed('versions.newer, warm cache', n, lambda: [
+        versions.newer(a, b) for a, b in pairs])
+    installed = dict(('app%d' % i, a) for i, (a, b) in enumerate(pairs))
+    available = dict(('app%d' % i, b) for i, (a, b) in enumerate(pairs))
+    timed('versions.outdated, bulk', n, lambda:
+          versions.outdated(installed, available))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,287 @@
+''' cachestore: storage backends for the checkupdate version cache
+
+The version cache maps app names to the manifest entry last seen for
+them.  Two backends are provided, with the same interface:
+
+YamlCache   the original format, one yaml document holding every
+            entry.  Simple and human-readable, but each load parses
+            the whole file and each save rewrites it.
+SqliteCache an sqlite3 database with one row per app, so looking up
+            or updating an entry costs the same however many apps
+            are cached.
+
+open_cache() picks the backend: UPDATE_CACHE_BACKEND in the
+environment can be 'yaml' or 'sqlite'; if not set, a cache path
+ending in .db or .sqlite means sqlite, anything else yaml.  So yaml
+stays the default and sqlite has to be asked for; existing caches
+and the scripts reading them keep working.  When an sqlite cache is
+opened for the first time, the entries from an existing yaml cache
+are moved into it, once, even if several processes open it at the
+same time.
+
+Several processes may share one cache.  The yaml backend holds an
+advisory lock (where fcntl is available) while saving, merges its
+changes into whatever is on disk at that point, and replaces the
+file atomically, so no process loses another's entries and readers
+never see a partly written file.  sqlite does its own locking.
+
+A parsed yaml cache is also kept in memory, and reused for as long
+as the file's inode, mtime and size stay the same; invalidate() drops
+it.  Every save makes a new file, so the inode tells a save by
+another process from ours even when both happen in the same mtime
+tick and leave the file the same size.
+'''
+
+__all__ = ["YamlCache", "SqliteCache", "open_cache", "atomic_write",
+           "file_lock", "invalidate"]
+
+import os
+import json
+import contextlib
+
+import toplevel
+import yamlio
+import atomicfile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SQLITE_SUFFIXES = ('.db', '.sqlite')
+
+# parsed yaml caches kept in memory: path -> (stamp, entries)
+_parsed = {}
+
+
+def invalidate(path=None):
+    '''forget parsed yaml caches, or only the one for path'''
+    if path is None:
+        _parsed.clear()
+    else:
+        _parsed.pop(path, None)
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    '''hold an exclusive advisory lock on 'path' + '.lock'
+    Without fcntl, this does no locking at all.
+    '''
+    if fcntl is None:
+        yield
+        return
+    with open(path + '.lock', 'a') as lockfile:
+        fcntl.flock(lockfile, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+
+def atomic_write(path, text):
+    '''replace the contents of 'path' with 'text' in one step
+    The text goes to a temporary file in the same directory, which
+    is synced and then renamed over 'path'.  Permissions of an
+    existing file are kept.
+    '''
+    atomicfile.atomic_write(path, text, sync=True)
+
+
+class YamlCache(object):
+    '''version cache kept as a single yaml document'''
+
+    def __init__(self, path, debug=False):
+        self.path = path
+        self.debug = debug
+        self.changed = {}
+        self.entries = self._load()
+
+    @property
+    def dirty(self):
+        return bool(self.changed)
+
+    def _load(self):
+        '''return the cache contents, parsing only if they changed'''
+        stamp = _stamp(self.path)
+        if stamp is None:
+            return {}
+        memo = _parsed.get(self.path)
+        if memo and memo[0] == stamp:
+            return dict(memo[1])
+        cache_yaml = self._parse()
+        _parsed[self.path] = (stamp, cache_yaml)
+        return dict(cache_yaml)
+
+    def _parse(self):
+        cache_yaml = None
+        with open(self.path, 'r') as cachefile:
+            try:
+                cache_yaml = yamlio.load(cachefile)
+            except yamlio.YAMLError:
+                cache_yaml = None
+            if self.debug:
+                if cache_yaml:
+                    print("read cache file %s" % self.path)
+                else:
+                    print("cache file contents invalid, skipping")
+        if not isinstance(cache_yaml, dict):
+            cache_yaml = {}
+        return cache_yaml
+
+    def get(self, app):
+        '''return the cached entry for 'app', or None'''
+        return self.entries.get(app)
+
+    def set(self, app, entry):
+        '''record 'entry' for 'app'; saved by the next flush'''
+        if self.entries.get(app) != entry:
+            self.entries[app] = entry
+            self.changed[app] = entry
+
+    def flush(self):
+        '''write our changes back to disk, if there are any
+        The cache is re-read under the lock and only the entries set
+        through this object are applied to it, so concurrent updates
+        to other entries by other processes are kept.
+        '''
+        if not self.changed:
+            return
+        with file_lock(self.path):
+            entries = self._load()
+            if any(entries.get(app) != entry
+                   for app, entry in self.changed.items()):
+                entries.update(self.changed)
+                atomic_write(self.path, yamlio.dump(entries))
+                _parsed[self.path] = (_stamp(self.path), dict(entries))
+            elif self.debug:
+                print("cache file %s already up to date" % self.path)
+        self.entries = entries
+        self.changed = {}
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class SqliteCache(object):
+    '''version cache kept in an sqlite3 database, one row per app
+    If the database is new and 'migrate' names an existing yaml
+    cache, its entries are imported and the yaml file is renamed
+    with a .migrated suffix so it is not imported again.
+    '''
+
+    def __init__(self, path, debug=False, migrate=None):
+        import sqlite3
+
+        self.path = path
+        self.debug = debug
+        self.dirty = False
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute('CREATE TABLE IF NOT EXISTS entries '
+                        '(app TEXT PRIMARY KEY, entry TEXT NOT NULL)')
+        if migrate and os.path.isfile(migrate):
+            self._migrate(migrate)
+
+    def _migrate(self, yamlpath):
+        # hold the write lock from the count to the import, so two
+        # processes can't both find the table empty and import
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            count = self.db.execute(
+                'SELECT count(*) FROM entries').fetchone()[0]
+            if count:
+                self.db.rollback()
+                return
+            old = YamlCache(yamlpath, self.debug)
+            self.db.executemany(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?)',
+                [(app, json.dumps(entry, default=str))
+                 for app, entry in old.entries.items()])
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+        try:
+            os.rename(yamlpath, yamlpath + '.migrated')
+        except OSError:
+            # another process migrating an empty cache got there first
+            if os.path.exists(yamlpath):
+                raise
+        if self.debug:
+            print("migrated %d entries from %s to %s"
+                  % (len(old.entries), yamlpath, self.path))
+
+    def get(self, app):
+        '''return the cached entry for 'app', or None'''
+        row = self.db.execute('SELECT entry FROM entries WHERE app = ?',
+                              (app,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def set(self, app, entry):
+        '''record 'entry' for 'app'; committed by the next flush'''
+        if self.get(app) == entry:
+            return
+        self.db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?)',
+                        (app, json.dumps(entry, default=str)))
+        self.dirty = True
+
+    @property
+    def entries(self):
+        '''all cached entries as a dict (reads the whole table)'''
+        return dict((app, json.loads(entry)) for app, entry in
+                    self.db.execute('SELECT app, entry FROM entries'))
+
+    def flush(self):
+        if self.dirty:
+            self.db.commit()
+            self.dirty = False
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _backend(path):
+    backend = os.getenv('UPDATE_CACHE_BACKEND')
+    if backend:
+        return backend
+    if path.endswith(SQLITE_SUFFIXES):
+        return 'sqlite'
+    return 'yaml'
+
+
+def open_cache(path, debug=False):
+    '''open the version cache at 'path' with the configured backend
+    For the sqlite backend, a yaml-looking 'path' is taken to be the
+    old cache to migrate from, and the database goes next to it.
+    '''
+    backend = _backend(path)
+    if backend == 'yaml':
+        return YamlCache(path, debug)
+    if backend == 'sqlite':
+        base, ext = os.path.splitext(path)
+        if ext in SQLITE_SUFFIXES:
+            return SqliteCache(path, debug, migrate=base + '.yml')
+        return SqliteCache(base + '.db', debug, migrate=path)
+    raise ValueError("unknown cache backend %r" % backend)
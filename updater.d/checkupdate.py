@@ -2,28 +2,97 @@
 ''' checkupdate: check if a given script has been updated
 
 Retrieves a yaml-format update file and compares the entry for
-the given script name with a cached one
+the given script name with a cached one.  A whole batch of scripts
+can be checked with one fetch of the update file and one pass over
+the cache using update_check_many.
+
+The cache is normally a yaml file; see cachestore for the indexed
+sqlite alternative, selected with UPDATE_CACHE_BACKEND.
+
+Setting UPDATE_INTERVAL to a number of seconds makes checks within
+that time of the last one answer from the cache alone.  Heavy
+modules (requests, yaml, sqlite3) are only imported when needed.
+Versions are compared as PEP 440 describes, using versions.
+An update source whose file name is index.yml is in the delta
+format, see delta, and only the changes since the last check are
+fetched.
+
+If a checkupdate daemon (see daemon) is listening on UPDATE_SOCKET,
+checks are handed to it, and done directly only if that fails.
+
+Each phase of a check is timed, and cache hits, requests and so on
+are counted, by instrument.  Set UPDATE_METRICS to a file name to
+have the totals written there in Prometheus format after each check.
 '''
+from __future__ import print_function
 
-__all__ = ["update_check"]
+__all__ = ["update_check", "update_check_many", "fetch_timings",
+           "close_session", "invalidate"]
 
 import os
-import yaml
-import requests
-from distutils.version import StrictVersion
+import sys
+import json
+import time
+import threading
+import collections
+from timeit import default_timer
+
+import toplevel
+import yamlio
+
+import delta
+import cachestore
+import instrument
+from versions import newer
 
 PROGRAMNAME = 'checkupdate'
 PROGRAMVERSION = '0.3'
 DEFAULT_UPDATE_SOURCE = 'https://raw.github.com/mwichmann/PyBlog/master/updater.d/update-log.yml'
 DEFAULT_UPDATE_CACHE = os.path.expanduser('~' + '/.version_cache.yml')
+DEFAULT_CONNECT_TIMEOUT = 5.0   # seconds
+DEFAULT_READ_TIMEOUT = 30.0     # seconds
+DEFAULT_RETRIES = 3
+DEFAULT_POOLSIZE = 10
+DEFAULT_TTL = 0                 # seconds to reuse an http manifest
+DEFAULT_INTERVAL = 0            # seconds between checks of the source
+DEFAULT_UPDATE_SOCKET = os.path.expanduser('~' + '/.checkupdate.sock')
+DEFAULT_DAEMON_TIMEOUT = 1.0    # seconds to wait for the daemon
+
+# the http session is shared by all checks made by this process
+_session = None
+_session_settings = None
+
+# timing details of the most recent http requests
+_fetch_timings = collections.deque(maxlen=100)
+
+# sources may be fetched from several threads at once
+_source_state_lock = threading.Lock()
+
+# parsed manifests kept in memory: source -> (stamp, expires, manifest)
+_manifests = {}
 
 
 def _setup_environ():
     global UPDATE_SOURCE, UPDATE_CACHE, DEBUG
+    global CONNECT_TIMEOUT, READ_TIMEOUT, RETRIES, POOLSIZE, TTL, INTERVAL
+    global UPDATE_SOCKET, USE_DAEMON, DAEMON_TIMEOUT, METRICS
 
     # get variables from environment, defaulting if not set
     UPDATE_SOURCE = os.getenv('UPDATE_SOURCE', DEFAULT_UPDATE_SOURCE)
     UPDATE_CACHE = os.getenv('UPDATE_CACHE', DEFAULT_UPDATE_CACHE)
+    CONNECT_TIMEOUT = float(os.getenv('UPDATE_CONNECT_TIMEOUT',
+                                      DEFAULT_CONNECT_TIMEOUT))
+    READ_TIMEOUT = float(os.getenv('UPDATE_READ_TIMEOUT',
+                                   DEFAULT_READ_TIMEOUT))
+    RETRIES = int(os.getenv('UPDATE_RETRIES', DEFAULT_RETRIES))
+    POOLSIZE = int(os.getenv('UPDATE_POOLSIZE', DEFAULT_POOLSIZE))
+    TTL = float(os.getenv('UPDATE_TTL', DEFAULT_TTL))
+    INTERVAL = float(os.getenv('UPDATE_INTERVAL', DEFAULT_INTERVAL))
+    UPDATE_SOCKET = os.getenv('UPDATE_SOCKET', DEFAULT_UPDATE_SOCKET)
+    USE_DAEMON = os.getenv('UPDATE_DAEMON', '1') == '1'
+    DAEMON_TIMEOUT = float(os.getenv('UPDATE_DAEMON_TIMEOUT',
+                                     DEFAULT_DAEMON_TIMEOUT))
+    METRICS = os.getenv('UPDATE_METRICS')
 
     if os.getenv('UPDATE_DEBUG', '0') == '1':
         DEBUG = True
@@ -31,108 +100,568 @@ def _setup_environ():
         DEBUG = False
 
 
-def _yaml_from_cache(app):
+def _get_session():
+    '''return the shared http session, building it if needed
+    The session keeps connections alive between requests, so checks
+    made in a loop reuse them.  Failed connects and 5xx responses are
+    retried with exponential backoff up to RETRIES times.  A new
+    session is built only if the retry or pool settings change.
+    '''
+    global _session, _session_settings
+    # requests is slow to import, so wait until an http source is used
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    settings = (RETRIES, POOLSIZE)
+    if _session is not None and settings == _session_settings:
+        return _session
+    if _session is not None:
+        _session.close()
+
+    retry = Retry(total=RETRIES, backoff_factor=0.5,
+                  status_forcelist=(500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=POOLSIZE, pool_maxsize=POOLSIZE,
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = '%s/%s' % (PROGRAMNAME, PROGRAMVERSION)
+    _session = session
+    _session_settings = settings
+    return session
+
+
+def close_session():
+    '''drop the shared http session and its pooled connections'''
+    global _session, _session_settings
+    if _session is not None:
+        _session.close()
+    _session = None
+    _session_settings = None
+
+
+def _http_get(url, headers=None):
+    '''GET 'url' through the shared session, recording its timing
+    Returns the response, or None if the request could not be made.
+    '''
+    import requests
+
+    start = default_timer()
+    instrument.count('http_requests')
+    try:
+        reqdata = _get_session().get(url, headers=headers,
+                                     timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    except requests.exceptions.RequestException as e:
+        instrument.count('http_errors')
+        _fetch_timings.append({
+            'url': url,
+            'status': None,
+            'response': None,
+            'total': default_timer() - start,
+        })
+        print("Warning: fetching %s failed: %s" % (url, e))
+        return None
+    timing = {
+        'url': url,
+        'status': reqdata.status_code,
+        'response': reqdata.elapsed.total_seconds(),
+        'total': default_timer() - start,
+    }
+    _fetch_timings.append(timing)
+    instrument.record('fetch_response', timing['response'], url=url)
+    instrument.record('fetch_transfer',
+                      max(0.0, timing['total'] - timing['response']), url=url)
+    instrument.count('bytes_fetched', len(reqdata.content))
+    if reqdata.status_code == 304:
+        instrument.count('http_not_modified')
+    if DEBUG:
+        print("fetched %s: status %d in %.1f ms" % (
+            url, reqdata.status_code, _fetch_timings[-1]['total'] * 1000))
+    return reqdata
+
+
+def fetch_timings():
+    '''return timing details of the most recent http requests.
+    Each entry is a dict with the 'url', the http 'status' (None if
+    the request failed), 'response' - seconds until the response
+    headers arrived - and 'total' - seconds including the body
+    download and any retries.  Oldest first, at most 100 entries.
+    '''
+    return list(_fetch_timings)
+
+
+def _source_state_path():
+    '''where validators and the last manifest from each source live'''
+    return UPDATE_CACHE + '.source.json'
+
+
+def _load_source_state():
+    '''load the saved validators and manifests, keyed by source URL'''
+    try:
+        with open(_source_state_path(), 'r') as statefile:
+            state = json.load(statefile)
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(state, dict):
+        return {}
+    return state
+
+
+def _save_source_state(url, record):
+    '''save the validators and manifest for one source'''
+    path = _source_state_path()
+    with _source_state_lock, cachestore.file_lock(path):
+        state = _load_source_state()
+        state[url] = record
+        cachestore.atomic_write(path, json.dumps(state, default=str))
+
+
+def _checked_path():
+    '''where the time each app was last checked is kept'''
+    return UPDATE_CACHE + '.checked.json'
+
+
+def _load_checked():
+    '''load the times of the last checks, keyed by app'''
+    try:
+        with open(_checked_path(), 'r') as checkedfile:
+            checked = json.load(checkedfile)
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(checked, dict):
+        return {}
+    return checked
+
+
+def _save_checked(apps, when):
+    '''record that 'apps' were checked against the source at 'when'
+    The times are kept apart from the cache, so that the cache file
+    is only rewritten when an entry really changes.
+    '''
+    path = _checked_path()
+    with cachestore.file_lock(path):
+        checked = _load_checked()
+        checked.update(dict.fromkeys(apps, when))
+        cachestore.atomic_write(path, json.dumps(checked))
+
+
+def _fetch_http(url, revalidate=True):
+    '''fetch and parse a manifest over http(s), revalidating if possible
+    If a previous fetch from 'url' left validators (ETag and/or
+    Last-Modified) they are sent along, and a 304 response means the
+    saved manifest is reused without downloading or parsing anything.
+    Documents which never change once published need not be saved for
+    revalidation, so 'revalidate' can be set False for them.
+    Returns the parsed manifest, or None if the fetch failed.
+    '''
+    saved = _load_source_state().get(url) if revalidate else None
+    headers = {}
+    if saved:
+        if saved.get('etag'):
+            headers['If-None-Match'] = saved['etag']
+        if saved.get('last_modified'):
+            headers['If-Modified-Since'] = saved['last_modified']
+
+    with instrument.phase('fetch', url=url):
+        reqdata = _http_get(url, headers=headers)
+    if reqdata is None:
+        return None
+    if reqdata.status_code == 304 and saved:
+        if DEBUG:
+            print("update source %s not modified, using saved copy" % url)
+        return saved['manifest']
+    if reqdata.status_code != 200:
+        print("Warning: fetching %s failed (status %d)"
+              % (url, reqdata.status_code))
+        return None
+
+    with instrument.phase('parse', url=url):
+        current_yaml = yamlio.load(reqdata.text)
+
+    # remember the validators so the next check can revalidate
+    etag = reqdata.headers.get('ETag')
+    last_modified = reqdata.headers.get('Last-Modified')
+    if (revalidate and isinstance(current_yaml, dict)
+            and (etag or last_modified)):
+        _save_source_state(url, {
+            'etag': etag,
+            'last_modified': last_modified,
+            'manifest': current_yaml,
+        })
+    return current_yaml
+
+
+def _default_entry(app):
+    '''build a cache entry for an app we know nothing about'''
+    return {
+        'name': app,
+        'sha256': '',
+        'releasedate': '',
+        'version': '0.0',
+        'url': ''
+    }
+
+
+def _open_cache():
+    '''open the version cache using the configured backend'''
+    return cachestore.open_cache(UPDATE_CACHE, DEBUG)
+
+
+def _cached_entry(cache, app):
     '''load a previous update check from cache
     If there is no cache, or a valid entry is not found, build
     something to return anyway.
     '''
-    # load previous check results from cache
-    cache_yaml = None
-    if os.path.isfile(UPDATE_CACHE):
-        with open(UPDATE_CACHE, 'r') as cachefile:
-            cache_yaml = yaml.safe_load(cachefile)
-            if DEBUG:
-                if cache_yaml:
-                    print "read cache file %s" % UPDATE_CACHE
-                else:
-                    print "cache file contents invalid, skipping"
-
-    # Build a default if no usable cache data found
-    if not cache_yaml or not cache_yaml.has_key(app):
-        if not cache_yaml:
-            cache_yaml = {}
+    entry = cache.get(app)
+    if entry is not None:
+        instrument.count('cache_hits')
+    else:
+        instrument.count('cache_misses')
         if DEBUG:
-            print "no cached entry for %s found, building default" % app
-        entry = {
-            'name': app,
-            'sha256': '',
-            'releasedate': '',
-            'version': '0.0',
-            'url': ''
-        }
-        cache_yaml[app] = entry
+            print("no cached entry for %s found, building default" % app)
+        entry = _default_entry(app)
+    return entry
 
-    return cache_yaml
 
+def _fetch_document(url, revalidate=True):
+    '''fetch and parse the yaml document at 'url', None if that fails'''
 
-def _yaml_from_current(app):
-    '''get current version details from update source
-    We assume get + load yaml will leave None if something went wrong.
-    'app' argument used to validate that there is usable data
-    If the function returns, we are good to proceed.
+    # requests cannot handile file://, so fudge it
+    if url.startswith('file://'):
+        fname = url.split('file://')[1]
+        try:
+            with instrument.phase('fetch', url=url):
+                with open(fname, 'r') as updatefile:
+                    text = updatefile.read()
+        except (IOError, OSError):
+            return None
+        instrument.count('bytes_fetched', len(text))
+        with instrument.phase('parse', url=url):
+            return yamlio.load(text)
+    return _fetch_http(url, revalidate)
+
+
+def _fetch_delta(source):
+    '''get the current manifest from the delta source 'source'
+    The generation and manifest from the last fetch are saved, and
+    brought up to date by applying only the deltas since then; the
+    full snapshot is fetched if that can't be done.  See delta.
     '''
+    index = _fetch_document(source)
+    if (not isinstance(index, dict)
+            or not isinstance(index.get('generation'), int)
+            or not isinstance(index.get('oldest', 0), int)
+            or not isinstance(index.get('snapshot'), str)):
+        print("Warning: %s is not a valid delta index" % source)
+        return None
+    generation = index['generation']
+    oldest = index.get('oldest', generation)
+    key = 'delta:' + source
+    saved = _load_source_state().get(key)
 
-    # requests cannot handile file://, so fudge it
-    if UPDATE_SOURCE.startswith('file://'):
-        fname = UPDATE_SOURCE.split('file://')[1]
-        with open(fname, 'r') as updatefile:
-            current_yaml = yaml.safe_load(updatefile)
+    manifest = None
+    have = saved.get('generation') if saved else None
+    if have == generation:
+        return saved['manifest']
+    if have is not None and oldest <= have < generation:
+        manifest = saved['manifest']
+        for gen in range(have + 1, generation + 1):
+            change = _fetch_document(
+                delta.member_url(source, delta.delta_name(gen)),
+                revalidate=False)
+            if not isinstance(change, dict):
+                manifest = None
+                break
+            manifest = delta.apply_delta(manifest, change)
+        if DEBUG and manifest is not None:
+            print("applied deltas %d..%d from %s"
+                  % (have + 1, generation, source))
+    if manifest is None:
+        manifest = _fetch_document(
+            delta.member_url(source, index['snapshot']), revalidate=False)
+        if not isinstance(manifest, dict):
+            return None
+
+    _save_source_state(key, {'generation': generation, 'manifest': manifest})
+    return manifest
+
+
+def _fetch_source(source):
+    '''get current version details for all apps from 'source'
+    We assume get + load yaml will leave None if something went wrong,
+    in which case a warning is issued and None is returned.
+    '''
+    if delta.is_delta_source(source):
+        current_yaml = _fetch_delta(source)
     else:
-        reqdata = requests.get(UPDATE_SOURCE)
-        current_yaml = yaml.safe_load(reqdata.text)
+        current_yaml = _fetch_document(source)
 
-    # Devide if we can use the update data. If not, there is
+    # Decide if we can use the update data. If not, there is
     # no work to do, so we return none so the API can report that.
-    if not current_yaml:
-        print "Warning: there is no valid data in the updates source"
-        print "check %s is the correct path" % UPDATE_SOURCE
-
-    if not current_yaml.has_key(app):
-        print "Warning: there is no entry in the updates source for", app
-        print "check validity of %s" % UPDATE_SOURCE
-        current_yaml = None
+    if not current_yaml or not isinstance(current_yaml, dict):
+        print("Warning: there is no valid data in the updates source")
+        print("check %s is the correct path" % source)
+        return None
 
     return current_yaml
 
 
+def _source_stamp(source):
+    '''identify the version of a file:// source by mtime and size'''
+    try:
+        st = os.stat(source.split('file://')[1])
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _get_manifest(source):
+    '''get the manifest for 'source', reusing a parsed copy if possible
+    A file:// source is reused for as long as its mtime and size stay
+    the same.  An http(s) source is reused for TTL seconds after it was
+    fetched (UPDATE_TTL; the default 0 means never), after which it is
+    revalidated with the server.  Callers must not modify the result.
+    '''
+    now = time.time()
+    memo = _manifests.get(source)
+    if source.startswith('file://'):
+        stamp = _source_stamp(source)
+        if memo and stamp is not None and memo[0] == stamp:
+            instrument.count('manifest_memo_hits')
+            return memo[2]
+    else:
+        stamp = None
+        if memo and now < memo[1]:
+            if DEBUG:
+                print("using manifest for %s fetched %.1fs ago"
+                      % (source, now - (memo[1] - TTL)))
+            instrument.count('manifest_memo_hits')
+            return memo[2]
+
+    manifest = _fetch_source(source)
+    if manifest is not None:
+        _manifests[source] = (stamp, now + TTL, manifest)
+    return manifest
+
+
+def invalidate(source=None):
+    '''forget parsed manifests and cache files held in memory.
+    If 'source' is given, only the manifest for that source is dropped.
+    '''
+    if source is None:
+        _manifests.clear()
+        cachestore.invalidate()
+    else:
+        _manifests.pop(source, None)
+
+
+def _load_current():
+    '''get current version details for all apps from UPDATE_SOURCE'''
+    return _get_manifest(UPDATE_SOURCE)
+
+
+def _compare(app, previous, current):
+    '''compare a previous entry for 'app' against a current one
+    Returns the update URL if current is newer, else None.  A version
+    which can't be parsed is reported, and counts as no update, so
+    one bad entry doesn't spoil a whole batch.
+    '''
+    oldvers = previous['version']
+    newvers = current['version']
+    try:
+        update = newer(newvers, oldvers)
+    except ValueError as e:
+        print("Warning: can't compare versions of %s: %s" % (app, e))
+        return None
+    if update:
+        if DEBUG:
+            print("version change detected (%s -> %s)" % (oldvers, newvers))
+        return current['url']
+    else:
+        if DEBUG:
+            print("version has not changed (current %s)" % oldvers)
+        return None
+
+
 def update_check(app, version=None, cacheupdate=True):
     '''check if 'app' needs updating.
     Cached version is compared against entry in an upstream database.
     If optional 'version' is supplied, compare that against the update
     source.  Returns a URL to the update if one is needed, else None.
     '''
-    _setup_environ()
+    versions = {app: version} if version else None
+    return update_check_many([app], versions, cacheupdate)[app]
 
-    # get cached version details
-    cache = _yaml_from_cache(app)
-    previous = cache[app]
-    if version:
-        previous['version'] = version
 
-    # get current version details from update source
-    current = _yaml_from_current(app)
-    if not current:
-        return None
+def update_check_many(apps, versions=None, cacheupdate=True):
+    '''check a batch of apps for updates.
+    Works like update_check, but the update source is fetched and
+    parsed only once, and the cache is read and written only once,
+    no matter how many apps are checked.  Optional 'versions' is a
+    dict mapping app names to the version to compare against instead
+    of the cached one.  Returns a dict mapping each app to the URL
+    of its update if one is needed, else None.
+    '''
+    with instrument.phase('environ'):
+        _setup_environ()
+    results = _update_check_many(list(apps), versions, cacheupdate)
+    if METRICS:
+        instrument.dump_metrics(METRICS)
+    return results
 
-    # if requested, save current info for this app to cache
-    if cacheupdate:
-        cache[app] = current[app]
-        with open(UPDATE_CACHE, 'w') as cachefile:
-            cachefile.write(yaml.dump(cache, default_flow_style=False))
 
-    oldvers = previous['version']
-    newvers = current[app]['version']
-    if StrictVersion(newvers) > StrictVersion(oldvers):
+def _update_check_many(apps, versions, cacheupdate):
+    '''update_check_many, once the environment has been set up'''
+    if INTERVAL:
+        results = _recently_checked(apps, versions)
+        if results is not None:
+            return results
+    if USE_DAEMON:
+        results = _ask_daemon(apps, versions, cacheupdate)
+        if results is not None:
+            return results
+    return _check_apps(apps, versions, cacheupdate, _load_current(),
+                       UPDATE_SOURCE)
+
+
+def _source_id(source):
+    '''a form of 'source' that means the same in any directory'''
+    if source.startswith('file://'):
+        return 'file://' + os.path.abspath(source.split('file://')[1])
+    return source
+
+
+def _ask_daemon(apps, versions, cacheupdate):
+    '''have a running checkupdate daemon do the check, if there is one
+    The request goes over the unix socket UPDATE_SOCKET, and names our
+    update source and cache so the daemon can refuse it if it uses
+    different ones.  Returns the results, or None if there is no
+    daemon or it could not answer, so the caller can do the check
+    itself.  Set UPDATE_DAEMON=0 to never ask.
+    '''
+    import socket
+
+    if not os.path.exists(UPDATE_SOCKET):
+        return None
+    request = json.dumps({
+        'apps': apps,
+        'versions': versions or {},
+        'cacheupdate': cacheupdate,
+        'source': _source_id(UPDATE_SOURCE),
+        'cache': os.path.abspath(UPDATE_CACHE),
+    })
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        with sock:
+            sock.settimeout(DAEMON_TIMEOUT)
+            sock.connect(UPDATE_SOCKET)
+            sock.sendall(request.encode('utf-8') + b'\n')
+            with sock.makefile('rb') as replyfile:
+                reply = json.loads(replyfile.readline().decode('utf-8'))
+    except (OSError, ValueError) as e:
         if DEBUG:
-            print "version change detected (%s -> %s)" % (oldvers, newvers)
-        return current[app]['url']
-    else:
+            print("checkupdate daemon not usable (%s), checking directly" % e)
+        return None
+    if 'results' not in reply:
         if DEBUG:
-            print "version has not changed (current %s)" % oldvers
+            print("checkupdate daemon declined: %s" % reply.get('error'))
         return None
+    instrument.count('daemon_queries')
+    return reply['results']
+
+
+def _recently_checked(apps, versions):
+    '''answer from the cache alone if all 'apps' were checked recently
+    A check which updates the cache records when it was made, if
+    INTERVAL is set (see _save_checked).  If every app was checked
+    less than INTERVAL seconds ago, the cached entries are as good as
+    the update source, and this returns the results without any
+    network access (or even importing requests).  Otherwise it
+    returns None.
+    '''
+    if versions is None:
+        versions = {}
+    now = time.time()
+    checked = _load_checked()
+    results = {}
+    with _open_cache() as cache:
+        for app in apps:
+            entry = cache.get(app)
+            if not entry or now - checked.get(app, 0) >= INTERVAL:
+                return None
+            if versions.get(app):
+                results[app] = _compare(app, {'version': versions[app]},
+                                        entry)
+            else:
+                results[app] = None
+    if DEBUG:
+        print("all apps checked in the last %ds, skipping the update source"
+              % INTERVAL)
+    return results
+
+
+def _check_apps(apps, versions, cacheupdate, current, source):
+    '''compare cached entries for 'apps' against the 'current' manifest
+    This is the work shared by all the batch checking interfaces, once
+    they have got hold of the manifest in whatever way ('source' is
+    only used in messages).  _setup_environ must already have run.
+    '''
+    apps = list(apps)
+    if versions is None:
+        versions = {}
+    results = dict.fromkeys(apps)
+    if not current:
+        return results
+
+    with instrument.phase('cache_load'):
+        cache = _open_cache()
+    updated = []
+    try:
+        for app in apps:
+            if app not in current:
+                print("Warning: there is no entry in the updates source for",
+                      app)
+                print("check validity of %s" % source)
+                continue
+            previous = _cached_entry(cache, app)
+            if versions.get(app):
+                previous = dict(previous, version=versions[app])
+            with instrument.phase('compare', app=app):
+                results[app] = _compare(app, previous, current[app])
+            if cacheupdate:
+                cache.set(app, current[app])
+                updated.append(app)
+    finally:
+        with instrument.phase('cache_write'):
+            cache.close()
+            if INTERVAL and updated:
+                _save_checked(updated, time.time())
+
+    return results
+
+
+def main(args):
+    '''command line: check each app named in args
+    An argument may be given as app=version to supply the version
+    to compare against.  With no arguments, check ourselves.
+    '''
+    if not args:
+        rv = update_check(PROGRAMNAME, PROGRAMVERSION, cacheupdate=False)
+        print(PROGRAMNAME, rv)
+        return
+
+    apps = []
+    versions = {}
+    for arg in args:
+        app, _, version = arg.partition('=')
+        apps.append(app)
+        if version:
+            versions[app] = version
+    results = update_check_many(apps, versions)
+    for app in apps:
+        print(app, results[app])
 
 
 if __name__ == "__main__":
-    # if not called as a module, check ourselves
-    rv = update_check(PROGRAMNAME, PROGRAMVERSION, cacheupdate=False)
-    print PROGRAMNAME, rv
+    main(sys.argv[1:])
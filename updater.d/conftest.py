@@ -0,0 +1,115 @@
+import os
+import time
+import shutil
+import hashlib
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import checkupdate
+
+
+class UpdateSourceHandler(BaseHTTPRequestHandler):
+    '''serve files out of the server's directory, supporting
+    conditional requests, and count what was asked for'''
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers)))
+        server.clients.append(self.client_address)
+        if server.delay:
+            time.sleep(server.delay)
+        path = self.path.split('?')[0].lstrip('/')
+        path = os.path.join(server.directory, path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        mtime = int(os.path.getmtime(path))
+        lastmod = formatdate(mtime, usegmt=True)
+
+        inm = self.headers.get('If-None-Match')
+        ims = self.headers.get('If-Modified-Since')
+        notmodified = False
+        if inm is not None:
+            notmodified = inm == etag
+        elif ims is not None:
+            notmodified = parsedate_to_datetime(ims).timestamp() >= mtime
+        if notmodified:
+            server.notmodified += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        rng = self.headers.get('Range')
+        if rng and server.ranges:
+            server.ranged += 1
+            start = int(rng.split('=')[1].rstrip('-'))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Range', 'bytes */%d' % len(body))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d'
+                             % (start, len(body) - 1, len(body)))
+            self.send_header('Content-Length', str(len(body) - start))
+            self.end_headers()
+            self.wfile.write(body[start:])
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', lastmod)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def http_source(tmp_path):
+    '''a local stand-in for the update server, serving tmp_path
+    The server object has 'url' (base URL), 'directory', 'requests'
+    (list of (path, headers)), 'clients' (the client address of each
+    request), 'notmodified' (count of 304s) and 'ranged' (count of
+    Range requests answered).  Setting 'delay' makes it wait that many
+    seconds before answering; clearing 'ranges' makes it ignore Range.
+    '''
+    server = ThreadingHTTPServer(('127.0.0.1', 0), UpdateSourceHandler)
+    server.daemon_threads = True
+    server.directory = str(tmp_path)
+    server.requests = []
+    server.clients = []
+    server.delay = 0
+    server.notmodified = 0
+    server.ranges = True
+    server.ranged = 0
+    server.url = 'http://127.0.0.1:%d/' % server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def served(http_source, tmp_path, monkeypatch):
+    '''serve a copy of update-log.yml from the local stand-in server,
+    as UPDATE_SOURCE, with the cache in tmp_path'''
+    shutil.copy('update-log.yml', str(tmp_path / 'update-log.yml'))
+    monkeypatch.setenv('UPDATE_SOURCE', http_source.url + 'update-log.yml')
+    monkeypatch.setenv('UPDATE_CACHE', str(tmp_path / 'cache.yml'))
+    yield http_source
+    checkupdate.close_session()
@@ -0,0 +1,184 @@
+#!/usr/bin/python3
+''' daemon: answer update checks for other processes from memory
+
+Run as a background service, this keeps the parsed manifest from
+UPDATE_SOURCE in memory, refreshing it every UPDATE_REFRESH seconds
+(with some random jitter, so a fleet of hosts does not hit the
+server in step, and exponential backoff when a refresh fails).  It
+listens on the unix socket UPDATE_SOCKET, and checkupdate clients
+send their checks there instead of each fetching the source and
+parsing the cache themselves.  Answering a check then takes a local
+round trip rather than a network one.
+
+The protocol is one JSON object per line each way.  A request has
+'apps', 'versions', 'cacheupdate', and the 'source' and 'cache' the
+client is configured with; if those are not the daemon's, or it has
+no manifest yet, it replies with 'error' and the client does the
+check itself.  Otherwise the reply has 'results', as returned by
+update_check_many.
+
+usage: python daemon.py
+'''
+from __future__ import print_function
+
+__all__ = ["UpdateDaemon"]
+
+import os
+import sys
+import json
+import errno
+import random
+import signal
+import socket
+import threading
+import socketserver
+
+import checkupdate
+
+DEFAULT_REFRESH = 300.0     # seconds between manifest refreshes
+JITTER = 0.1                # refresh interval varies by this fraction
+MIN_BACKOFF = 5.0           # first retry delay after a failed refresh
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode('utf-8'))
+                reply = self.server.update_daemon.query(request)
+            except ValueError as e:
+                reply = {'error': 'bad request: %s' % e}
+            self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _answers(path):
+    '''is anything accepting connections on the unix socket 'path'?'''
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with sock:
+        try:
+            sock.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+    return True
+
+
+class UpdateDaemon(object):
+    '''serve update checks on a unix socket from an in-memory manifest
+    Settings come from the environment as for checkupdate, plus
+    UPDATE_REFRESH.  'socket_path' defaults to UPDATE_SOCKET.
+    '''
+
+    def __init__(self, socket_path=None, refresh=None):
+        checkupdate._setup_environ()
+        self.source = checkupdate.UPDATE_SOURCE
+        self.cache = os.path.abspath(checkupdate.UPDATE_CACHE)
+        self.socket_path = socket_path or checkupdate.UPDATE_SOCKET
+        if refresh is None:
+            refresh = float(os.getenv('UPDATE_REFRESH', DEFAULT_REFRESH))
+        self.refresh_interval = refresh
+        self.manifest = None
+        self.queries = 0
+        self._stop = threading.Event()
+        self._server = None
+        self._threads = []
+
+    def refresh(self):
+        '''fetch the manifest again; returns True if that worked'''
+        checkupdate.invalidate(self.source)
+        manifest = checkupdate._get_manifest(self.source)
+        if manifest is None:
+            return False
+        self.manifest = manifest
+        return True
+
+    def _next_delay(self, failures):
+        if failures:
+            delay = min(self.refresh_interval,
+                        MIN_BACKOFF * 2 ** (failures - 1))
+        else:
+            delay = self.refresh_interval
+        return delay * random.uniform(1 - JITTER, 1 + JITTER)
+
+    def _refresher(self):
+        failures = 0 if self.manifest is not None else 1
+        while not self._stop.wait(self._next_delay(failures)):
+            if self.refresh():
+                failures = 0
+            else:
+                failures += 1
+                print("Warning: refresh of %s failed (%d in a row)"
+                      % (self.source, failures))
+
+    def query(self, request):
+        '''answer one decoded request, returning the reply object'''
+        if request.get('source') != checkupdate._source_id(self.source):
+            return {'error': 'daemon serves source %s' % self.source}
+        if request.get('cache') != self.cache:
+            return {'error': 'daemon uses cache %s' % self.cache}
+        manifest = self.manifest
+        if manifest is None:
+            return {'error': 'no manifest from %s yet' % self.source}
+        self.queries += 1
+        results = checkupdate._check_apps(
+            request.get('apps', []), request.get('versions'),
+            request.get('cacheupdate', True), manifest, self.source)
+        return {'results': results}
+
+    def start(self):
+        '''fetch the manifest and start serving in background threads
+        Raises OSError if another daemon is already serving on the
+        socket; a socket left behind by one which died is replaced.
+        '''
+        if os.path.exists(self.socket_path):
+            if _answers(self.socket_path):
+                raise OSError(errno.EADDRINUSE, "a checkupdate daemon is "
+                              "already serving on %s" % self.socket_path)
+            os.remove(self.socket_path)
+        self.refresh()
+        self._server = _Server(self.socket_path, _Handler)
+        self._server.update_daemon = self
+        for target in (self._server.serve_forever, self._refresher):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        '''stop serving and remove the socket'''
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main():
+    daemon = UpdateDaemon()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with daemon:
+        print("checkupdate daemon serving %s on %s"
+              % (daemon.source, daemon.socket_path))
+        try:
+            signal.pause()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
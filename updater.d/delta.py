@@ -0,0 +1,75 @@
+''' delta: the generational (delta) update source format
+
+A plain update source is one yaml manifest which every client
+downloads and parses in full each time it changes.  A delta source
+is a directory instead, holding:
+
+index.yml           generation: N      the current generation
+                    oldest: M          deltas exist for M+1 .. N
+                    snapshot: snapshot-N.yml
+snapshot-N.yml      the complete manifest as of generation N
+delta-K.yml         generation: K      what changed going from
+                    changed: {...}     generation K-1 to K: new or
+                    removed: [...]     updated entries, and removed apps
+
+A client that already has generation G (oldest <= G < N) fetches the
+small index and deltas G+1 .. N and applies them to its saved copy;
+one that has nothing, or something too old, fetches the snapshot.
+checkupdate treats any source whose file name is index.yml this way.
+
+mkdelta.py produces these files from successive update-log.yml's.
+'''
+
+__all__ = ["INDEX", "make_delta", "apply_delta", "is_delta_source",
+           "member_url", "snapshot_name", "delta_name"]
+
+import posixpath
+from urllib.parse import urljoin, urlparse
+
+INDEX = 'index.yml'
+
+
+def is_delta_source(source):
+    '''does 'source' name the index of a delta source?'''
+    if source.startswith('file://'):
+        path = source.split('file://')[1]
+    else:
+        path = urlparse(source).path
+    return posixpath.basename(path) == INDEX
+
+
+def member_url(source, name):
+    '''return the URL of the file 'name' next to the index 'source'
+    Any query string on the index URL is not carried over.
+    '''
+    if source.startswith('file://'):
+        path = source.split('file://')[1]
+        return 'file://' + posixpath.join(posixpath.dirname(path), name)
+    return urljoin(source, name)
+
+
+def snapshot_name(generation):
+    return 'snapshot-%d.yml' % generation
+
+
+def delta_name(generation):
+    return 'delta-%d.yml' % generation
+
+
+def make_delta(old, new, generation):
+    '''return the delta taking manifest 'old' to manifest 'new'
+    'generation' is the generation 'new' will have.
+    '''
+    changed = dict((app, entry) for app, entry in new.items()
+                   if old.get(app) != entry)
+    removed = sorted(app for app in old if app not in new)
+    return {'generation': generation, 'changed': changed, 'removed': removed}
+
+
+def apply_delta(manifest, delta):
+    '''return a new manifest: 'delta' applied to 'manifest' '''
+    result = dict(manifest)
+    result.update(delta.get('changed') or {})
+    for app in delta.get('removed') or []:
+        result.pop(app, None)
+    return result
@@ -0,0 +1,178 @@
+#!/usr/bin/python3
+''' download: fetch an update and verify it against the manifest
+
+update_check only says where an update is; fetch_update goes on to
+download it, checking the result against the sha256 the manifest
+carries for the app.  The download is streamed to disk in chunks
+and hashed as it arrives, so memory use does not depend on the size
+of the artifact.
+
+The data goes to a '.part' file next to the destination, which is
+renamed into place only once the hash matches.  If a '.part' file
+is already there from an interrupted download, the rest is asked
+for with a Range request rather than starting over.  A destination
+file that already exists with the right hash is not downloaded
+again; it is verified by hashing it through mmap.
+'''
+from __future__ import print_function
+
+__all__ = ["fetch_update", "download", "file_sha256"]
+
+import os
+import sys
+import mmap
+import hashlib
+
+import checkupdate
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _hash_file(path, hasher):
+    '''feed the contents of 'path' to 'hasher' via mmap'''
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hasher   # can't mmap an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            hasher.update(m)
+    return hasher
+
+
+def file_sha256(path):
+    '''return the sha256 hex digest of the file at 'path'.'''
+    return _hash_file(path, hashlib.sha256()).hexdigest()
+
+
+def _stream_file(url, partfile, hasher):
+    fname = url.split('file://')[1]
+    with open(fname, 'rb') as src:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            partfile.write(chunk)
+
+
+def _stream_http(url, part, hasher):
+    '''download 'url' into 'part', resuming if it has data already
+    Returns the hasher, which may be a new one if the server did not
+    honour the Range request and the download started over, or None
+    if the download failed.
+    '''
+    import requests
+
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    headers = {'Range': 'bytes=%d-' % offset} if offset else None
+    session = checkupdate._get_session()
+    try:
+        reqdata = session.get(url, headers=headers, stream=True,
+                              timeout=(checkupdate.CONNECT_TIMEOUT,
+                                       checkupdate.READ_TIMEOUT))
+    except requests.exceptions.RequestException as e:
+        print("Warning: downloading %s failed: %s" % (url, e))
+        return None
+
+    with reqdata:
+        if reqdata.status_code == 416 and offset:
+            # nothing left to fetch, the part file is complete
+            return hasher
+        if reqdata.status_code == 206:
+            mode = 'ab'
+            if checkupdate.DEBUG:
+                print("resuming %s at byte %d" % (url, offset))
+        elif reqdata.status_code == 200:
+            mode = 'wb'
+            hasher = hashlib.sha256()
+        else:
+            print("Warning: downloading %s failed (status %d)"
+                  % (url, reqdata.status_code))
+            return None
+        try:
+            with open(part, mode) as partfile:
+                for chunk in reqdata.iter_content(CHUNK_SIZE):
+                    hasher.update(chunk)
+                    partfile.write(chunk)
+        except requests.exceptions.RequestException as e:
+            # keep what we have, a later try can resume from there
+            print("Warning: downloading %s interrupted: %s" % (url, e))
+            return None
+    return hasher
+
+
+def download(url, dest, sha256=None, resume=True):
+    '''download 'url' to the file 'dest', verifying it if 'sha256' given.
+    Returns 'dest' on success, None if the download failed or the
+    result did not match 'sha256' (the bad download is removed).
+    '''
+    checkupdate._setup_environ()
+    if sha256 and os.path.isfile(dest) and file_sha256(dest) == sha256:
+        if checkupdate.DEBUG:
+            print("%s already downloaded and verified" % dest)
+        return dest
+
+    part = dest + '.part'
+    if not resume and os.path.exists(part):
+        os.remove(part)
+    hasher = hashlib.sha256()
+
+    if url.startswith('file://'):
+        try:
+            with open(part, 'wb') as partfile:
+                _stream_file(url, partfile, hasher)
+        except (IOError, OSError) as e:
+            print("Warning: copying %s failed: %s" % (url, e))
+            return None
+    else:
+        if os.path.exists(part):
+            _hash_file(part, hasher)
+        hasher = _stream_http(url, part, hasher)
+        if hasher is None:
+            return None
+
+    digest = hasher.hexdigest()
+    if sha256 and digest != sha256:
+        print("Warning: %s failed verification" % url)
+        print("expected sha256 %s, got %s" % (sha256, digest))
+        os.remove(part)
+        return None
+    os.replace(part, dest)
+    return dest
+
+
+def fetch_update(app, destdir, version=None, cacheupdate=True):
+    '''check 'app' for an update and, if there is one, download it.
+    The update is saved in 'destdir' under the basename of its URL and
+    verified against the manifest's sha256 for 'app'.  Returns the
+    path of the verified download, or None if there was no update or
+    the download failed.  The cache is only updated (if 'cacheupdate')
+    once the download has succeeded, so a failed one is tried again
+    on the next check.
+    '''
+    checkupdate._setup_environ()
+    current = checkupdate._load_current()
+    versions = {app: version} if version else None
+    url = checkupdate._check_apps([app], versions, False, current,
+                                  checkupdate.UPDATE_SOURCE)[app]
+    if not url:
+        return None
+
+    entry = current[app]
+    sha256 = entry.get('sha256')
+    if not sha256:
+        print("Warning: no sha256 for %s in the updates source, "
+              "download will not be verified" % app)
+    dest = download(url, os.path.join(destdir, os.path.basename(url)),
+                    sha256)
+    if dest and cacheupdate:
+        with checkupdate._open_cache() as cache:
+            cache.set(app, entry)
+    return dest
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("usage: %s destdir app[=version] ..." % sys.argv[0])
+    for arg in sys.argv[2:]:
+        app, _, version = arg.partition('=')
+        print(app, fetch_update(app, sys.argv[1], version or None))
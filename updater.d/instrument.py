@@ -0,0 +1,128 @@
+''' instrument: timings and counters for checkupdate
+
+checkupdate reports how long each phase of a check takes, and counts
+events such as cache hits and bytes downloaded, through this module:
+
+phases      environ, cache_load, fetch, fetch_response (connecting
+            and waiting for the response headers), fetch_transfer
+            (reading the body), parse, compare, cache_write
+counters    cache_hits, cache_misses, manifest_memo_hits,
+            http_requests, http_errors, http_not_modified,
+            bytes_fetched, daemon_queries
+
+Totals are kept in memory: snapshot() returns them and reset()
+clears them.  add_hook() registers a function to be called as
+hook(phase, seconds, info) at the end of every phase, for feeding
+some other monitoring system.  metrics_text() renders the totals in
+the Prometheus text exposition format, and if UPDATE_METRICS names a
+file, checkupdate writes them there after every check.
+
+requests does not expose DNS and connect times separately, so they
+are included in fetch_response.
+'''
+from __future__ import print_function
+
+__all__ = ["phase", "record", "count", "add_hook", "remove_hook",
+           "snapshot", "reset", "metrics_text", "dump_metrics"]
+
+import threading
+import contextlib
+from timeit import default_timer
+
+PREFIX = 'checkupdate'
+
+_lock = threading.Lock()
+_hooks = []
+_phases = {}        # name -> [count, total seconds, max seconds]
+_counters = {}      # name -> value
+
+
+def add_hook(hook):
+    '''call hook(phase, seconds, info) whenever a phase completes'''
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def record(name, seconds, **info):
+    '''record that phase 'name' took 'seconds' '''
+    with _lock:
+        stats = _phases.get(name)
+        if stats is None:
+            stats = _phases[name] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += seconds
+        if seconds > stats[2]:
+            stats[2] = seconds
+    for hook in list(_hooks):
+        try:
+            hook(name, seconds, info)
+        except Exception as e:
+            print("Warning: instrumentation hook %r failed: %s" % (hook, e))
+
+
+@contextlib.contextmanager
+def phase(name, **info):
+    '''time the block as phase 'name'; 'info' is passed to hooks'''
+    start = default_timer()
+    try:
+        yield info
+    finally:
+        record(name, default_timer() - start, **info)
+
+
+def count(name, n=1):
+    '''add 'n' to counter 'name' '''
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot():
+    '''return the totals so far as a dict:
+    {'phases': {name: {'count', 'seconds', 'max'}}, 'counters': {...}}
+    '''
+    with _lock:
+        return {
+            'phases': dict((name, {'count': c, 'seconds': t, 'max': m})
+                           for name, (c, t, m) in _phases.items()),
+            'counters': dict(_counters),
+        }
+
+
+def reset():
+    '''clear all totals (hooks stay registered)'''
+    with _lock:
+        _phases.clear()
+        _counters.clear()
+
+
+def metrics_text():
+    '''return the totals in Prometheus text exposition format'''
+    snap = snapshot()
+    lines = []
+    for metric, key, kind, text in (
+            ('phase_seconds_total', 'seconds', 'counter',
+             'Time spent in each phase of update checking.'),
+            ('phase_count_total', 'count', 'counter',
+             'Number of times each phase ran.'),
+            ('phase_max_seconds', 'max', 'gauge',
+             'Longest time a phase took.')):
+        name = '%s_%s' % (PREFIX, metric)
+        lines.append('# HELP %s %s' % (name, text))
+        lines.append('# TYPE %s %s' % (name, kind))
+        for phasename, stats in sorted(snap['phases'].items()):
+            lines.append('%s{phase="%s"} %r' % (name, phasename,
+                                                stats[key]))
+    for counter, value in sorted(snap['counters'].items()):
+        name = '%s_%s_total' % (PREFIX, counter)
+        lines.append('# TYPE %s counter' % name)
+        lines.append('%s %r' % (name, value))
+    return '\n'.join(lines) + '\n'
+
+
+def dump_metrics(path):
+    '''write metrics_text() to 'path', replacing it atomically'''
+    from cachestore import atomic_write
+    atomic_write(path, metrics_text())
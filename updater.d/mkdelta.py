@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+''' mkdelta: publish an update-log.yml as a delta update source
+
+Each run compares the manifest given with the current snapshot in
+the output directory and, if anything changed, writes the next
+generation: a delta, a new snapshot and a new index (see delta for
+the format).  Deltas older than the last 'keep' generations, and
+snapshots but the last two, are removed; clients further behind
+than that fetch the snapshot.
+
+usage: python mkdelta.py update-log.yml outdir [keep]
+'''
+from __future__ import print_function
+
+__all__ = ["publish"]
+
+import os
+import sys
+
+import toplevel
+import yamlio
+from atomicfile import atomic_write
+
+import delta
+
+DEFAULT_KEEP = 10
+
+
+def _load(path):
+    with open(path, 'r') as f:
+        return yamlio.load(f)
+
+
+def _write(outdir, name, data):
+    atomic_write(os.path.join(outdir, name), yamlio.dump(data), sync=True)
+
+
+def publish(manifest, outdir, keep=DEFAULT_KEEP):
+    '''publish 'manifest' as the next generation in 'outdir'.
+    Returns the new generation, or the current one if 'manifest' is
+    the same as what is already published.
+    '''
+    index_path = os.path.join(outdir, delta.INDEX)
+    if os.path.exists(index_path):
+        index = _load(index_path)
+        generation = index['generation']
+        old = _load(os.path.join(outdir, index['snapshot']))
+        if old == manifest:
+            return generation
+        generation += 1
+        _write(outdir, delta.delta_name(generation),
+               delta.make_delta(old, manifest, generation))
+        oldest = max(index.get('oldest', 0), generation - keep)
+    else:
+        if not os.path.isdir(outdir):
+            os.makedirs(outdir)
+        generation = oldest = 1
+
+    # the index goes last, so it never names files not yet written
+    _write(outdir, delta.snapshot_name(generation), manifest)
+    _write(outdir, delta.INDEX, {
+        'generation': generation,
+        'oldest': oldest,
+        'snapshot': delta.snapshot_name(generation),
+    })
+
+    # the previous snapshot stays for clients which just read the index
+    for name in os.listdir(outdir):
+        stem, _, gen = name.rpartition('.')[0].partition('-')
+        if not gen.isdigit():
+            continue
+        if ((stem == 'delta' and int(gen) <= oldest) or
+                (stem == 'snapshot' and int(gen) < generation - 1)):
+            os.remove(os.path.join(outdir, name))
+    return generation
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        sys.exit(__doc__.strip().splitlines()[-1])
+    keep = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_KEEP
+    print('generation', publish(_load(sys.argv[1]), sys.argv[2], keep))
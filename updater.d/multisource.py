@@ -0,0 +1,154 @@
+#!/usr/bin/python3
+''' multisource: check for updates across several update sources
+
+Fetches a number of update sources concurrently using asyncio and
+merges them into a single manifest, in which each app gets the entry
+with the highest version found in any source (by PEP 440 rules).  A
+source can also be a group of mirrors of the same manifest, in which
+case the first mirror to answer with usable data wins and the rest
+are abandoned.
+This way a check takes about as long as the slowest source actually
+needed, not the sum of all of them.
+
+Sources are given as a list; each item is either a URL, or a list
+of mirror URLs.  If not supplied, they are taken from UPDATE_SOURCES
+in the environment: whitespace-separated, mirrors joined with '|'.
+If that is not set either, UPDATE_SOURCE is used as the only source.
+
+The fetching itself is done by checkupdate (so http revalidation,
+the shared session and file:// handling all apply), in a pool of
+worker threads: no more than 'limit' sources are fetched at a time.
+'''
+__all__ = ["update_check_sources", "update_check_many_sources",
+           "load_sources", "merge_manifests"]
+
+import os
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import checkupdate
+import versions
+
+DEFAULT_LIMIT = 4
+
+
+def _sources_from_environ():
+    '''get the source list from the environment'''
+    sources = os.getenv('UPDATE_SOURCES')
+    if not sources:
+        return [checkupdate.UPDATE_SOURCE]
+    return [s.split('|') if '|' in s else s for s in sources.split()]
+
+
+def _newer(entry, other):
+    '''is 'entry' a newer version than 'other'?
+    An entry with an unusable version never wins.
+    '''
+    try:
+        new = versions.parse_version(entry['version'])
+    except (KeyError, TypeError, ValueError):
+        return False
+    try:
+        old = versions.parse_version(other['version'])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return new > old
+
+
+def merge_manifests(manifests):
+    '''merge parsed manifests into one.
+    For each app the entry with the highest version wins; on a tie
+    the entry from the earliest manifest is kept.  Manifests which
+    are None (failed fetches) are skipped.
+    '''
+    merged = {}
+    for manifest in manifests:
+        if not manifest:
+            continue
+        for app, entry in manifest.items():
+            if app not in merged or _newer(entry, merged[app]):
+                merged[app] = entry
+    return merged
+
+
+async def _fetch(url, loop, executor, semaphore):
+    async with semaphore:
+        return await loop.run_in_executor(executor,
+                                          checkupdate._get_manifest, url)
+
+
+async def _fetch_mirrors(mirrors, loop, executor, semaphore):
+    '''fetch from a group of mirrors, first usable answer wins'''
+    pending = set(
+        asyncio.ensure_future(_fetch(url, loop, executor, semaphore))
+        for url in mirrors)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and task.result():
+                    return task.result()
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def load_sources(sources, limit=DEFAULT_LIMIT):
+    '''fetch all 'sources' concurrently and return the merged manifest.
+    At most 'limit' fetches are in progress at any time.
+    '''
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(limit)
+    executor = ThreadPoolExecutor(max_workers=limit)
+    try:
+        fetches = []
+        for source in sources:
+            if isinstance(source, (list, tuple)):
+                fetches.append(_fetch_mirrors(source, loop, executor,
+                                              semaphore))
+            else:
+                fetches.append(_fetch(source, loop, executor, semaphore))
+        manifests = await asyncio.gather(*fetches, return_exceptions=True)
+    finally:
+        # don't wait around for mirrors which lost the race
+        executor.shutdown(wait=False)
+
+    for source, manifest in zip(sources, manifests):
+        if isinstance(manifest, Exception):
+            print("Warning: fetching %s failed: %s" % (source, manifest))
+    return merge_manifests(m for m in manifests
+                           if not isinstance(m, Exception))
+
+
+def update_check_many_sources(apps, sources=None, app_versions=None,
+                              cacheupdate=True, limit=DEFAULT_LIMIT):
+    '''check a batch of apps against several update sources.
+    Works like checkupdate.update_check_many, with the merged manifest
+    from 'sources' taking the place of UPDATE_SOURCE.  'app_versions'
+    is update_check_many's 'versions'.
+    '''
+    checkupdate._setup_environ()
+    if sources is None:
+        sources = _sources_from_environ()
+    current = asyncio.run(load_sources(sources, limit))
+    return checkupdate._check_apps(apps, app_versions, cacheupdate, current,
+                                   ' '.join(map(str, sources)))
+
+
+def update_check_sources(app, sources=None, version=None, cacheupdate=True,
+                         limit=DEFAULT_LIMIT):
+    '''check if 'app' needs updating, consulting several sources.
+    Returns a URL to the update if one is needed, else None.
+    '''
+    app_versions = {app: version} if version else None
+    return update_check_many_sources([app], sources, app_versions,
+                                     cacheupdate, limit)[app]
+
+
+if __name__ == "__main__":
+    results = update_check_many_sources(sys.argv[1:])
+    for app in sys.argv[1:]:
+        print(app, results[app])
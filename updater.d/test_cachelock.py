@@ -0,0 +1,56 @@
+import multiprocessing
+
+import yaml
+
+from cachestore import YamlCache
+
+NPROCS = 8
+NWRITES = 5
+
+
+def entry(proc, n):
+    return {
+        'name': 'app%d' % proc,
+        'sha256': '',
+        'releasedate': '',
+        'version': '%d.%d' % (proc, n),
+        'url': ''
+    }
+
+
+def writer(path, proc):
+    # each process keeps updating its own app and adding new ones
+    for n in range(NWRITES):
+        with YamlCache(path) as cache:
+            cache.set('app%d' % proc, entry(proc, n))
+            cache.set('app%d-%d' % (proc, n), entry(proc, n))
+
+
+def test_parallel_writers(tmp_path):
+    path = str(tmp_path / 'cache.yml')
+    procs = [multiprocessing.Process(target=writer, args=(path, i))
+             for i in range(NPROCS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+
+    with open(path) as f:
+        cache = yaml.safe_load(f)
+    assert len(cache) == NPROCS * (NWRITES + 1)
+    for i in range(NPROCS):
+        assert cache['app%d' % i] == entry(i, NWRITES - 1)
+    # nothing left behind from the temporary files
+    assert sorted(p.name for p in tmp_path.iterdir()) == \
+        ['cache.yml', 'cache.yml.lock']
+
+
+def test_truncated_cache(tmp_path):
+    path = str(tmp_path / 'cache.yml')
+    with open(path, 'w') as f:
+        f.write("app0:\n  name: [app0\n")
+    with YamlCache(path) as cache:
+        assert cache.entries == {}
+        cache.set('app0', entry(0, 0))
+    assert YamlCache(path).get('app0') == entry(0, 0)
@@ -0,0 +1,109 @@
+import os
+
+import pytest
+import yaml
+
+from cachestore import *
+from checkupdate import update_check, update_check_many
+
+TESTAPP = 'test'
+
+entry = {
+    'name': 'dummy',
+    'sha256': '',
+    'releasedate': '',
+    'version': '0.1',
+    'url': 'file://dummy.py'
+}
+
+
+@pytest.fixture(params=['yaml', 'sqlite'])
+def backend(request, tmp_path, monkeypatch):
+    monkeypatch.setenv('UPDATE_CACHE_BACKEND', request.param)
+    monkeypatch.setenv('UPDATE_CACHE', str(tmp_path / 'cache.yml'))
+    monkeypatch.setenv('UPDATE_SOURCE', 'file://update-log.yml')
+    return request.param
+
+
+def test_roundtrip(backend, tmp_path):
+    path = str(tmp_path / 'cache.yml')
+    with open_cache(path) as cache:
+        assert cache.get('dummy') == None
+        cache.set('dummy', entry)
+    with open_cache(path) as cache:
+        assert cache.get('dummy') == entry
+        assert cache.entries == {'dummy': entry}
+
+
+def test_unchanged_not_written(tmp_path):
+    path = str(tmp_path / 'cache.yml')
+    with YamlCache(path) as cache:
+        cache.set('dummy', entry)
+    mtime = os.stat(path).st_mtime_ns
+    os.utime(path, ns=(mtime - 10**9, mtime - 10**9))
+    with YamlCache(path) as cache:
+        cache.set('dummy', dict(entry))
+        assert not cache.dirty
+    assert os.stat(path).st_mtime_ns == mtime - 10**9
+
+
+def test_same_tick_write_merged(tmp_path):
+    '''another process's save, same size and mtime, is not missed'''
+    path = str(tmp_path / 'cache.yml')
+    with YamlCache(path) as cache:
+        cache.set('dummy', entry)
+    st = os.stat(path)
+    other = dict(entry, version='0.2')
+    atomic_write(path, yaml.dump({'dummy': other}))
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert os.stat(path).st_size == st.st_size
+    with YamlCache(path) as cache:
+        assert cache.get('dummy') == other
+        cache.set('new', entry)
+    with YamlCache(path) as cache:
+        assert cache.entries == {'dummy': other, 'new': entry}
+
+
+def test_update_check(backend):
+    assert update_check(TESTAPP) == 'file://dummy.py'
+    assert update_check(TESTAPP) == None
+    rv = update_check_many([TESTAPP, 'checkupdate'])
+    assert rv[TESTAPP] == None
+    assert rv['checkupdate'].endswith('checkupdate.py')
+
+
+def test_migrate(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.yml')
+    with open(path, 'w') as f:
+        f.write(yaml.dump({'dummy': entry}))
+    with open_cache(str(tmp_path / 'cache.db')) as cache:
+        assert isinstance(cache, SqliteCache)
+        assert cache.get('dummy') == entry
+    assert not os.path.exists(path)
+    assert os.path.exists(path + '.migrated')
+
+    # the same happens with the yaml path and the backend set
+    with open(path, 'w') as f:
+        f.write(yaml.dump({'other': entry}))
+    os.remove(str(tmp_path / 'cache.db'))
+    monkeypatch.setenv('UPDATE_CACHE_BACKEND', 'sqlite')
+    with open_cache(path) as cache:
+        assert cache.get('other') == entry
+
+
+def test_migrate_twice(tmp_path):
+    '''a second process migrating an empty cache finds it gone'''
+    path = str(tmp_path / 'cache.yml')
+    with open(path, 'w') as f:
+        f.write('{}\n')
+    with SqliteCache(str(tmp_path / 'cache.db'), migrate=path) as cache:
+        assert not os.path.exists(path)
+        cache._migrate(path)
+        assert cache.entries == {}
+    assert os.path.exists(path + '.migrated')
+
+
+def test_bad_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv('UPDATE_CACHE_BACKEND', 'nosuch')
+    with pytest.raises(ValueError):
+        open_cache(str(tmp_path / 'cache.yml'))
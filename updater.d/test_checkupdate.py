@@ -71,6 +71,49 @@ def test_cache(clean_cache, write_cache):
     rv = update_check(TESTAPP, cacheupdate=False)
     assert rv == None
 
+
+# batch checks should give the same answers as the single checks
+def test_many_nocache(clean_cache, write_cache):
+    rv = update_check_many([TESTAPP, 'checkupdate'], cacheupdate=False)
+    assert rv[TESTAPP] == 'file://dummy.py'
+    assert rv['checkupdate'].endswith('checkupdate.py')
+
+
+def test_many_cache(clean_cache, write_cache):
+    rv = update_check_many([TESTAPP, 'checkupdate'], cacheupdate=True)
+    assert rv[TESTAPP] == 'file://dummy.py'
+    rv = update_check_many([TESTAPP, 'checkupdate'], cacheupdate=False)
+    assert rv == {TESTAPP: None, 'checkupdate': None}
+    # entries not touched by the batch must survive the rewrite
+    with open(UPDATE_CACHE) as cachefile:
+        cache = yaml.safe_load(cachefile)
+    assert (write_cache[1]) == ('dummy' in cache)
+
+
+def test_many_versions(clean_cache):
+    rv = update_check_many([TESTAPP, 'checkupdate'],
+                           versions={TESTAPP: '0.2', 'checkupdate': '0.1'},
+                           cacheupdate=False)
+    assert rv[TESTAPP] == None
+    assert rv['checkupdate'].endswith('checkupdate.py')
+
+
+def test_many_unknown(clean_cache):
+    rv = update_check_many([TESTAPP, 'nosuchapp'], cacheupdate=False)
+    assert rv == {TESTAPP: 'file://dummy.py', 'nosuchapp': None}
+
+def test_many_bad_version(clean_cache, tmp_path, monkeypatch, capsys):
+    source = str(tmp_path / 'update-log.yml')
+    with open('update-log.yml') as f:
+        manifest = yaml.safe_load(f)
+    manifest['bad'] = dict(manifest[TESTAPP], name='bad', version='latest')
+    with open(source, 'w') as f:
+        yaml.dump(manifest, f)
+    monkeypatch.setenv('UPDATE_SOURCE', 'file://' + source)
+    rv = update_check_many([TESTAPP, 'bad'], cacheupdate=False)
+    assert rv == {TESTAPP: 'file://dummy.py', 'bad': None}
+    assert "can't compare versions of bad" in capsys.readouterr().out
+
 # some more tests to add:
 # check using supplied version argument
 # - is supplied version used instead of cached?
@@ -0,0 +1,40 @@
+import os
+
+from checkupdate import *
+
+TESTAPP = 'test'
+
+
+def test_revalidate(served):
+    rv = update_check(TESTAPP, cacheupdate=False)
+    assert rv == 'file://dummy.py'
+    assert served.notmodified == 0
+    assert 'If-None-Match' not in served.requests[0][1]
+
+    # second check sends the validators and is answered with a 304,
+    # but still gives the same answer from the saved manifest
+    rv = update_check(TESTAPP, cacheupdate=False)
+    assert rv == 'file://dummy.py'
+    assert len(served.requests) == 2
+    assert 'If-None-Match' in served.requests[1][1]
+    assert served.notmodified == 1
+
+
+def test_changed_source(served, tmp_path):
+    update_check(TESTAPP, cacheupdate=True)
+    assert update_check(TESTAPP, cacheupdate=False) == None
+
+    # a changed manifest gets a new ETag, so it is downloaded again
+    with open(str(tmp_path / 'update-log.yml'), 'a') as f:
+        f.write("\nnewapp:\n  name: newapp\n  version: '1.0'\n"
+                "  url: 'file://newapp.py'\n  sha256: ''\n"
+                "  releasedate: ''\n")
+    assert update_check('newapp', cacheupdate=False) == 'file://newapp.py'
+    assert served.notmodified == 1
+
+
+def test_missing_source(http_source, tmp_path, monkeypatch):
+    monkeypatch.setenv('UPDATE_SOURCE', http_source.url + 'nosuchfile.yml')
+    monkeypatch.setenv('UPDATE_CACHE', str(tmp_path / 'cache.yml'))
+    assert update_check(TESTAPP) == None
+    assert not os.path.exists(str(tmp_path / 'cache.yml.source.json'))
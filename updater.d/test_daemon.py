@@ -0,0 +1,100 @@
+import os
+import shutil
+
+import pytest
+
+import checkupdate
+from checkupdate import update_check, update_check_many, invalidate
+from daemon import UpdateDaemon
+
+TESTAPP = 'test'
+
+
+@pytest.fixture
+def environ(tmp_path, monkeypatch):
+    source = str(tmp_path / 'update-log.yml')
+    shutil.copy('update-log.yml', source)
+    monkeypatch.setenv('UPDATE_SOURCE', 'file://' + source)
+    monkeypatch.setenv('UPDATE_CACHE', str(tmp_path / 'cache.yml'))
+    monkeypatch.setenv('UPDATE_SOCKET', str(tmp_path / 'cu.sock'))
+    invalidate()
+    return source
+
+
+@pytest.fixture
+def daemon(environ):
+    with UpdateDaemon(refresh=3600) as d:
+        yield d
+
+
+def test_query(daemon):
+    assert update_check(TESTAPP) == 'file://dummy.py'
+    assert update_check(TESTAPP) == None
+    assert update_check(TESTAPP, '0.1') == 'file://dummy.py'
+    rv = update_check_many([TESTAPP, 'nosuchapp'], cacheupdate=False)
+    assert rv == {TESTAPP: None, 'nosuchapp': None}
+    assert daemon.queries == 4
+
+
+def test_no_source_access(daemon, monkeypatch):
+    # the clients never fetch the source themselves
+    def nofetch(source):
+        raise AssertionError("fetched %s" % source)
+    monkeypatch.setattr(checkupdate, '_fetch_source', nofetch)
+    invalidate()
+    assert update_check(TESTAPP) == 'file://dummy.py'
+
+
+def test_refresh(daemon, environ):
+    update_check(TESTAPP)
+    with open(environ, 'a') as f:
+        f.write("\nnewapp:\n  name: newapp\n  version: '1.0'\n"
+                "  url: 'file://newapp.py'\n")
+    assert daemon.refresh()
+    assert update_check('newapp') == 'file://newapp.py'
+
+
+def test_other_source(daemon, monkeypatch):
+    # a client using a different source is refused and checks itself
+    monkeypatch.setenv('UPDATE_SOURCE', 'file://update-log.yml')
+    assert update_check(TESTAPP, cacheupdate=False) == 'file://dummy.py'
+    assert daemon.queries == 0
+
+
+def test_disabled(daemon, monkeypatch):
+    monkeypatch.setenv('UPDATE_DAEMON', '0')
+    assert update_check(TESTAPP) == 'file://dummy.py'
+    assert daemon.queries == 0
+
+
+def test_no_daemon(environ, tmp_path):
+    assert not os.path.exists(str(tmp_path / 'cu.sock'))
+    assert update_check(TESTAPP) == 'file://dummy.py'
+
+
+def test_stale_socket(environ, tmp_path):
+    # a socket file left behind by a dead daemon is ignored
+    d = UpdateDaemon(refresh=3600)
+    d.start()
+    d._server.server_close()
+    assert update_check(TESTAPP) == 'file://dummy.py'
+    # and a new daemon takes its place
+    with UpdateDaemon(refresh=3600) as d2:
+        assert update_check(TESTAPP) == None
+        assert d2.queries == 1
+    d.stop()
+
+
+def test_second_daemon_refused(daemon):
+    with pytest.raises(OSError):
+        UpdateDaemon(refresh=3600).start()
+    assert update_check(TESTAPP) == 'file://dummy.py'
+    assert daemon.queries == 1
+
+
+def test_backoff(environ):
+    d = UpdateDaemon(refresh=100)
+    assert 90 <= d._next_delay(0) <= 110
+    assert d._next_delay(1) <= 5.5
+    assert d._next_delay(3) <= 22
+    assert d._next_delay(10) <= 110
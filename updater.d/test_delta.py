@@ -0,0 +1,125 @@
+import os
+
+import pytest
+
+import checkupdate
+from checkupdate import update_check, update_check_many, invalidate
+from delta import make_delta, apply_delta, is_delta_source, member_url
+from mkdelta import publish
+
+
+def entry(app, version):
+    return {
+        'name': app,
+        'sha256': '',
+        'releasedate': '',
+        'version': version,
+        'url': 'file://%s-%s.py' % (app, version),
+    }
+
+
+gen1 = {'a': entry('a', '1.0'), 'b': entry('b', '1.0'), 'c': entry('c', '1.0')}
+gen2 = {'a': entry('a', '1.1'), 'b': entry('b', '1.0'), 'c': entry('c', '1.0')}
+gen3 = {'a': entry('a', '1.1'), 'b': entry('b', '2.0'), 'd': entry('d', '1.0')}
+
+
+def test_make_apply():
+    d = make_delta(gen2, gen3, 3)
+    assert sorted(d['changed']) == ['b', 'd']
+    assert d['removed'] == ['c']
+    assert apply_delta(gen2, d) == gen3
+
+
+def test_is_delta_source():
+    assert is_delta_source('file://index.yml')
+    assert is_delta_source('file:///srv/updates/index.yml')
+    assert is_delta_source('https://host/updates/index.yml?v=2')
+    assert not is_delta_source('file://myindex.yml')
+    assert not is_delta_source('https://host/reindex.yml')
+    assert not is_delta_source('https://host/update-log.yml')
+    assert (member_url('https://host/updates/index.yml?v=2', 'delta-3.yml')
+            == 'https://host/updates/delta-3.yml')
+    assert member_url('file://index.yml', 'delta-3.yml') == 'file://delta-3.yml'
+    assert (member_url('file:///srv/index.yml', 'delta-3.yml')
+            == 'file:///srv/delta-3.yml')
+
+
+def test_publish(tmp_path):
+    outdir = str(tmp_path / 'pub')
+    assert publish(gen1, outdir) == 1
+    assert publish(gen1, outdir) == 1
+    assert publish(gen2, outdir) == 2
+    assert publish(gen3, outdir, keep=1) == 3
+    assert sorted(os.listdir(outdir)) == [
+        'delta-3.yml', 'index.yml', 'snapshot-2.yml', 'snapshot-3.yml']
+
+
+@pytest.fixture
+def delta_source(tmp_path, monkeypatch):
+    monkeypatch.setenv('UPDATE_CACHE', str(tmp_path / 'cache.yml'))
+    invalidate()
+    return str(tmp_path)
+
+
+def test_file_source(delta_source, monkeypatch):
+    publish(gen1, delta_source)
+    monkeypatch.setenv('UPDATE_SOURCE', 'file://%s/index.yml' % delta_source)
+    assert update_check('a') == 'file://a-1.0.py'
+    publish(gen2, delta_source)
+    publish(gen3, delta_source)
+    rv = update_check_many(['a', 'b', 'c', 'd'])
+    assert rv == {'a': 'file://a-1.1.py', 'b': 'file://b-2.0.py',
+                  'c': None, 'd': 'file://d-1.0.py'}
+
+
+def test_http_deltas(delta_source, http_source, monkeypatch):
+    publish(gen1, delta_source)
+    monkeypatch.setenv('UPDATE_SOURCE', http_source.url + 'index.yml')
+    assert update_check('a') == 'file://a-1.0.py'
+    assert [r[0] for r in http_source.requests] == [
+        '/index.yml', '/snapshot-1.yml']
+
+    # unchanged: just the index is revalidated
+    del http_source.requests[:]
+    assert update_check('a') == None
+    assert [r[0] for r in http_source.requests] == ['/index.yml']
+    assert http_source.notmodified == 1
+
+    # two generations later only the deltas are fetched
+    publish(gen2, delta_source)
+    publish(gen3, delta_source)
+    del http_source.requests[:]
+    assert update_check('b') == 'file://b-2.0.py'
+    assert [r[0] for r in http_source.requests] == [
+        '/index.yml', '/delta-2.yml', '/delta-3.yml']
+
+
+def test_http_query_string(delta_source, http_source, monkeypatch):
+    publish(gen1, delta_source)
+    monkeypatch.setenv('UPDATE_SOURCE', http_source.url + 'index.yml?v=2')
+    update_check('a')
+    publish(gen2, delta_source)
+    del http_source.requests[:]
+    assert update_check('a') == 'file://a-1.1.py'
+    assert [r[0] for r in http_source.requests] == [
+        '/index.yml?v=2', '/delta-2.yml']
+
+
+def test_bad_index(delta_source, monkeypatch, capsys):
+    with open(os.path.join(delta_source, 'index.yml'), 'w') as f:
+        f.write('generation: 1\n')
+    monkeypatch.setenv('UPDATE_SOURCE', 'file://%s/index.yml' % delta_source)
+    assert update_check('a') == None
+    assert 'not a valid delta index' in capsys.readouterr().out
+
+
+def test_http_too_old(delta_source, http_source, monkeypatch):
+    publish(gen1, delta_source)
+    monkeypatch.setenv('UPDATE_SOURCE', http_source.url + 'index.yml')
+    update_check('a')
+    publish(gen2, delta_source, keep=1)
+    publish(gen3, delta_source, keep=1)
+    del http_source.requests[:]
+    assert update_check('d') == 'file://d-1.0.py'
+    assert [r[0] for r in http_source.requests] == [
+        '/index.yml', '/snapshot-3.yml']
@@ -0,0 +1,106 @@
+import os
+import hashlib
+
+import pytest
+
+import cachestore
+import checkupdate
+from download import *
+
+payload = os.urandom(300 * 1024)
+payload_sha = hashlib.sha256(payload).hexdigest()
+
+manifest = """
+big:
+  name: big
+  releasedate: 'Jun 1 2017'
+  sha256: '%s'
+  url: '%s'
+  version: '1.0'
+"""
+
+
+@pytest.fixture
+def served(http_source, tmp_path, monkeypatch):
+    (tmp_path / 'big.bin').write_bytes(payload)
+    monkeypatch.setenv('UPDATE_CACHE', str(tmp_path / 'cache.yml'))
+    monkeypatch.setenv('UPDATE_RETRIES', '0')
+    dest = tmp_path / 'dest'
+    dest.mkdir()
+    http_source.dest = dest
+    return http_source
+
+
+def write_manifest(tmp_path, monkeypatch, url, sha=payload_sha):
+    (tmp_path / 'update-log.yml').write_text(manifest % (sha, url))
+    monkeypatch.setenv('UPDATE_SOURCE',
+                       'file://' + str(tmp_path / 'update-log.yml'))
+
+
+def test_file_sha256(tmp_path):
+    (tmp_path / 'f').write_bytes(payload)
+    (tmp_path / 'empty').write_bytes(b'')
+    assert file_sha256(str(tmp_path / 'f')) == payload_sha
+    assert file_sha256(str(tmp_path / 'empty')) == \
+        hashlib.sha256(b'').hexdigest()
+
+
+def test_fetch_update(served, tmp_path, monkeypatch):
+    write_manifest(tmp_path, monkeypatch, served.url + 'big.bin')
+    path = fetch_update('big', str(served.dest))
+    assert path == str(served.dest / 'big.bin')
+    assert (served.dest / 'big.bin').read_bytes() == payload
+    assert not (served.dest / 'big.bin.part').exists()
+    # now cached, so there is nothing more to fetch
+    assert fetch_update('big', str(served.dest)) == None
+    assert len(served.requests) == 1
+
+
+def test_fetch_file_url(served, tmp_path, monkeypatch):
+    url = 'file://' + str(tmp_path / 'big.bin')
+    write_manifest(tmp_path, monkeypatch, url)
+    fetch_update('big', str(served.dest))
+    assert (served.dest / 'big.bin').read_bytes() == payload
+
+
+def test_bad_hash(served, tmp_path, monkeypatch):
+    write_manifest(tmp_path, monkeypatch, served.url + 'big.bin', '0' * 64)
+    assert fetch_update('big', str(served.dest)) == None
+    assert os.listdir(str(served.dest)) == []
+    # the cache was not updated, so the update is still offered
+    assert checkupdate.update_check('big', cacheupdate=False)
+
+
+def test_resume(served):
+    dest = str(served.dest / 'big.bin')
+    with open(dest + '.part', 'wb') as f:
+        f.write(payload[:100000])
+    assert download(served.url + 'big.bin', dest, payload_sha) == dest
+    assert served.ranged == 1
+    with open(dest, 'rb') as f:
+        assert f.read() == payload
+
+
+def test_resume_complete(served):
+    dest = str(served.dest / 'big.bin')
+    with open(dest + '.part', 'wb') as f:
+        f.write(payload)
+    assert download(served.url + 'big.bin', dest, payload_sha) == dest
+
+
+def test_resume_unsupported(served):
+    served.ranges = False
+    dest = str(served.dest / 'big.bin')
+    with open(dest + '.part', 'wb') as f:
+        f.write(b'garbage')
+    assert download(served.url + 'big.bin', dest, payload_sha) == dest
+    with open(dest, 'rb') as f:
+        assert f.read() == payload
+
+
+def test_already_downloaded(served):
+    dest = str(served.dest / 'big.bin')
+    with open(dest, 'wb') as f:
+        f.write(payload)
+    assert download(served.url + 'big.bin', dest, payload_sha) == dest
+    assert served.requests == []
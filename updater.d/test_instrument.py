@@ -0,0 +1,81 @@
+import shutil
+
+import pytest
+
+import instrument
+from checkupdate import *
+
+TESTAPP = 'test'
+
+
+@pytest.fixture
+def fresh(tmp_path, monkeypatch):
+    '''start from empty totals, a private cache and no memoized manifest'''
+    monkeypatch.setenv('UPDATE_CACHE', str(tmp_path / 'cache.yml'))
+    monkeypatch.setenv('UPDATE_SOURCE', 'file://update-log.yml')
+    monkeypatch.setenv('UPDATE_DAEMON', '0')
+    invalidate()
+    instrument.reset()
+    yield tmp_path
+    instrument.reset()
+
+
+def test_file_phases(fresh):
+    seen = []
+    hook = lambda name, seconds, info: seen.append(name)
+    instrument.add_hook(hook)
+    try:
+        update_check(TESTAPP, cacheupdate=True)
+    finally:
+        instrument.remove_hook(hook)
+    snap = instrument.snapshot()
+    for name in ('environ', 'cache_load', 'fetch', 'parse', 'compare',
+                 'cache_write'):
+        assert name in snap['phases']
+        assert name in seen
+    assert snap['phases']['compare']['count'] == 1
+    assert snap['counters']['cache_misses'] == 1
+    assert snap['counters']['bytes_fetched'] > 0
+
+    update_check(TESTAPP, cacheupdate=False)
+    snap = instrument.snapshot()
+    assert snap['counters']['cache_hits'] == 1
+    assert snap['counters']['manifest_memo_hits'] == 1
+
+
+def test_http_counters(fresh, http_source, monkeypatch):
+    shutil.copy('update-log.yml', str(fresh / 'update-log.yml'))
+    http_source.directory = str(fresh)
+    monkeypatch.setenv('UPDATE_SOURCE', http_source.url + 'update-log.yml')
+    update_check(TESTAPP, cacheupdate=False)
+    update_check(TESTAPP, cacheupdate=False)
+    snap = instrument.snapshot()
+    assert snap['counters']['http_requests'] == 2
+    assert snap['counters']['http_not_modified'] == 1
+    assert 'http_errors' not in snap['counters']
+    assert snap['phases']['fetch_response']['count'] == 2
+    assert snap['phases']['parse']['count'] == 1
+
+
+def test_failing_hook(fresh, capsys):
+    def hook(name, seconds, info):
+        raise RuntimeError('broken')
+    instrument.add_hook(hook)
+    try:
+        with instrument.phase('fetch'):
+            pass
+    finally:
+        instrument.remove_hook(hook)
+    assert 'hook' in capsys.readouterr().out
+    assert instrument.snapshot()['phases']['fetch']['count'] == 1
+
+
+def test_metrics_file(fresh, monkeypatch):
+    metrics = str(fresh / 'checkupdate.prom')
+    monkeypatch.setenv('UPDATE_METRICS', metrics)
+    update_check(TESTAPP, cacheupdate=False)
+    with open(metrics) as f:
+        text = f.read()
+    assert '# TYPE checkupdate_phase_seconds_total counter' in text
+    assert 'checkupdate_phase_count_total{phase="compare"} 1' in text
+    assert 'checkupdate_cache_misses_total 1' in text
@@ -0,0 +1,86 @@
+import os
+import shutil
+
+import pytest
+
+import cachestore
+import checkupdate
+from checkupdate import *
+
+TESTAPP = 'test'
+
+
+@pytest.fixture
+def counted(monkeypatch, tmp_path):
+    '''count real fetches of the update source and parses of the cache'''
+    counts = {'fetch': 0, 'parse': 0}
+    fetch = checkupdate._fetch_source
+    parse = cachestore.YamlCache._parse
+
+    def counting_fetch(source):
+        counts['fetch'] += 1
+        return fetch(source)
+
+    def counting_parse(self):
+        counts['parse'] += 1
+        return parse(self)
+
+    monkeypatch.setattr(checkupdate, '_fetch_source', counting_fetch)
+    monkeypatch.setattr(cachestore.YamlCache, '_parse', counting_parse)
+    monkeypatch.setenv('UPDATE_CACHE', str(tmp_path / 'cache.yml'))
+    invalidate()
+    yield counts
+    invalidate()
+
+
+def test_file_source(counted, tmp_path, monkeypatch):
+    source = str(tmp_path / 'update-log.yml')
+    shutil.copy('update-log.yml', source)
+    monkeypatch.setenv('UPDATE_SOURCE', 'file://' + source)
+
+    assert update_check(TESTAPP) == 'file://dummy.py'
+    assert update_check(TESTAPP) == None
+    assert update_check(TESTAPP) == None
+    assert counted['fetch'] == 1
+    # the cache was written once and never needed parsing again
+    assert counted['parse'] == 0
+
+    # a changed source file is noticed through its mtime and size
+    with open(source, 'a') as f:
+        f.write("\nnewapp:\n  name: newapp\n  version: '1.0'\n"
+                "  url: 'file://newapp.py'\n")
+    assert update_check('newapp') == 'file://newapp.py'
+    assert counted['fetch'] == 2
+
+
+def test_cache_changed_elsewhere(counted, tmp_path, monkeypatch):
+    monkeypatch.setenv('UPDATE_SOURCE', 'file://update-log.yml')
+    update_check(TESTAPP)
+    with open(str(tmp_path / 'cache.yml'), 'w') as f:
+        f.write('{}\n')
+    assert update_check(TESTAPP, cacheupdate=False) == 'file://dummy.py'
+    assert counted['parse'] == 1
+
+
+def test_http_ttl(counted, http_source, tmp_path, monkeypatch):
+    shutil.copy('update-log.yml', str(tmp_path / 'update-log.yml'))
+    monkeypatch.setenv('UPDATE_SOURCE', http_source.url + 'update-log.yml')
+    monkeypatch.setenv('UPDATE_TTL', '60')
+
+    for i in range(3):
+        assert update_check(TESTAPP, cacheupdate=False) == 'file://dummy.py'
+    assert len(http_source.requests) == 1
+
+    # after invalidate the manifest is revalidated with the server
+    invalidate(http_source.url + 'update-log.yml')
+    assert update_check(TESTAPP, cacheupdate=False) == 'file://dummy.py'
+    assert len(http_source.requests) == 2
+    assert http_source.notmodified == 1
+
+
+def test_http_no_ttl(counted, http_source, tmp_path, monkeypatch):
+    shutil.copy('update-log.yml', str(tmp_path / 'update-log.yml'))
+    monkeypatch.setenv('UPDATE_SOURCE', http_source.url + 'update-log.yml')
+    update_check(TESTAPP, cacheupdate=False)
+    update_check(TESTAPP, cacheupdate=False)
+    assert len(http_source.requests) == 2
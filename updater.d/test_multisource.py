@@ -0,0 +1,88 @@
+import shutil
+from timeit import default_timer
+
+import pytest
+
+from multisource import *
+
+TESTAPP = 'test'
+
+newer = """
+test:
+  name: test
+  releasedate: 'Jun 1 2017'
+  sha256: ''
+  url: 'file://newer.py'
+  version: '0.3'
+other:
+  name: other
+  releasedate: 'Jun 1 2017'
+  sha256: ''
+  url: 'file://other.py'
+  version: '1.0'
+"""
+
+
+@pytest.fixture
+def sources(http_source, tmp_path, monkeypatch):
+    '''the repo update-log.yml plus a second manifest, served over http'''
+    shutil.copy('update-log.yml', str(tmp_path / 'update-log.yml'))
+    (tmp_path / 'newer.yml').write_text(newer)
+    monkeypatch.setenv('UPDATE_CACHE', str(tmp_path / 'cache.yml'))
+    monkeypatch.setenv('UPDATE_RETRIES', '0')
+    return http_source
+
+
+def test_merge_precedence():
+    merged = merge_manifests([
+        {'a': {'version': '1.0', 'url': 'one'},
+         'b': {'version': '2.0', 'url': 'one'}},
+        None,
+        {'a': {'version': '1.1', 'url': 'two'},
+         'b': {'version': '2.0', 'url': 'two'},
+         'c': {'version': 'bogus', 'url': 'two'}},
+    ])
+    assert merged['a']['url'] == 'two'
+    assert merged['b']['url'] == 'one'    # tie: first source wins
+    assert merged['c']['url'] == 'two'
+
+
+def test_highest_version_wins(sources):
+    srcs = ['file://update-log.yml', sources.url + 'newer.yml']
+    rv = update_check_many_sources([TESTAPP, 'other', 'checkupdate'], srcs,
+                                   cacheupdate=False)
+    assert rv[TESTAPP] == 'file://newer.py'
+    assert rv['other'] == 'file://other.py'
+    assert rv['checkupdate'].endswith('checkupdate.py')
+
+
+def test_environ_sources(sources, monkeypatch):
+    monkeypatch.setenv('UPDATE_SOURCES', 'file://update-log.yml %snewer.yml'
+                       % sources.url)
+    assert update_check_sources('other') == 'file://other.py'
+    assert update_check_sources('other') == None
+
+
+def test_failed_mirror(sources):
+    srcs = [[sources.url + 'missing.yml', sources.url + 'newer.yml']]
+    assert update_check_sources(TESTAPP, srcs) == 'file://newer.py'
+
+
+def test_first_responder(sources):
+    sources.delay = 1.0
+    srcs = [[sources.url + 'newer.yml', 'file://update-log.yml']]
+    start = default_timer()
+    rv = update_check_sources(TESTAPP, srcs, cacheupdate=False)
+    assert default_timer() - start < sources.delay
+    assert rv == 'file://dummy.py'
+
+
+def test_concurrent(sources):
+    sources.delay = 0.5
+    srcs = [sources.url + 'newer.yml', sources.url + 'update-log.yml',
+            sources.url + 'newer.yml?again']
+    start = default_timer()
+    rv = update_check_sources(TESTAPP, srcs, cacheupdate=False)
+    # fetched in parallel, so well short of the sum of the delays
+    assert default_timer() - start < 2 * sources.delay
+    assert rv == 'file://newer.py'
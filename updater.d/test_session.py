@@ -0,0 +1,40 @@
+import checkupdate
+from checkupdate import *
+
+TESTAPP = 'test'
+
+
+def test_connection_reuse(served):
+    for i in range(3):
+        assert update_check(TESTAPP, cacheupdate=False) == 'file://dummy.py'
+    # all three requests came in over the same pooled connection
+    assert len(served.requests) == 3
+    assert len(set(served.clients)) == 1
+
+
+def test_timings(served):
+    update_check(TESTAPP, cacheupdate=False)
+    timing = fetch_timings()[-1]
+    assert timing['url'] == served.url + 'update-log.yml'
+    assert timing['status'] == 200
+    assert 0 <= timing['response'] <= timing['total']
+
+
+def test_read_timeout(served, monkeypatch):
+    monkeypatch.setenv('UPDATE_READ_TIMEOUT', '0.2')
+    monkeypatch.setenv('UPDATE_RETRIES', '1')
+    served.delay = 0.5
+    assert update_check(TESTAPP, cacheupdate=False) == None
+    # the first attempt timed out and was retried once
+    assert len(served.requests) == 2
+    assert fetch_timings()[-1]['status'] == None
+
+
+def test_settings_rebuild_session(served, monkeypatch):
+    update_check(TESTAPP, cacheupdate=False)
+    session = checkupdate._session
+    update_check(TESTAPP, cacheupdate=False)
+    assert checkupdate._session is session
+    monkeypatch.setenv('UPDATE_POOLSIZE', '2')
+    update_check(TESTAPP, cacheupdate=False)
+    assert checkupdate._session is not session
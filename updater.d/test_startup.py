@@ -0,0 +1,80 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+import checkupdate
+from checkupdate import *
+
+TESTAPP = 'test'
+
+
+@pytest.fixture
+def interval(monkeypatch, tmp_path):
+    monkeypatch.setenv('UPDATE_CACHE', str(tmp_path / 'cache.yml'))
+    monkeypatch.setenv('UPDATE_SOURCE', 'file://update-log.yml')
+    monkeypatch.setenv('UPDATE_INTERVAL', '3600')
+    fetches = []
+    fetch = checkupdate._fetch_source
+
+    def counting_fetch(source):
+        fetches.append(source)
+        return fetch(source)
+
+    monkeypatch.setattr(checkupdate, '_fetch_source', counting_fetch)
+    invalidate()
+    return fetches
+
+
+def test_recently_checked(interval):
+    assert update_check(TESTAPP) == 'file://dummy.py'
+    assert len(interval) == 1
+    invalidate()
+    assert update_check(TESTAPP) == None
+    assert update_check(TESTAPP, '0.1') == 'file://dummy.py'
+    assert update_check(TESTAPP, '0.2') == None
+    assert len(interval) == 1
+
+
+def test_not_all_recent(interval):
+    update_check(TESTAPP)
+    invalidate()
+    rv = update_check_many([TESTAPP, 'checkupdate'])
+    assert rv[TESTAPP] == None
+    assert rv['checkupdate'].endswith('checkupdate.py')
+    assert len(interval) == 2
+
+
+def test_interval_expired(interval, monkeypatch):
+    update_check(TESTAPP)
+    invalidate()
+    monkeypatch.setenv('UPDATE_INTERVAL', '0.000001')
+    update_check(TESTAPP)
+    assert len(interval) == 2
+
+
+def test_cache_not_rewritten(interval, tmp_path, monkeypatch):
+    cache = str(tmp_path / 'cache.yml')
+    update_check(TESTAPP)
+    mtime = os.stat(cache).st_mtime_ns
+    os.utime(cache, ns=(mtime - 10**9, mtime - 10**9))
+    invalidate()
+    monkeypatch.setenv('UPDATE_INTERVAL', '0.000001')
+    update_check(TESTAPP)
+    assert len(interval) == 2
+    # nothing changed, so only the check time was written
+    assert os.stat(cache).st_mtime_ns == mtime - 10**9
+    assert TESTAPP in checkupdate._load_checked()
+
+
+def test_no_heavy_imports(interval, tmp_path):
+    # a fresh process answering from the cache leaves requests alone
+    update_check(TESTAPP)
+    code = ("import sys, checkupdate; "
+            "print(checkupdate.update_check('test')); "
+            "print('requests' in sys.modules, "
+            "'distutils.version' in sys.modules)")
+    out = subprocess.check_output([sys.executable, '-c', code],
+                                  universal_newlines=True)
+    assert out.split() == ['None', 'False', 'False']
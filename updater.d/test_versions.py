@@ -0,0 +1,82 @@
+import pytest
+
+from versions import *
+
+# in increasing order, mostly from the PEP 440 examples
+ordered = [
+    '1.0.dev456',
+    '1.0a1',
+    '1.0a2.dev456',
+    '1.0a12.dev456',
+    '1.0a12',
+    '1.0b1.dev456',
+    '1.0b2',
+    '1.0b2.post345.dev456',
+    '1.0b2.post345',
+    '1.0rc1.dev456',
+    '1.0rc1',
+    '1.0',
+    '1.0+abc.5',
+    '1.0+abc.7',
+    '1.0+5',
+    '1.0.post456.dev34',
+    '1.0.post456',
+    '1.0.15',
+    '1.1.dev1',
+    '2!0.1',
+]
+
+
+def test_ordering():
+    keys = [parse_version(v) for v in ordered]
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+
+
+@pytest.fixture(params=[
+    ('1.0', '1.0.0'),
+    ('1', '1.0'),
+    ('v1.0', '1.0'),
+    ('1.0alpha1', '1.0a1'),
+    ('1.0-beta.2', '1.0b2'),
+    ('1.0c1', '1.0rc1'),
+    ('1.0-1', '1.0.post1'),
+    ('1.0.rev1', '1.0.post1'),
+    ('1.0.post', '1.0.post0'),
+    ('1.0.dev', '1.0.dev0'),
+    ('1.0RC1', '1.0rc1'),
+])
+def same(request):
+    return request.param
+
+
+def test_normalized(same):
+    a, b = same
+    assert compare(a, b) == 0
+
+
+def test_compare():
+    assert compare('0.2', '0.10') == -1
+    assert compare('0.10', '0.2') == 1
+    assert newer('0.3', '0.2')
+    assert not newer('0.2', '0.2')
+
+
+@pytest.mark.parametrize('bad', ['', 'abc', '1.0-', '1..0', '1.0+'])
+def test_invalid(bad):
+    with pytest.raises(ValueError):
+        parse_version(bad)
+
+
+def test_outdated():
+    installed = {'a': '1.0', 'b': '2.0rc1', 'c': '3.0', 'd': '1.0'}
+    available = {'a': '1.0.post1', 'b': '2.0', 'c': '3.0'}
+    assert outdated(installed, available) == ['a', 'b']
+
+
+def test_memoized():
+    parse_version.cache_clear()
+    parse_version('5.0')
+    parse_version('5.0')
+    info = parse_version.cache_info()
+    assert info.hits == 1 and info.misses == 1
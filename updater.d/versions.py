@@ -0,0 +1,107 @@
+''' versions: parse and compare version strings for checkupdate
+
+distutils.version.StrictVersion is deprecated, slow, and refuses many
+version strings seen in real manifests.  Here a version string is
+parsed once into a plain tuple, its sort key, which orders versions
+the way PEP 440 says they should be ordered:
+
+    1.0.dev1 < 1.0a1 < 1.0b2.post1 < 1.0rc1 < 1.0 < 1.0.post1 < 1.0.1
+
+Leading 'v', alternative spellings (alpha, beta, c, pre, rev, ...)
+and separators are normalized as PEP 440 allows.  Trailing zeros in
+the release do not count, so 1.0 == 1.0.0.  Keys are memoized, so a
+string seen before costs only a dictionary lookup.
+'''
+
+__all__ = ["parse_version", "compare", "newer", "outdated"]
+
+import re
+from functools import lru_cache
+
+CACHE_SIZE = 4096
+
+# PEP 440 version scheme, with the permitted variations
+_VERSION = re.compile(r'''
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?P<pre>[-_.]?(?P<pre_l>alpha|a|beta|b|preview|pre|c|rc)
+        [-_.]?(?P<pre_n>[0-9]+)?)?
+    (?P<post>-(?P<post_n1>[0-9]+)
+        |[-_.]?(?:post|rev|r)[-_.]?(?P<post_n2>[0-9]+)?)?
+    (?P<dev>[-_.]?dev[-_.]?(?P<dev_n>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$''', re.VERBOSE | re.IGNORECASE)
+
+_PRE_RANK = {
+    'a': 0, 'alpha': 0,
+    'b': 1, 'beta': 1,
+    'c': 2, 'rc': 2, 'pre': 2, 'preview': 2,
+}
+_NO_PRE = (3, 0)        # a final release sorts after its pre-releases
+_DEV_ONLY = (-1, 0)     # 1.0.dev1 sorts before 1.0a1
+_NO_DEV = float('inf')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_version(version):
+    '''return the sort key of 'version', a tuple.
+    Raises ValueError if 'version' is not a valid version string.
+    '''
+    m = _VERSION.match(str(version))
+    if m is None:
+        raise ValueError("invalid version number '%s'" % version)
+
+    release = [int(part) for part in m.group('release').split('.')]
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+
+    if m.group('pre'):
+        pre = (_PRE_RANK[m.group('pre_l').lower()], int(m.group('pre_n') or 0))
+    elif m.group('dev') and not m.group('post'):
+        pre = _DEV_ONLY
+    else:
+        pre = _NO_PRE
+
+    if m.group('post'):
+        post = int(m.group('post_n1') or m.group('post_n2') or 0)
+    else:
+        post = -1
+
+    if m.group('dev'):
+        dev = int(m.group('dev_n') or 0)
+    else:
+        dev = _NO_DEV
+
+    local = ()
+    if m.group('local'):
+        # numeric segments sort after alphanumeric ones
+        local = tuple((1, int(seg), '') if seg.isdigit()
+                      else (0, 0, seg.lower())
+                      for seg in re.split(r'[-_.]', m.group('local')))
+
+    return (int(m.group('epoch') or 0), tuple(release), pre, post, dev, local)
+
+
+def compare(a, b):
+    '''compare two version strings: -1, 0 or 1 as a <, ==, > b.'''
+    ka = parse_version(a)
+    kb = parse_version(b)
+    return (ka > kb) - (ka < kb)
+
+
+def newer(new, old):
+    '''is version string 'new' later than version string 'old'?'''
+    return parse_version(new) > parse_version(old)
+
+
+def outdated(installed, available):
+    '''find which apps have a newer version available.
+    'installed' and 'available' map app names to version strings.
+    Returns the names of the apps in 'installed' whose 'available'
+    version is later, in the order of 'installed'.  Apps missing from
+    'available' are skipped.
+    '''
+    key = parse_version
+    return [app for app, version in installed.items()
+            if app in available and key(available[app]) > key(version)]
@@ -0,0 +1,183 @@
+''' asynctimer: timing blocks of asyncio code, and event loop lag
+
+Under asyncio the wall time of a block includes the time the task
+spent suspended at an await while other tasks ran, so a slow block
+may be slow I/O or may be a loop too busy to get back to it.  To tell
+them apart, the time the task itself was running has to be known,
+and asyncio has no public hook for that.  install() sets a task
+factory making StepTasks: tasks which add up how long each of their
+steps (the runs between one await and the next) takes, in wall time
+and in thread CPU time.  A Timer used with 'async with' in such a
+task then reports:
+
+    elapsed_ns      wall time of the block
+    run_ns          time the task was running during it
+    cpu_ns          CPU time used while it was running
+    wait_ns         elapsed_ns - run_ns: time spent suspended
+
+In a task StepTasks were not installed for, run_ns, cpu_ns and
+wait_ns are None.  StepTask is built on the pure-Python Task, which
+is slower than the C one, so install it where the numbers are wanted
+rather than everywhere.
+
+LagMonitor measures how late the loop runs a callback scheduled at a
+fixed interval: if the loop is overloaded, that scheduling delay
+grows, whatever the I/O is doing.  The delays go into a
+registry.TimerStats, giving percentiles with bounded memory.
+'''
+from __future__ import print_function
+
+__all__ = ["StepTask", "install", "Timer", "LagMonitor"]
+
+import asyncio
+from time import perf_counter_ns, thread_time_ns
+
+import fasttimer
+from registry import TimerStats
+
+
+class StepTask(asyncio.tasks._PyTask):
+    '''a Task which adds up the wall and CPU time of its steps'''
+
+    def __init__(self, *args, **kwargs):
+        self.run_total_ns = 0
+        self.cpu_total_ns = 0
+        self.steps = 0
+        self._step_started = None
+        self._step_cpu = 0
+        super(StepTask, self).__init__(*args, **kwargs)
+
+    def _Task__step(self, *args):
+        # overrides the private Task.__step, which runs one step
+        self._step_started = perf_counter_ns()
+        self._step_cpu = thread_time_ns()
+        try:
+            super(StepTask, self)._Task__step(*args)
+        finally:
+            self.run_total_ns += perf_counter_ns() - self._step_started
+            self.cpu_total_ns += thread_time_ns() - self._step_cpu
+            self._step_started = None
+            self.steps += 1
+
+    def running_ns(self):
+        '''return (run, cpu) nanoseconds so far, counting this step'''
+        run, cpu = self.run_total_ns, self.cpu_total_ns
+        if self._step_started is not None:
+            run += perf_counter_ns() - self._step_started
+            cpu += thread_time_ns() - self._step_cpu
+        return run, cpu
+
+
+def _task_factory(loop, coro, **kwargs):
+    return StepTask(coro, loop=loop, **kwargs)
+
+
+def install(loop=None):
+    '''make tasks created on 'loop' (default: the running one) StepTasks'''
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    loop.set_task_factory(_task_factory)
+
+
+class Timer(fasttimer.Timer):
+    '''a fasttimer.Timer which can also be used with 'async with'
+    Used with a plain 'with', or outside a StepTask, it gives only the
+    wall time.
+    '''
+    __slots__ = ('run_ns', 'cpu_ns', 'wait_ns', '_task', '_run', '_cpu')
+
+    def __init__(self):
+        fasttimer.Timer.__init__(self)
+        self.run_ns = self.cpu_ns = self.wait_ns = None
+
+    async def __aenter__(self):
+        task = asyncio.current_task()
+        if isinstance(task, StepTask):
+            self._task = task
+            self._run, self._cpu = task.running_ns()
+        else:
+            self._task = None
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.__exit__(exc_type, exc, tb)
+        if self._task is not None:
+            run, cpu = self._task.running_ns()
+            self.run_ns = run - self._run
+            self.cpu_ns = cpu - self._cpu
+            self.wait_ns = max(0, self.elapsed_ns - self.run_ns)
+        else:
+            self.run_ns = self.cpu_ns = self.wait_ns = None
+
+
+class LagMonitor(object):
+    '''measure the event loop's scheduling delay every 'interval' secs
+    Use as 'async with LagMonitor() as mon:', or start() and stop()
+    from within the loop.  'stats' is the TimerStats of the delays,
+    in seconds; summary() gives the count and percentiles.  Only the
+    loop's thread should use it while it runs.
+    '''
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.stats = TimerStats()
+        self._loop = None
+        self._handle = None
+        self._due = None
+
+    def _tick(self):
+        now = perf_counter_ns()
+        self.stats.add(max(0, now - self._due) / 1e9)
+        self._schedule(now)
+
+    def _schedule(self, now):
+        self._due = now + int(self.interval * 1e9)
+        self._handle = self._loop.call_later(self.interval, self._tick)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._schedule(perf_counter_ns())
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def summary(self):
+        return self.stats.summary()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        self.stop()
+
+
+if __name__ == '__main__':
+    # example: a task doing "I/O" while another hogs the loop
+    import time
+
+    async def fetch():
+        async with Timer() as t:
+            await asyncio.sleep(0.05)       # the I/O
+            time.sleep(0.01)                # parsing the result
+        return t
+
+    async def hog():
+        for _ in range(5):
+            time.sleep(0.02)
+            await asyncio.sleep(0)
+
+    async def main():
+        install()
+        async with LagMonitor(0.005) as mon:
+            t, _ = await asyncio.gather(fetch(), hog())
+        print('block: %.1f ms wall, %.1f ms running, %.1f ms cpu, '
+              '%.1f ms waiting' % (t.elapsed_ns / 1e6, t.run_ns / 1e6,
+                                   t.cpu_ns / 1e6, t.wait_ns / 1e6))
+        lag = mon.summary()
+        print('loop lag: p50 %.1f ms, p99 %.1f ms over %d samples'
+              % (lag['p50'] * 1e3, lag['p99'] * 1e3, lag['count']))
+
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+''' bench_http: example benchmarks for benchrunner, fetching over HTTP
+
+The examples in timer.py time requests.get of a page on github.com,
+which measures the network as much as the code.  These fetch a small
+JSON document from a server on 127.0.0.1 started by setup(), so they
+run the same way anywhere, offline included.  The requests ones are
+skipped if requests is not installed.
+
+usage: python benchrunner.py run bench_http [-o results.json]
+'''
+from __future__ import print_function
+
+import json
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from benchrunner import benchmark
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+DOCUMENT = json.dumps([{'id': n, 'message': 'event %d' % n}
+                       for n in range(100)]).encode('utf-8')
+
+_server = None
+_session = None
+url = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True      # else keep-alive replies wait 40ms
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(DOCUMENT)))
+        self.end_headers()
+        self.wfile.write(DOCUMENT)
+
+    def log_message(self, *args):
+        pass
+
+
+def setup():
+    '''start the stand-in server on a free local port'''
+    global _server, _session, url
+    _server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=_server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    url = 'http://127.0.0.1:%d/timeline.json' % _server.server_address[1]
+    if requests is not None:
+        _session = requests.Session()
+
+
+def teardown():
+    if _session is not None:
+        _session.close()
+    _server.shutdown()
+    _server.server_close()
+
+
+@benchmark('urllib.urlopen')
+def urllib_get():
+    with urllib.request.urlopen(url) as response:
+        json.loads(response.read())
+
+
+if requests is not None:
+    @benchmark('requests.get')
+    def requests_get():
+        requests.get(url).json()
+
+    @benchmark('requests.Session.get')
+    def session_get():
+        _session.get(url).json()
+
+
+@benchmark('json.loads')
+def parse_only():
+    json.loads(DOCUMENT)
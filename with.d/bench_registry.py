@@ -0,0 +1,76 @@
+''' bench_registry: per-block cost of registry timers
+
+Times n runs of an empty block: bare, under a plain context manager
+that only reads the clock (as timer.Timer does, without printing),
+and under registry.Timer, reused and created afresh each time.  The
+difference from the bare loop is what a timer adds to a hot path.
+
+usage: python bench_registry.py [nblocks]
+'''
+from __future__ import print_function
+
+import sys
+from timeit import default_timer
+
+import registry
+
+
+class ClockOnly(object):
+    def __enter__(self):
+        self.start = default_timer()
+        return self
+
+    def __exit__(self, *args):
+        self.elapsed_secs = default_timer() - self.start
+
+
+def timed(name, n, func, baseline=None):
+    start = default_timer()
+    func(n)
+    elapsed = default_timer() - start
+    line = '%-32s %8.1f ms  %6.0f ns/block' % (name, elapsed * 1000,
+                                               elapsed * 1e9 / n)
+    if baseline is not None:
+        line += '  (+%.0f ns)' % ((elapsed - baseline) * 1e9 / n)
+    print(line)
+    return elapsed
+
+
+def bare(n):
+    for _ in range(n):
+        pass
+
+
+def clock_only(n):
+    t = ClockOnly()
+    for _ in range(n):
+        with t:
+            pass
+
+
+def reused(n):
+    t = registry.Timer('bench.reused')
+    for _ in range(n):
+        with t:
+            pass
+
+
+def fresh(n):
+    Timer = registry.Timer
+    for _ in range(n):
+        with Timer('bench.fresh'):
+            pass
+
+
+def main(n):
+    baseline = timed('empty loop', n, bare)
+    timed('clock only', n, clock_only, baseline)
+    timed('registry.Timer, reused', n, reused, baseline)
+    timed('registry.Timer, new each time', n, fresh, baseline)
+    stats = registry.snapshot()['bench.fresh']
+    print('block time p50 %.0f ns, p99 %.0f ns'
+          % (stats['p50'] * 1e9, stats['p99'] * 1e9))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,64 @@
+''' bench_sampler: what a sampling Profile costs the profiled code
+
+Runs a CPU-bound workload (recursive fib, which keeps stacks deep)
+bare and then under Profile at a few rates, alternating so drift in
+the machine's speed affects them alike, and reports the slowdown
+against the bare runs along with the overhead the Profile measured
+itself.
+
+usage: python bench_sampler.py [fib-n] [rounds]
+'''
+from __future__ import print_function
+
+import sys
+import statistics
+from timeit import default_timer
+
+from sampler import Profile
+
+RATES = (100, 1000)
+
+
+def fib(n):
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+
+def timed(n, rate=None):
+    prof = None
+    start = default_timer()
+    if rate:
+        prof = Profile(rate)
+        prof.start()
+    fib(n)
+    if prof:
+        prof.stop()
+    return default_timer() - start, prof
+
+
+def main(n, rounds):
+    timed(n)        # warm up
+    bare = []
+    profiled = dict((rate, []) for rate in RATES)
+    overhead = dict((rate, []) for rate in RATES)
+    samples = dict((rate, 0) for rate in RATES)
+    for _ in range(rounds):
+        bare.append(timed(n)[0])
+        for rate in RATES:
+            elapsed, prof = timed(n, rate)
+            profiled[rate].append(elapsed)
+            overhead[rate].append(prof.overhead)
+            samples[rate] += prof.samples
+    base = statistics.median(bare)
+    print('%-16s %8.1f ms' % ('bare', base * 1000))
+    for rate in RATES:
+        med = statistics.median(profiled[rate])
+        print('%-16s %8.1f ms  slowdown %+.1f%%  measured overhead %.2f%%  '
+              '%d samples' % ('%d Hz' % rate, med * 1000,
+                              (med - base) / base * 100,
+                              statistics.median(overhead[rate]) * 100,
+                              samples[rate]))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,110 @@
+''' bench_timers: cost of each Timer variant around an empty block
+
+Times n runs of an empty block under each of the timers in this
+directory: timer.Timer quiet and verbose, timer2 to timer4 (which
+always print; the output goes to /dev/null, but formatting it is
+part of their cost), registry.Timer and fasttimer.Timer, both as a
+context manager and started and stopped by hand.  The cost of the
+bare loop is shown first and subtracted from the others.  Last, a
+call of an empty function is compared with the same call decorated
+by fasttimer.timed.
+
+usage: python bench_timers.py [nblocks]
+'''
+from __future__ import print_function
+
+import os
+import sys
+import contextlib
+from timeit import default_timer
+
+import timer
+import timer2
+import timer3
+import timer4
+import registry
+import fasttimer
+
+
+def measure(n, func, quiet=False):
+    '''run func(n), with stdout going to /dev/null if 'quiet' '''
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull if quiet else sys.stdout):
+            start = default_timer()
+            func(n)
+            return default_timer() - start
+
+
+def report(name, n, elapsed, baseline=None):
+    line = '%-36s %8.1f ms  %6.0f ns/block' % (name, elapsed * 1000,
+                                               elapsed * 1e9 / n)
+    if baseline is not None:
+        line += '  (+%.0f ns)' % ((elapsed - baseline) * 1e9 / n)
+    print(line)
+    return elapsed
+
+
+def bare(n):
+    for _ in range(n):
+        pass
+
+
+def reusing(make):
+    def run(n):
+        t = make()
+        for _ in range(n):
+            with t:
+                pass
+    return run
+
+
+def creating(make):
+    def run(n):
+        for _ in range(n):
+            with make():
+                pass
+    return run
+
+
+def start_stop(n):
+    t = fasttimer.Timer()
+    for _ in range(n):
+        t.start()
+        t.stop()
+
+
+def empty():
+    pass
+
+
+def calls(func):
+    def run(n):
+        for _ in range(n):
+            func()
+    return run
+
+
+def main(n):
+    baseline = report('empty loop', n, measure(n, bare))
+    for name, func, quiet in (
+            ('timer.Timer()', reusing(timer.Timer), False),
+            ('timer.Timer(verbose=True)',
+             reusing(lambda: timer.Timer(verbose=True)), True),
+            ('timer2.Timer()', reusing(timer2.Timer), True),
+            ('timer3.Timer() (new each time)', creating(timer3.Timer), True),
+            ('timer4.Timer() (new each time)', creating(timer4.Timer), True),
+            ('registry.Timer', reusing(lambda: registry.Timer('bench')),
+             False),
+            ('fasttimer.Timer', reusing(fasttimer.Timer), False),
+            ('fasttimer.Timer (new each time)', creating(fasttimer.Timer),
+             False),
+            ('fasttimer.Timer start/stop', start_stop, False)):
+        report(name, n, measure(n, func, quiet), baseline)
+    calls_base = report('empty function', n, measure(n, calls(empty)),
+                        baseline)
+    report('empty function, @fasttimer.timed', n,
+           measure(n, calls(fasttimer.timed(empty))), calls_base)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,253 @@
+#!/usr/bin/python3
+''' benchrunner: repeatable benchmarks built on fasttimer.Timer
+
+Timing one call with a Timer, as the examples in timer.py do, says
+little: the first call pays for imports and connection setup, and a
+single sample can't show how much the time varies.  run_benchmark()
+does it properly:
+
+  - a few warmup calls, not counted
+  - the number of calls per trial is doubled until a trial takes at
+    least TRIAL_TIME, so that clock resolution doesn't matter
+  - 'repeat' trials, each giving a time per call
+  - trials outside Tukey's fences (more than 1.5 IQR beyond the
+    quartiles) are dropped as outliers, and the median, IQR, mean
+    and standard deviation are worked out from the rest
+
+Benchmarks are functions taking no arguments, marked with the
+@benchmark decorator in some module.  If the module has setup() and
+teardown() functions they are called before and after its
+benchmarks.  Results are saved as JSON, and compare() sets two
+result files side by side.  A change in a benchmark's median counts
+as a regression (or an improvement) only if it is more than
+'threshold' and the Mann-Whitney U test says the two sets of trials
+differ at significance level 'alpha'.
+
+usage: python benchrunner.py run module [-o results.json] [-r repeat]
+       python benchrunner.py compare old.json new.json
+
+compare exits with status 1 if anything got slower.
+bench_http.py has example benchmarks.
+'''
+from __future__ import print_function
+
+__all__ = ["benchmark", "benchmarks_in", "run_benchmark", "run", "save",
+           "load", "compare", "mann_whitney"]
+
+import sys
+import json
+import math
+import time
+import platform
+import importlib
+import statistics
+
+from fasttimer import Timer
+
+WARMUP = 3
+REPEAT = 15
+TRIAL_TIME = 0.05       # seconds a trial should take at least
+MAX_LOOPS = 1 << 24
+
+
+def benchmark(name=None):
+    '''decorator marking a function as a benchmark called 'name'
+    (the function's name by default)
+    '''
+    def register(func):
+        func.benchmark_name = name or func.__name__
+        return func
+    return register
+
+
+def benchmarks_in(module):
+    '''return {name: func} for the benchmarks defined in 'module' '''
+    return dict((func.benchmark_name, func)
+                for func in vars(module).values()
+                if hasattr(func, 'benchmark_name'))
+
+
+def _trial(func, loops):
+    '''return the time per call of 'loops' calls of 'func' '''
+    t = Timer()
+    with t:
+        for _ in range(loops):
+            func()
+    return t.elapsed_ns / 1e9 / loops
+
+
+def _calibrate(func):
+    loops = 1
+    while loops < MAX_LOOPS:
+        if _trial(func, loops) * loops >= TRIAL_TIME:
+            break
+        loops *= 2
+    return loops
+
+
+def _quartiles(values):
+    q1, median, q3 = statistics.quantiles(values, n=4, method='inclusive')
+    return q1, median, q3
+
+
+def run_benchmark(func, repeat=REPEAT, warmup=WARMUP, loops=None):
+    '''time 'func' and return a dict of the results, times in seconds'''
+    for _ in range(warmup):
+        func()
+    if loops is None:
+        loops = _calibrate(func)
+    times = [_trial(func, loops) for _ in range(repeat)]
+
+    if len(times) >= 4:
+        q1, _, q3 = _quartiles(times)
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        kept = [t for t in times if low <= t <= high]
+    else:
+        kept = list(times)
+    if len(kept) >= 4:
+        q1, median, q3 = _quartiles(kept)
+    else:
+        q1 = q3 = median = statistics.median(kept)
+    return {
+        'loops': loops,
+        'times': times,
+        'outliers': len(times) - len(kept),
+        'median': median,
+        'iqr': q3 - q1,
+        'mean': statistics.mean(kept),
+        'stdev': statistics.stdev(kept) if len(kept) > 1 else 0.0,
+    }
+
+
+def run(benchmarks, repeat=REPEAT, warmup=WARMUP, verbose=True):
+    '''run {name: func} 'benchmarks', returning the results document'''
+    results = {}
+    for name in sorted(benchmarks):
+        result = results[name] = run_benchmark(benchmarks[name], repeat,
+                                               warmup)
+        if verbose:
+            print('%-32s %12.3f us  +- %.3f us (IQR)  %d loops, '
+                  '%d outliers' % (name, result['median'] * 1e6,
+                                   result['iqr'] * 1e6, result['loops'],
+                                   result['outliers']))
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'benchmarks': results,
+    }
+
+
+def save(results, filename):
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load(filename):
+    with open(filename) as f:
+        return json.load(f)
+
+
+def mann_whitney(a, b):
+    '''two-sided Mann-Whitney U test: return (U, p) for samples a, b
+    p comes from the normal approximation with tie correction, which
+    is good enough for the 10 or more trials a benchmark has.
+    '''
+    n1, n2 = len(a), len(b)
+    combined = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    ranks = [0.0] * len(combined)
+    ties = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2.0 + 1
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+    r1 = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u1 = r1 - n1 * (n1 + 1) / 2.0
+    u = min(u1, n1 * n2 - u1)
+    n = n1 + n2
+    sigma2 = n1 * n2 / 12.0 * ((n + 1) - ties / (n * (n - 1)))
+    if sigma2 <= 0:
+        return u, 1.0
+    z = (abs(u1 - n1 * n2 / 2.0) - 0.5) / math.sqrt(sigma2)
+    p = math.erfc(max(z, 0.0) / math.sqrt(2))
+    return u, min(p, 1.0)
+
+
+def compare(old, new, alpha=0.05, threshold=0.05):
+    '''compare two results documents benchmark by benchmark
+    Returns a list of (name, old median, new median, relative change,
+    p, verdict), verdict being 'slower', 'faster' or 'same'.  If the
+    old median is zero there is no relative change: it is None and
+    the verdict 'n/a'.  Benchmarks in only one of them are left out.
+    '''
+    rows = []
+    for name in sorted(set(old['benchmarks']) & set(new['benchmarks'])):
+        a, b = old['benchmarks'][name], new['benchmarks'][name]
+        _, p = mann_whitney(a['times'], b['times'])
+        if a['median']:
+            change = (b['median'] - a['median']) / a['median']
+            verdict = 'same'
+            if p < alpha and abs(change) > threshold:
+                verdict = 'slower' if change > 0 else 'faster'
+        else:
+            change, verdict = None, 'n/a'
+        rows.append((name, a['median'], b['median'], change, p, verdict))
+    return rows
+
+
+def _run_module(modname, outfile=None, repeat=REPEAT):
+    module = importlib.import_module(modname)
+    benchmarks = benchmarks_in(module)
+    if hasattr(module, 'setup'):
+        module.setup()
+    try:
+        results = run(benchmarks, repeat)
+    finally:
+        if hasattr(module, 'teardown'):
+            module.teardown()
+    if outfile:
+        save(results, outfile)
+    return results
+
+
+def main(args):
+    import argparse
+    parser = argparse.ArgumentParser(prog='benchrunner')
+    sub = parser.add_subparsers(dest='command', required=True)
+    runp = sub.add_parser('run', help='run the benchmarks in a module')
+    runp.add_argument('module')
+    runp.add_argument('-o', '--output')
+    runp.add_argument('-r', '--repeat', type=int, default=REPEAT)
+    cmpp = sub.add_parser('compare', help='compare two results files')
+    cmpp.add_argument('old')
+    cmpp.add_argument('new')
+    cmpp.add_argument('--alpha', type=float, default=0.05)
+    cmpp.add_argument('--threshold', type=float, default=0.05)
+    opts = parser.parse_args(args)
+
+    if opts.command == 'run':
+        modname = opts.module
+        if modname.endswith('.py'):
+            modname = modname[:-3]
+        _run_module(modname, opts.output, opts.repeat)
+        return 0
+    rows = compare(load(opts.old), load(opts.new), opts.alpha,
+                   opts.threshold)
+    for name, before, after, change, p, verdict in rows:
+        if change is None:
+            change = '%8s' % 'n/a'
+        else:
+            change = '%+7.1f%%' % (change * 100)
+        print('%-32s %12.3f us %12.3f us %s  p=%.3f  %s'
+              % (name, before * 1e6, after * 1e6, change, p, verdict))
+    return 1 if any(row[5] == 'slower' for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
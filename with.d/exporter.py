@@ -0,0 +1,193 @@
+''' exporter: send timer measurements to monitoring systems
+
+A Timer's result lives in its 'elapsed' attribute until the next
+use.  An Exporter collects measurements from any number of timers
+and passes them on to one or more sinks, such as:
+
+    PrometheusFile  a file in the Prometheus text format, for the
+                    node exporter's textfile collector; it is written
+                    to a temporary file and renamed into place, so
+                    the collector never reads half of it
+    StatsD          StatsD timing lines ('name:12.5|ms') in UDP
+                    datagrams, several to a datagram
+
+The timed code only puts (name, seconds) on a bounded queue, which
+never blocks: if the queue is full the measurement is dropped and
+counted in 'dropped', which is exported too.  A background thread
+empties the queue every 'interval' seconds, adds the measurements
+to running totals (registry.TimerStats, so memory stays bounded) and
+hands them to the sinks, so slow disks or networks never hold up the
+timed code.
+
+    exp = Exporter([PrometheusFile('/var/lib/node_exporter/app.prom')])
+    exp.start()
+    with Timer('db.query', exp):
+        run_query()
+    exp.stop()          # flushes whatever is left
+'''
+from __future__ import print_function
+
+__all__ = ["Exporter", "Timer", "PrometheusFile", "StatsD"]
+
+import re
+import queue
+import socket
+import threading
+
+import toplevel
+import fasttimer
+from atomicfile import atomic_write
+from registry import TimerStats
+
+INTERVAL = 10.0         # seconds between flushes
+MAXSIZE = 10000         # measurements queued before dropping
+DATAGRAM_SIZE = 1432    # bytes, to fit an Ethernet frame
+
+_BAD_CHARS = re.compile(r'[^a-zA-Z0-9_]')
+
+
+class PrometheusFile(object):
+    '''write the running totals as Prometheus summaries to 'path'
+    Each timer becomes <prefix>_<name>_seconds, with its name's dots
+    and other unsuitable characters turned into underscores.
+    '''
+
+    def __init__(self, path, prefix='timer'):
+        self.path = path
+        self.prefix = prefix
+
+    def export(self, batch, totals, dropped):
+        lines = []
+        for name, stats in sorted(totals.items()):
+            metric = '%s_%s_seconds' % (self.prefix,
+                                        _BAD_CHARS.sub('_', name))
+            lines.append('# TYPE %s summary' % metric)
+            for pct in (50, 95, 99):
+                lines.append('%s{quantile="%s"} %r'
+                             % (metric, pct / 100.0, stats.percentile(pct)))
+            lines.append('%s_sum %r' % (metric, stats.total))
+            lines.append('%s_count %d' % (metric, stats.count))
+        metric = '%s_exporter_dropped_total' % self.prefix
+        lines.append('# TYPE %s counter' % metric)
+        lines.append('%s %d' % (metric, dropped))
+        atomic_write(self.path, '\n'.join(lines) + '\n')
+
+
+class StatsD(object):
+    '''send each measurement as a StatsD timing over UDP'''
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix=''):
+        self.address = (host, port)
+        self.prefix = prefix + '.' if prefix else ''
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._dropped = 0
+
+    def _send(self, lines):
+        datagram = []
+        size = 0
+        for line in lines:
+            line = line.encode('utf-8')
+            if datagram and size + len(line) + 1 > DATAGRAM_SIZE:
+                self.sock.sendto(b'\n'.join(datagram), self.address)
+                datagram, size = [], 0
+            datagram.append(line)
+            size += len(line) + 1
+        if datagram:
+            self.sock.sendto(b'\n'.join(datagram), self.address)
+
+    def export(self, batch, totals, dropped):
+        lines = ['%s%s:%.3f|ms' % (self.prefix, name, seconds * 1000)
+                 for name, seconds in batch]
+        if dropped > self._dropped:
+            lines.append('%sexporter.dropped:%d|c'
+                         % (self.prefix, dropped - self._dropped))
+            self._dropped = dropped
+        self._send(lines)
+
+    def close(self):
+        self.sock.close()
+
+
+class Exporter(object):
+    '''queue measurements and flush them to 'sinks' in the background'''
+
+    def __init__(self, sinks, interval=INTERVAL, maxsize=MAXSIZE):
+        self.sinks = list(sinks)
+        self.interval = interval
+        self.queue = queue.Queue(maxsize)
+        self.totals = {}
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, name, seconds):
+        '''queue one measurement, or drop it if the queue is full'''
+        try:
+            self.queue.put_nowait((name, seconds))
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+    def flush(self):
+        '''hand everything queued so far to the sinks'''
+        with self._flush_lock:
+            batch = []
+            try:
+                while True:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            for name, seconds in batch:
+                stats = self.totals.get(name)
+                if stats is None:
+                    stats = self.totals[name] = TimerStats()
+                stats.add(seconds)
+            for sink in self.sinks:
+                try:
+                    sink.export(batch, self.totals, self.dropped)
+                except Exception as e:
+                    print("Warning: exporting to %r failed: %s" % (sink, e))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='exporter')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        '''stop the background thread and flush what is left'''
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    __enter__ = start
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class Timer(fasttimer.Timer):
+    '''a fasttimer.Timer which submits each block's time to an Exporter'''
+    __slots__ = ('name', 'exporter')
+
+    def __init__(self, name, exporter):
+        fasttimer.Timer.__init__(self)
+        self.name = name
+        self.exporter = exporter
+
+    def __exit__(self, exc_type, exc, tb):
+        fasttimer.Timer.__exit__(self, exc_type, exc, tb)
+        self.exporter.submit(self.name, self.elapsed_ns / 1e9)
+
+    def _add(self, elapsed):
+        fasttimer.Timer._add(self, elapsed)
+        self.exporter.submit(self.name, elapsed / 1e9)
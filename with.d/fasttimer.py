@@ -0,0 +1,110 @@
+''' fasttimer: a Timer cheap enough to leave in hot code
+
+timer.Timer reads the clock as a float, works out both seconds and
+milliseconds and maybe prints on every exit; the generator-based
+timers in timer3.py and timer4.py add the cost of contextlib on top.
+This Timer reads time.perf_counter_ns, an integer count that does not
+lose precision however long the process has been up, and on exit
+from a 'with' block only does the subtraction and stores it: no
+totals, no global lookups, no argument tuple.  Seconds and
+milliseconds are worked out when asked for.  Running totals are kept
+for the other two ways of using it, where a call costs more anyway.
+
+It can be used three ways:
+
+    with Timer() as t:          # as a context manager
+        work()
+    print(t.elapsed)
+
+    t = Timer()                 # started and stopped by hand
+    t.start()
+    work()
+    t.stop()
+
+    @timed                      # on a function: every call is added
+    def work():                 # up in work.timer
+        ...
+
+A Timer is not reentrant: use one per block being timed.  The
+decorator keeps its start time locally, so recursive calls of a
+decorated function are all counted.  There is no locking, so updates
+from several threads at once may be lost; registry.Timer is the one
+to share between threads.
+'''
+from __future__ import print_function
+
+__all__ = ["Timer", "timed"]
+
+import functools
+from time import perf_counter_ns
+
+_now = perf_counter_ns
+
+
+class Timer(object):
+    '''time blocks in integer nanoseconds
+    'elapsed_ns' is the last block's time.  'total_ns' and 'count' are
+    the sum and number of the blocks timed by start()/stop() or as a
+    decorator; a 'with' block only sets 'elapsed_ns'.
+    '''
+    __slots__ = ('started', 'elapsed_ns', 'total_ns', 'count')
+
+    def __init__(self):
+        self.started = 0
+        self.elapsed_ns = 0
+        self.total_ns = 0
+        self.count = 0
+
+    # the clock is bound as a default argument, a local lookup
+    def __enter__(self, _now=perf_counter_ns):
+        self.started = _now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb, _now=perf_counter_ns):
+        self.elapsed_ns = _now() - self.started
+
+    start = __enter__
+
+    def stop(self):
+        '''stop timing, returning the elapsed nanoseconds'''
+        elapsed = _now() - self.started
+        self._add(elapsed)
+        return elapsed
+
+    def _add(self, elapsed):
+        self.elapsed_ns = elapsed
+        self.total_ns += elapsed
+        self.count += 1
+
+    def __call__(self, func):
+        '''decorate 'func' so each call is timed by this Timer'''
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = _now()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._add(_now() - started)
+        wrapper.timer = self
+        return wrapper
+
+    @property
+    def elapsed_secs(self):
+        return self.elapsed_ns / 1e9
+
+    @property
+    def elapsed(self):
+        '''the last block's time in milliseconds, as with timer.Timer'''
+        return self.elapsed_ns / 1e6
+
+    @property
+    def mean_ns(self):
+        return self.total_ns / self.count if self.count else None
+
+    def reset(self):
+        self.__init__()
+
+
+def timed(func):
+    '''decorator timing every call of 'func' with a new Timer'''
+    return Timer()(func)
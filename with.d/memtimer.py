@@ -0,0 +1,156 @@
+''' memtimer: timers which also measure memory use and GC
+
+For batch jobs memory is more often the limit than time.  A MemTimer
+is a registry.Timer which, as well as the block's time, measures:
+
+    alloc_bytes     change in memory traced by tracemalloc
+    peak_bytes      highest traced memory during the block, above
+                    what was traced when it started
+    rss_bytes       change in resident set size (Linux only)
+    gc_collections  garbage collections run during the block
+    gc_secs         time those collections took
+
+Each is recorded in the registry as '<name>.<measurement>', next to
+the timings under '<name>', so they are aggregated the same way and
+snapshot() gives their totals and percentiles.  Negative changes
+count towards the totals but as zero in the percentiles.
+
+None of this costs anything unless a MemTimer is in use: plain
+Timers are unchanged, and the GC callback is only installed while a
+MemTimer block is running.  tracemalloc is the expensive part.  If
+it is not already tracing, a MemTimer starts it for the block and
+stops it after the last MemTimer block running in any thread ends.
+So for a loop of blocks, start tracemalloc first, or pass
+trace=False to measure only RSS and GC.  The peak is reset at the
+start of each block, so an outer MemTimer sees only the peak since
+the innermost one started.  tracemalloc and the GC count the whole
+process, so blocks running at the same time in several threads
+each see the others' allocations and collections too.
+
+registry.Registry.timer(name, memory=True) returns a MemTimer.
+'''
+from __future__ import print_function
+
+__all__ = ["MemTimer", "rss"]
+
+import os
+import gc
+import threading
+import tracemalloc
+from time import perf_counter_ns
+
+import registry
+
+_lock = threading.Lock()
+_gc_users = 0
+_gc_collections = 0
+_gc_ns = 0
+_gc_started = None
+_trace_users = 0
+_trace_started = False
+
+_PAGESIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss():
+    '''return the resident set size of this process, or None if unknown'''
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGESIZE
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+
+def _gc_callback(phase, info):
+    global _gc_collections, _gc_ns, _gc_started
+    if phase == 'start':
+        _gc_started = perf_counter_ns()
+    elif _gc_started is not None:
+        _gc_ns += perf_counter_ns() - _gc_started
+        _gc_collections += 1
+        _gc_started = None
+
+
+def _gc_watch(on):
+    '''install the GC callback for the first user, remove after the last'''
+    global _gc_users
+    with _lock:
+        if on:
+            _gc_users += 1
+            if _gc_users == 1:
+                gc.callbacks.append(_gc_callback)
+        else:
+            _gc_users -= 1
+            if _gc_users == 0:
+                gc.callbacks.remove(_gc_callback)
+
+
+def _trace_watch(on):
+    '''start tracemalloc for the first user if it is not tracing, and
+    stop it after the last, if it was started here
+    '''
+    global _trace_users, _trace_started
+    with _lock:
+        if on:
+            _trace_users += 1
+            if _trace_users == 1 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _trace_started = True
+        else:
+            _trace_users -= 1
+            if _trace_users == 0 and _trace_started:
+                tracemalloc.stop()
+                _trace_started = False
+
+
+class MemTimer(registry.Timer):
+    '''a registry.Timer which also records memory use and GC activity
+    After the block the measurements are also left in the attributes
+    alloc_bytes, peak_bytes, rss_bytes (None if unknown or not traced),
+    gc_collections and gc_secs.
+    '''
+    __slots__ = ('trace', 'alloc_bytes', 'peak_bytes', 'rss_bytes',
+                 'gc_collections', 'gc_secs', '_traced', '_rss', '_gc')
+
+    def __init__(self, name, verbose=False, registry=None, trace=True):
+        super(MemTimer, self).__init__(name, verbose, registry)
+        self.trace = trace
+
+    def __enter__(self):
+        _gc_watch(True)
+        self._gc = (_gc_collections, _gc_ns)
+        if self.trace:
+            _trace_watch(True)
+            tracemalloc.reset_peak()
+            self._traced = tracemalloc.get_traced_memory()[0]
+        self._rss = rss()
+        return super(MemTimer, self).__enter__()
+
+    def __exit__(self, *args):
+        super(MemTimer, self).__exit__(*args)
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            _trace_watch(False)
+            self.alloc_bytes = current - self._traced
+            self.peak_bytes = peak - self._traced
+        else:
+            self.alloc_bytes = self.peak_bytes = None
+        now = rss()
+        if now is not None and self._rss is not None:
+            self.rss_bytes = now - self._rss
+        else:
+            self.rss_bytes = None
+        self.gc_collections = _gc_collections - self._gc[0]
+        self.gc_secs = (_gc_ns - self._gc[1]) / 1e9
+        _gc_watch(False)
+
+        for measure in ('alloc_bytes', 'peak_bytes', 'rss_bytes',
+                        'gc_collections', 'gc_secs'):
+            value = getattr(self, measure)
+            if value is not None:
+                self.registry.record('%s.%s' % (self.name, measure), value)
+        if self.verbose:
+            print('%s: allocated %s bytes, peak %s bytes, rss %+d bytes, '
+                  '%d collections' % (self.name, self.alloc_bytes,
+                                      self.peak_bytes, self.rss_bytes or 0,
+                                      self.gc_collections))
@@ -0,0 +1,175 @@
+''' profiler: nested timers building a call tree of with-blocks
+
+Timers used inside one another each report on their own, so where
+the time of an outer block went has to be worked out by hand.  A
+Section is a fasttimer.Timer which knows what it is nested in:
+
+    with section('request'):
+        with section('db'):
+            query()
+        with section('render'):
+            render()
+
+The path to the current section ('request', 'db') is kept in a
+contextvars.ContextVar, so every thread and every asyncio task has
+its own nesting.  When a section exits its time is added to the
+Profiler under its whole path, and subtracted from its parent's own
+time, so each node of the tree has a count, an inclusive time (the
+whole block) and an exclusive time (the block less the sections
+inside it).  Identical paths from many runs add up to the same node.
+
+folded() gives the tree in the folded-stack format flamegraph.pl and
+speedscope read, one line per path with its exclusive time in
+microseconds; report() is a readable indented version.
+'''
+from __future__ import print_function
+
+__all__ = ["Profiler", "Section", "profiler", "section"]
+
+import functools
+import threading
+import contextvars
+
+from fasttimer import Timer
+
+_path = contextvars.ContextVar('profiler_path', default=())
+
+
+class _Node(object):
+    __slots__ = ('count', 'inclusive_ns', 'children_ns')
+
+    def __init__(self):
+        self.count = 0
+        self.inclusive_ns = 0
+        self.children_ns = 0
+
+    @property
+    def exclusive_ns(self):
+        # children running concurrently (asyncio.gather, say) can add
+        # up to more than their parent took
+        return max(0, self.inclusive_ns - self.children_ns)
+
+
+class Profiler(object):
+    '''call tree of Section timings, keyed by path'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes = {}
+
+    def section(self, name):
+        '''return a Section called 'name' which records here'''
+        return Section(name, self)
+
+    def record(self, path, elapsed_ns):
+        '''add a run of 'elapsed_ns' for the section at 'path' '''
+        with self._lock:
+            node = self._nodes.get(path)
+            if node is None:
+                node = self._nodes[path] = _Node()
+            node.count += 1
+            node.inclusive_ns += elapsed_ns
+            if len(path) > 1:
+                parent = self._nodes.get(path[:-1])
+                if parent is None:
+                    parent = self._nodes[path[:-1]] = _Node()
+                parent.children_ns += elapsed_ns
+
+    def tree(self):
+        '''return {path: {'count', 'inclusive_ns', 'exclusive_ns'}}'''
+        with self._lock:
+            return dict((path, {'count': node.count,
+                                'inclusive_ns': node.inclusive_ns,
+                                'exclusive_ns': node.exclusive_ns})
+                        for path, node in self._nodes.items())
+
+    def folded(self):
+        '''return the tree as folded stacks, exclusive microseconds'''
+        lines = []
+        for path, node in sorted(self.tree().items()):
+            usecs = node['exclusive_ns'] // 1000
+            if usecs:
+                lines.append('%s %d' % (';'.join(path), usecs))
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def dump_folded(self, filename):
+        with open(filename, 'w') as f:
+            f.write(self.folded())
+
+    def report(self):
+        '''return the tree as indented text, times in milliseconds'''
+        lines = ['%-40s %8s %12s %12s' % ('section', 'count',
+                                          'incl ms', 'excl ms')]
+        for path, node in sorted(self.tree().items()):
+            lines.append('%-40s %8d %12.3f %12.3f'
+                         % ('  ' * (len(path) - 1) + path[-1], node['count'],
+                            node['inclusive_ns'] / 1e6,
+                            node['exclusive_ns'] / 1e6))
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._nodes.clear()
+
+
+profiler = _default = Profiler()
+
+
+class Section(Timer):
+    '''a fasttimer.Timer recorded in a Profiler under its nesting path
+    Like a Timer it can also decorate a function, and then each call
+    is timed as a section nested wherever the call is made.
+    '''
+    __slots__ = ('name', 'profiler', '_token', '_fullpath')
+
+    def __init__(self, name, profiler=None):
+        Timer.__init__(self)
+        self.name = name
+        if profiler is None:
+            profiler = _default
+        self.profiler = profiler
+
+    def __enter__(self):
+        self._fullpath = _path.get() + (self.name,)
+        self._token = _path.set(self._fullpath)
+        return Timer.__enter__(self)
+
+    def __exit__(self, exc_type, exc, tb):
+        Timer.__exit__(self, exc_type, exc, tb)
+        _path.reset(self._token)
+        self.profiler.record(self._fullpath, self.elapsed_ns)
+
+    start = __enter__
+
+    def __call__(self, func):
+        name, profiler = self.name, self.profiler
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Section(name, profiler):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def section(name):
+    '''a Section called 'name' in the default profiler'''
+    return Section(name)
+
+
+if __name__ == '__main__':
+    # example: a "request" made of nested sections, run a few times
+    import time
+
+    @section('render')
+    def render():
+        time.sleep(0.002)
+
+    for _ in range(5):
+        with section('request'):
+            with section('db'):
+                time.sleep(0.005)
+            render()
+            time.sleep(0.001)
+    print(profiler.report())
+    print()
+    print(profiler.folded(), end='')
@@ -0,0 +1,205 @@
+''' registry: named timers which add up their measurements
+
+A Timer from timer.py measures one block and keeps the result in
+'elapsed' until the next use.  The Timer here is given a name, and
+every time a block runs under it the elapsed time goes into a shared
+Registry, which keeps for each name the count, total, minimum and
+maximum, plus a histogram from which percentiles are estimated:
+
+    with Timer('db.query'):
+        run_query()
+    ...
+    print(snapshot()['db.query']['p99'])
+
+The histogram has logarithmic buckets, SUB_BUCKETS of them for each
+power of two (so estimates are within about 3% of the true value),
+and only buckets which have been used take any memory.  Timings from
+a nanosecond to a day need at most about 750 buckets per name, so
+memory stays bounded however many samples come in.  Recording takes
+a lock, so timers can be used from any thread.
+'''
+from __future__ import print_function
+
+__all__ = ["Timer", "Registry", "TimerStats", "registry", "snapshot",
+           "reset"]
+
+import math
+import threading
+from timeit import default_timer
+
+SUB_BUCKETS = 16
+PERCENTILES = (50, 95, 99)
+
+_SHIFT = SUB_BUCKETS.bit_length() - 1
+_SCALE = 2 * SUB_BUCKETS
+_ZERO = float('-inf')       # bucket for timings too small to measure
+_frexp = math.frexp
+
+
+def _bucket(seconds):
+    '''return the histogram bucket index for 'seconds' '''
+    if seconds <= 0:
+        return _ZERO
+    mantissa, exponent = math.frexp(seconds)     # 0.5 <= mantissa < 1
+    return (exponent << _SHIFT) + int((mantissa - 0.5) * _SCALE)
+
+
+def _bucket_value(index):
+    '''return the midpoint of the range covered by bucket 'index' '''
+    if index == _ZERO:
+        return 0.0
+    exponent = index >> _SHIFT
+    sub = index & (SUB_BUCKETS - 1)
+    return math.ldexp(0.5 + (sub + 0.5) / (2 * SUB_BUCKETS), exponent)
+
+
+class TimerStats(object):
+    '''aggregated measurements for one timer name'''
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds > 0:
+            # _bucket, inlined as this is on every timer's exit path
+            mantissa, exponent = _frexp(seconds)
+            index = (exponent << _SHIFT) + int((mantissa - 0.5) * _SCALE)
+        else:
+            index = _ZERO
+        buckets = self.buckets
+        buckets[index] = buckets.get(index, 0) + 1
+
+    def percentile(self, pct):
+        '''estimate the 'pct' percentile (0-100) of the timings'''
+        if not self.count:
+            return None
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                break
+        return min(max(_bucket_value(index), self.min), self.max)
+
+    def summary(self):
+        '''return the stats as a dict, times in seconds'''
+        result = {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'mean': self.total / self.count if self.count else None,
+        }
+        for pct in PERCENTILES:
+            result['p%d' % pct] = self.percentile(pct)
+        return result
+
+
+class Registry(object):
+    '''collection of TimerStats by name, safe to use from many threads'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._stats = {}
+
+    def stats(self, name):
+        '''return the TimerStats for 'name', creating it if need be
+        Only change it while holding 'lock'.
+        '''
+        with self.lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = TimerStats()
+            return stats
+
+    def record(self, name, seconds):
+        '''add one timing of 'seconds' for 'name' '''
+        stats = self.stats(name)
+        with self.lock:
+            stats.add(seconds)
+
+    def timer(self, name, verbose=False, memory=False):
+        '''return a Timer for 'name' which records here
+        With 'memory', it is a memtimer.MemTimer, which also records
+        memory use and garbage collection.
+        '''
+        if memory:
+            from memtimer import MemTimer
+            return MemTimer(name, verbose, self)
+        return Timer(name, verbose, self)
+
+    def names(self):
+        with self.lock:
+            return sorted(name for name, stats in self._stats.items()
+                          if stats.count)
+
+    def snapshot(self):
+        '''return {name: summary dict} for every timer so far'''
+        with self.lock:
+            return dict((name, stats.summary())
+                        for name, stats in self._stats.items() if stats.count)
+
+    def reset(self, name=None):
+        '''forget the timings for 'name', or all of them'''
+        with self.lock:
+            if name is None:
+                names = list(self._stats)
+            else:
+                names = [name] if name in self._stats else []
+            for name in names:
+                # Timers hold on to their stats, so clear them in place
+                self._stats[name].__init__()
+
+
+registry = _default = Registry()
+
+
+class Timer(object):
+    '''time a block and record the result in a Registry under 'name'
+    'elapsed' (milliseconds) and 'elapsed_secs' are set on exit, as
+    with timer.Timer.  The default registry is this module's.
+    '''
+    __slots__ = ('name', 'verbose', 'registry', 'start', 'elapsed_secs',
+                 'elapsed', '_stats', '_lock')
+
+    def __init__(self, name, verbose=False, registry=None):
+        self.name = name
+        self.verbose = verbose
+        if registry is None:
+            registry = _default
+        self.registry = registry
+        self._stats = registry.stats(name)
+        self._lock = registry.lock
+
+    def __enter__(self):
+        self.start = default_timer()
+        return self
+
+    def __exit__(self, *args):
+        self.elapsed_secs = elapsed = default_timer() - self.start
+        with self._lock:
+            self._stats.add(elapsed)
+        self.elapsed = elapsed * 1000     # millisecs
+        if self.verbose:
+            print('%s: elapsed time: %f ms' % (self.name, self.elapsed))
+
+
+def snapshot():
+    '''snapshot of the default registry'''
+    return registry.snapshot()
+
+
+def reset(name=None):
+    '''reset the default registry'''
+    registry.reset(name)
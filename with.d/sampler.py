@@ -0,0 +1,145 @@
+''' sampler: a sampling profiler to go with the timers
+
+Timers only measure the blocks someone thought to wrap, and can't go
+inside code we don't own.  A Profile instead looks at what the
+program is doing RATE times a second: a background thread takes the
+stacks of the other threads from sys._current_frames() and counts
+how often each stack is seen.  Stacks seen often are where the time
+goes, whatever code they are in:
+
+    with Profile() as prof:
+        handle_requests()
+    prof.dump_folded('requests.folded')     # for flamegraph.pl
+
+Only the thread which started the Profile is sampled, unless
+all_threads is set.  Stacks are kept as tuples of code objects, and
+turned into 'function (file:line)' names only for output.
+
+Sampling stops the sampled threads (it holds the GIL), so its cost
+is measured: 'overhead' is the fraction of the profiled time spent
+taking samples.  If one sample takes more than MAX_OVERHEAD of the
+interval, the interval is stretched to keep within it, so a deep or
+busy program is sampled less often rather than slowed down more.
+Handing the GIL to the sampler and back costs a little more than
+'overhead' shows; bench_sampler.py measures the whole slowdown,
+a few percent at 100Hz.  While the sampled code is busy the sampler
+waits up to sys.getswitchinterval() for the GIL, which limits the
+rate it can actually reach.
+'''
+from __future__ import print_function
+
+__all__ = ["Profile"]
+
+import os
+import sys
+import threading
+import collections
+from time import perf_counter
+
+RATE = 100              # samples per second
+MAX_OVERHEAD = 0.02     # fraction of the interval sampling may take
+MAX_DEPTH = 256
+
+
+class Profile(object):
+    '''sample the stacks of a thread (or all threads) in the background
+    'stacks' counts the samples of each stack, as a tuple of code
+    objects from the outermost call in.
+    '''
+
+    def __init__(self, rate=RATE, all_threads=False,
+                 max_overhead=MAX_OVERHEAD):
+        self.interval = 1.0 / rate
+        self.all_threads = all_threads
+        self.max_overhead = max_overhead
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.sampling_secs = 0.0
+        self.wall_secs = 0.0
+        self._names = {}
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _sample(self, frames, skip, target):
+        stacks = self.stacks
+        for ident, frame in frames.items():
+            if ident == skip or (target is not None and ident != target):
+                continue
+            codes = []
+            while frame is not None and len(codes) < MAX_DEPTH:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            stacks[tuple(codes)] += 1
+
+    def _run(self, target):
+        me = threading.get_ident()
+        interval = self.interval
+        while not self._stop.wait(interval):
+            started = perf_counter()
+            self._sample(sys._current_frames(), me, target)
+            cost = perf_counter() - started
+            self.samples += 1
+            self.sampling_secs += cost
+            if cost > interval * self.max_overhead:
+                interval = cost / self.max_overhead
+        self.interval = interval
+
+    def start(self):
+        target = None if self.all_threads else threading.get_ident()
+        self._stop.clear()
+        self._started = perf_counter()
+        self._thread = threading.Thread(target=self._run, args=(target,),
+                                        name='sampler')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.wall_secs += perf_counter() - self._started
+
+    __enter__ = start
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def overhead(self):
+        '''fraction of the profiled time spent sampling'''
+        if not self.wall_secs:
+            return 0.0
+        return self.sampling_secs / self.wall_secs
+
+    def _name(self, code):
+        name = self._names.get(code)
+        if name is None:
+            name = self._names[code] = '%s (%s:%d)' % (
+                code.co_name, os.path.basename(code.co_filename),
+                code.co_firstlineno)
+        return name
+
+    def folded(self):
+        '''return the samples as folded stacks, one line per stack'''
+        lines = ['%s %d' % (';'.join(self._name(code) for code in stack),
+                            count)
+                 for stack, count in self.stacks.items()]
+        lines.sort()
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def dump_folded(self, filename):
+        with open(filename, 'w') as f:
+            f.write(self.folded())
+
+    def top(self, n=10):
+        '''return [(function name, fraction of samples)] for the 'n'
+        functions most often at the top of the stack
+        '''
+        counts = collections.Counter()
+        for stack, count in self.stacks.items():
+            counts[self._name(stack[-1])] += count
+        total = sum(counts.values()) or 1
+        return [(name, count / float(total))
+                for name, count in counts.most_common(n)]
@@ -0,0 +1,68 @@
+import time
+import asyncio
+
+from asynctimer import StepTask, Timer, LagMonitor, install
+
+
+def run_in_steptask(coro_func):
+    async def main():
+        install()
+        return await asyncio.get_running_loop().create_task(coro_func())
+    return asyncio.run(main())
+
+
+def test_wait_and_run_separated():
+    async def block():
+        async with Timer() as t:
+            await asyncio.sleep(0.03)
+            time.sleep(0.01)
+        assert isinstance(asyncio.current_task(), StepTask)
+        return t
+
+    t = run_in_steptask(block)
+    assert t.elapsed_ns >= 40 * 1000 * 1000
+    assert 10 * 1000 * 1000 <= t.run_ns < t.elapsed_ns
+    assert t.wait_ns >= 25 * 1000 * 1000
+    assert t.cpu_ns is not None and t.cpu_ns < t.run_ns
+
+
+def test_cpu_time():
+    async def block():
+        async with Timer() as t:
+            n = 0
+            while time.perf_counter() - start < 0.02:
+                n += 1
+        return t
+
+    start = time.perf_counter()
+    t = run_in_steptask(block)
+    assert t.cpu_ns > 10 * 1000 * 1000
+
+
+def test_without_steptask():
+    async def block():
+        async with Timer() as t:
+            await asyncio.sleep(0)
+        return t
+
+    t = asyncio.run(block())
+    assert t.elapsed_ns > 0
+    assert t.run_ns is None and t.wait_ns is None
+    with Timer() as t:
+        pass
+    assert t.elapsed_ns >= 0 and t.run_ns is None
+
+
+def test_lag_monitor():
+    async def main():
+        async with LagMonitor(0.005) as mon:
+            for _ in range(3):
+                await asyncio.sleep(0.01)
+            time.sleep(0.05)            # block the loop
+            await asyncio.sleep(0.01)
+        return mon.summary()
+
+    lag = asyncio.run(main())
+    assert lag['count'] >= 3
+    assert lag['max'] >= 0.04
+    assert lag['p50'] < lag['max']
@@ -0,0 +1,80 @@
+import sys
+import json
+
+import pytest
+
+import benchrunner
+from benchrunner import (benchmark, benchmarks_in, run_benchmark, run,
+                         compare, mann_whitney, save, load)
+
+
+@pytest.fixture(autouse=True)
+def quick(monkeypatch):
+    monkeypatch.setattr(benchrunner, 'TRIAL_TIME', 0.001)
+
+
+def test_run_benchmark():
+    calls = []
+    result = run_benchmark(lambda: calls.append(1), repeat=8, warmup=2)
+    assert result['loops'] > 1
+    assert len(result['times']) == 8
+    assert len(calls) > 2 + 8 * result['loops']
+    assert result['median'] > 0 and result['iqr'] >= 0
+    assert 0 <= result['outliers'] < 8
+
+
+def test_outliers_dropped(monkeypatch):
+    values = iter([1.0] * 9 + [100.0])
+    monkeypatch.setattr(benchrunner, '_trial',
+                        lambda func, loops: next(values))
+    result = run_benchmark(lambda: None, repeat=10, warmup=0, loops=1)
+    assert result['loops'] == 1
+    assert result['outliers'] == 1
+    assert result['median'] == result['mean'] == 1.0
+
+
+def test_mann_whitney():
+    a = [1.0 + i * 0.01 for i in range(15)]
+    b = [2.0 + i * 0.01 for i in range(15)]
+    assert mann_whitney(a, b)[1] < 0.001
+    assert mann_whitney(a, list(a))[1] > 0.9
+    assert mann_whitney([1.0] * 5, [1.0] * 5)[1] == 1.0
+
+
+def doc(**medians):
+    return {'benchmarks': dict(
+        (name, {'median': m, 'times': [m * (1 + i * 0.001) for i in range(15)]})
+        for name, m in medians.items())}
+
+
+def test_compare():
+    rows = compare(doc(a=1.0, b=1.0, c=1.0, d=1.0),
+                   doc(a=2.0, b=0.5, c=1.0, e=1.0))
+    verdicts = dict((row[0], row[5]) for row in rows)
+    assert verdicts == {'a': 'slower', 'b': 'faster', 'c': 'same'}
+    assert dict((row[0], row[3]) for row in rows)['a'] == 1.0
+    # significant but below the threshold
+    assert compare(doc(a=1.0), doc(a=1.02))[0][5] == 'same'
+    # no relative change from a zero median
+    row = compare(doc(a=0.0), doc(a=1.0))[0]
+    assert row[3] is None and row[5] == 'n/a'
+
+
+def test_files_and_cli(tmp_path, capsys):
+    mod = type(sys)('benches')
+
+    @benchmark('noop')
+    def noop():
+        pass
+    mod.noop = noop
+    assert benchmarks_in(mod) == {'noop': noop}
+
+    results = run(benchmarks_in(mod), repeat=5, verbose=False)
+    old, new = str(tmp_path / 'old.json'), str(tmp_path / 'new.json')
+    save(results, old)
+    assert load(old)['benchmarks']['noop']['loops'] > 0
+    save(doc(noop=1.0), old)
+    save(doc(noop=3.0), new)
+    assert benchrunner.main(['compare', old, new]) == 1
+    assert 'slower' in capsys.readouterr().out
+    assert benchrunner.main(['compare', old, old]) == 0
@@ -0,0 +1,113 @@
+import os
+import socket
+
+import pytest
+
+from exporter import Exporter, Timer, PrometheusFile, StatsD
+
+
+@pytest.fixture
+def udp_listener():
+    '''a socket standing in for a StatsD server'''
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(2)
+    yield sock
+    sock.close()
+
+
+def received(sock):
+    lines = []
+    sock.settimeout(0.2)
+    try:
+        while True:
+            lines.extend(sock.recv(65536).decode('utf-8').split('\n'))
+    except socket.timeout:
+        pass
+    return lines
+
+
+def test_prometheus_file(tmp_path):
+    path = str(tmp_path / 'timers.prom')
+    exp = Exporter([PrometheusFile(path)], interval=0.01)
+    with exp:
+        for _ in range(3):
+            with Timer('db.query', exp):
+                pass
+    with open(path) as f:
+        text = f.read()
+    assert '# TYPE timer_db_query_seconds summary' in text
+    assert 'timer_db_query_seconds_count 3' in text
+    assert 'timer_db_query_seconds{quantile="0.99"}' in text
+    assert 'timer_exporter_dropped_total 0' in text
+    assert os.listdir(str(tmp_path)) == ['timers.prom']
+
+
+def test_statsd(udp_listener):
+    sink = StatsD(port=udp_listener.getsockname()[1], prefix='app')
+    exp = Exporter([sink])
+    exp.submit('render', 0.0125)
+    for _ in range(200):
+        exp.submit('db.query', 0.001)
+    exp.flush()
+    lines = received(udp_listener)
+    assert 'app.render:12.500|ms' in lines
+    assert lines.count('app.db.query:1.000|ms') == 200
+    sink.close()
+
+
+def test_statsd_datagram_bytes(udp_listener):
+    import exporter
+    sink = StatsD(port=udp_listener.getsockname()[1])
+    exp = Exporter([sink])
+    for _ in range(100):
+        exp.submit('\u00e9' * 20, 0.001)      # 40 bytes, 20 characters
+    exp.flush()
+    udp_listener.settimeout(0.2)
+    sizes = []
+    try:
+        while True:
+            sizes.append(len(udp_listener.recv(65536)))
+    except socket.timeout:
+        pass
+    assert max(sizes) <= exporter.DATAGRAM_SIZE
+    assert len(sizes) > 1
+    sink.close()
+
+
+def test_overload_drops(udp_listener):
+    sink = StatsD(port=udp_listener.getsockname()[1])
+    exp = Exporter([sink], maxsize=5)
+    for _ in range(8):
+        exp.submit('x', 0.001)
+    assert exp.dropped == 3
+    exp.flush()
+    lines = received(udp_listener)
+    assert lines.count('x:1.000|ms') == 5
+    assert 'exporter.dropped:3|c' in lines
+    sink.close()
+
+
+def test_failing_sink(capsys):
+    class Broken(object):
+        def export(self, batch, totals, dropped):
+            raise IOError('disk full')
+
+    exp = Exporter([Broken()])
+    exp.submit('x', 0.5)
+    exp.flush()
+    assert 'disk full' in capsys.readouterr().out
+    assert exp.totals['x'].count == 1
+
+
+def test_decorator():
+    exp = Exporter([])
+
+    @Timer('call', exp)
+    def call():
+        pass
+
+    call()
+    call()
+    exp.flush()
+    assert exp.totals['call'].count == 2
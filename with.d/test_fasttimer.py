@@ -0,0 +1,56 @@
+import time
+
+from fasttimer import Timer, timed
+
+
+def test_context_manager():
+    with Timer() as t:
+        time.sleep(0.01)
+    assert t.elapsed_ns >= 10 * 1000 * 1000
+    assert t.elapsed == t.elapsed_ns / 1e6
+    assert t.elapsed_secs == t.elapsed_ns / 1e9
+    with t:
+        pass
+    assert t.count == 0         # only start/stop and decorators add up
+    t.start()
+    time.sleep(0.001)
+    t.stop()
+    t.start()
+    t.stop()
+    assert t.count == 2
+    assert t.total_ns > t.elapsed_ns
+
+
+def test_start_stop():
+    t = Timer()
+    assert t.mean_ns is None
+    t.start()
+    elapsed = t.stop()
+    assert elapsed == t.elapsed_ns >= 0
+    assert t.mean_ns == elapsed
+    t.reset()
+    assert t.count == 0 and t.total_ns == 0
+
+
+def test_decorator():
+    @timed
+    def fact(n):
+        return 1 if n <= 1 else n * fact(n - 1)
+
+    assert fact.__name__ == 'fact'
+    assert fact(5) == 120
+    assert fact.timer.count == 5       # recursive calls count too
+
+
+def test_decorator_exception():
+    t = Timer()
+
+    @t
+    def fail():
+        raise ValueError
+
+    try:
+        fail()
+    except ValueError:
+        pass
+    assert t.count == 1
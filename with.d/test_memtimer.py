@@ -0,0 +1,86 @@
+import gc
+import threading
+import tracemalloc
+
+from registry import Registry
+from memtimer import MemTimer, rss
+
+
+def test_allocation():
+    reg = Registry()
+    with reg.timer('alloc', memory=True) as t:
+        kept = [bytearray(1000) for _ in range(1000)]
+        temp = bytearray(5 * 1000 * 1000)
+        del temp
+    assert isinstance(t, MemTimer)
+    assert t.alloc_bytes >= 1000 * 1000
+    assert t.peak_bytes >= 6 * 1000 * 1000
+    assert not tracemalloc.is_tracing()
+    stats = reg.snapshot()
+    assert stats['alloc']['count'] == 1
+    assert stats['alloc.alloc_bytes']['total'] == t.alloc_bytes
+    assert stats['alloc.peak_bytes']['max'] == t.peak_bytes
+    del kept
+
+
+def test_gc_counted():
+    reg = Registry()
+    callbacks = len(gc.callbacks)
+    with MemTimer('gc', registry=reg, trace=False) as t:
+        assert len(gc.callbacks) == callbacks + 1
+        gc.collect()
+        gc.collect()
+    assert len(gc.callbacks) == callbacks
+    assert t.gc_collections >= 2
+    assert t.gc_secs > 0
+    assert t.alloc_bytes is None
+    assert 'gc.alloc_bytes' not in reg.snapshot()
+    assert reg.snapshot()['gc.gc_collections']['total'] >= 2
+
+
+def test_rss():
+    size = rss()
+    if size is None:
+        return          # not on Linux
+    reg = Registry()
+    with MemTimer('rss', registry=reg, trace=False) as t:
+        block = bytearray(20 * 1000 * 1000)
+        block[::4096] = b'x' * len(block[::4096])   # touch every page
+    assert t.rss_bytes >= 10 * 1000 * 1000
+    del block
+
+
+def test_leaves_tracing_alone():
+    tracemalloc.start()
+    try:
+        with MemTimer('traced', registry=Registry()):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_threads_share_tracing():
+    reg = Registry()
+    started, ended = threading.Event(), threading.Event()
+    result = []
+
+    def other():
+        with MemTimer('other', registry=reg) as t:
+            started.set()
+            ended.wait()
+            kept = bytearray(1000 * 1000)
+        result.append(t.alloc_bytes)
+        del kept
+
+    thread = threading.Thread(target=other)
+    with MemTimer('first', registry=reg):
+        thread.start()
+        started.wait()
+    try:
+        assert tracemalloc.is_tracing()     # still needed by the other
+    finally:
+        ended.set()
+        thread.join()
+    assert result[0] >= 1000 * 1000
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,85 @@
+import time
+import asyncio
+import threading
+
+from profiler import Profiler
+
+
+def test_nesting():
+    prof = Profiler()
+    for _ in range(3):
+        with prof.section('outer'):
+            with prof.section('inner'):
+                time.sleep(0.002)
+            time.sleep(0.001)
+    tree = prof.tree()
+    assert set(tree) == {('outer',), ('outer', 'inner')}
+    outer, inner = tree[('outer',)], tree[('outer', 'inner')]
+    assert outer['count'] == inner['count'] == 3
+    assert inner['exclusive_ns'] == inner['inclusive_ns']
+    assert outer['exclusive_ns'] == \
+        outer['inclusive_ns'] - inner['inclusive_ns']
+    assert outer['exclusive_ns'] >= 3 * 1000 * 1000
+
+
+def test_decorator_nests_at_call_site():
+    prof = Profiler()
+
+    @prof.section('leaf')
+    def leaf():
+        pass
+
+    leaf()
+    with prof.section('a'):
+        leaf()
+    assert set(prof.tree()) == {('leaf',), ('a',), ('a', 'leaf')}
+
+
+def test_threads_nest_separately():
+    prof = Profiler()
+
+    def work():
+        with prof.section('thread'):
+            time.sleep(0.001)
+
+    with prof.section('main'):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    assert ('thread',) in prof.tree()
+    assert ('main', 'thread') not in prof.tree()
+
+
+def test_tasks_nest_separately():
+    prof = Profiler()
+
+    async def task(name):
+        with prof.section(name):
+            await asyncio.sleep(0.01)
+            with prof.section('io'):
+                await asyncio.sleep(0)
+
+    async def main():
+        with prof.section('main'):
+            await asyncio.gather(task('a'), task('b'))
+
+    asyncio.run(main())
+    assert set(prof.tree()) == {('main',), ('main', 'a'), ('main', 'b'),
+                                ('main', 'a', 'io'), ('main', 'b', 'io')}
+    # the tasks overlap, so the parent has no time of its own left
+    assert prof.tree()[('main',)]['exclusive_ns'] == 0
+
+
+def test_folded(tmp_path):
+    prof = Profiler()
+    prof.record(('req',), 5000000)
+    prof.record(('req', 'db'), 3000000)
+    prof.record(('req', 'db'), 1000000)
+    assert prof.folded() == 'req 1000\nreq;db 4000\n'
+    out = str(tmp_path / 'out.folded')
+    prof.dump_folded(out)
+    with open(out) as f:
+        assert f.read() == prof.folded()
+    assert 'db' in prof.report()
+    prof.reset()
+    assert prof.folded() == ''
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+import registry
+from registry import Timer, Registry, TimerStats
+
+
+def test_timer_records():
+    reg = Registry()
+    for _ in range(3):
+        with Timer('block', registry=reg) as t:
+            pass
+    assert t.elapsed == t.elapsed_secs * 1000
+    stats = reg.snapshot()['block']
+    assert stats['count'] == 3
+    assert stats['min'] <= stats['p50'] <= stats['max']
+    assert stats['total'] == pytest.approx(stats['mean'] * 3)
+
+
+def test_default_registry():
+    registry.reset()
+    with registry.registry.timer('default'):
+        pass
+    assert registry.snapshot()['default']['count'] == 1
+    registry.reset('default')
+    assert 'default' not in registry.snapshot()
+
+
+def test_reset_keeps_timers_working():
+    reg = Registry()
+    t = reg.timer('kept')
+    with t:
+        pass
+    reg.reset()
+    assert reg.names() == []
+    with t:
+        pass
+    assert reg.snapshot()['kept']['count'] == 1
+
+
+def test_percentiles():
+    stats = TimerStats()
+    for i in range(1, 1001):
+        stats.add(i / 1000.0)
+    for pct in (50, 95, 99):
+        assert stats.percentile(pct) == pytest.approx(pct / 100.0, rel=0.04)
+    assert stats.percentile(100) == 1.0
+    stats.add(0.0)
+    assert stats.percentile(0) == 0.0
+
+
+def test_bounded_buckets():
+    stats = TimerStats()
+    value = 1e-9
+    for _ in range(100000):
+        stats.add(value)
+        value *= 1.0002     # 1ns up to about half a second
+    assert stats.count == 100000
+    assert len(stats.buckets) <= 30 * registry.SUB_BUCKETS
+
+
+def test_threads():
+    reg = Registry()
+
+    def work():
+        for _ in range(1000):
+            with reg.timer('shared'):
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = reg.snapshot()['shared']
+    assert stats['count'] == 4000
+    assert sum(reg.stats('shared').buckets.values()) == 4000
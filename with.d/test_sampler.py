@@ -0,0 +1,49 @@
+import time
+import threading
+
+from sampler import Profile
+
+
+def busy(secs):
+    end = time.perf_counter() + secs
+    while time.perf_counter() < end:
+        pass
+
+
+def test_samples_busy_function(tmp_path):
+    with Profile(rate=200) as prof:
+        busy(0.2)
+    assert prof.samples > 5
+    assert sum(prof.stacks.values()) >= prof.samples - 1
+    assert prof.top(1)[0][0].startswith('busy (test_sampler.py:')
+    assert 0 <= prof.overhead < 0.5
+    folded = prof.folded()
+    assert 'test_samples_busy_function' in folded
+    assert ';busy (test_sampler.py:' in folded
+    out = str(tmp_path / 'out.folded')
+    prof.dump_folded(out)
+    with open(out) as f:
+        assert f.read() == folded
+
+
+def test_thread_selection():
+    def other():
+        busy(0.2)
+
+    for all_threads in (False, True):
+        thread = threading.Thread(target=other)
+        with Profile(rate=200, all_threads=all_threads) as prof:
+            thread.start()
+            busy(0.1)
+            thread.join()
+        assert ('other' in prof.folded()) == all_threads
+        assert '_run (sampler.py' not in prof.folded()
+
+
+def test_overhead_bound():
+    prof = Profile(rate=1000, max_overhead=1e-9)
+    with prof:
+        busy(0.05)
+    # every sample costs more than the impossible bound, so the
+    # interval must have been stretched
+    assert prof.interval > 0.001
@@ -1,3 +1,4 @@
+from __future__ import print_function
 from timeit import default_timer
 
 
@@ -13,7 +14,7 @@ class Timer(object):
         end = self.timer()
         self.elapsed_secs = end - self.start
         self.elapsed = self.elapsed_secs * 1000 # millisecs
-        print 'elapsed time: %f ms' % self.elapsed
+        print('elapsed time: %f ms' % self.elapsed)
 
 
 
@@ -1,3 +1,4 @@
+from __future__ import print_function
 from timeit import default_timer
 from contextlib import contextmanager
 
@@ -9,7 +10,7 @@ def Timer():
     finally:
         elapsed_secs = default_timer() - start
         elapsed = elapsed_secs * 1000 # millisecs
-        print 'elapsed time: %f ms' % elapsed
+        print('elapsed time: %f ms' % elapsed)
 
 
 
@@ -0,0 +1,72 @@
+''' yamlio: shared yaml loading and dumping for the PyBlog examples
+
+PyYAML's default safe_load and dump are written in pure Python.  If
+PyYAML was built against libyaml, the C-accelerated CSafeLoader and
+CSafeDumper parse and emit the same documents many times faster, so
+use those when we can and fall back to the pure-Python classes when
+we can't.  BACKEND says which is in use: 'libyaml' or 'python'.
+
+Setting YAMLIO_PURE=1 in the environment forces the pure-Python path.
+
+yaml itself is only imported the first time it is needed, so merely
+importing this module costs next to nothing.
+'''
+from __future__ import print_function
+
+__all__ = ["load", "dump", "BACKEND", "YAMLError"]
+
+import os
+
+_yaml = None
+_Loader = None
+_Dumper = None
+_backend = None
+
+
+def _setup():
+    '''import yaml and pick the loader and dumper classes'''
+    global _yaml, _Loader, _Dumper, _backend
+
+    import yaml
+    if os.getenv('YAMLIO_PURE', '0') != '1' and yaml.__with_libyaml__:
+        _Loader, _Dumper = yaml.CSafeLoader, yaml.CSafeDumper
+        _backend = 'libyaml'
+    else:
+        _Loader, _Dumper = yaml.SafeLoader, yaml.SafeDumper
+        _backend = 'python'
+    _yaml = yaml
+
+
+def __getattr__(name):
+    # BACKEND and YAMLError need yaml, so are looked up on demand
+    if name == 'BACKEND':
+        if _yaml is None:
+            _setup()
+        return _backend
+    if name == 'YAMLError':
+        if _yaml is None:
+            _setup()
+        return _yaml.YAMLError
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def load(stream):
+    '''parse a yaml document from a string or open file, safely'''
+    if _yaml is None:
+        _setup()
+    return _yaml.load(stream, Loader=_Loader)
+
+
+def dump(data, stream=None, **kwargs):
+    '''emit 'data' as yaml, in block style unless told otherwise
+    Returns the text if 'stream' is None, like yaml.dump.
+    '''
+    if _yaml is None:
+        _setup()
+    kwargs.setdefault('default_flow_style', False)
+    return _yaml.dump(data, stream, Dumper=_Dumper, **kwargs)
+
+
+if __name__ == '__main__':
+    _setup()
+    print('yaml backend:', _backend)